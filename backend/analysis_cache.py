@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+🗄️ Analysis Cache - Cache de resultados de análisis de audio
+Direccionado por contenido: la clave es un hash de los bytes del archivo
+más los parámetros del analizador, así que una misma pista re-subida
+con otro nombre reutiliza el análisis.
+Dos niveles: LRU en memoria del proceso + almacén en disco con expulsión por tamaño.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import numpy as np
+
+from analysis_formats import decode_array, encode_array
+
+logger = logging.getLogger(__name__)
+
+
+def audio_fingerprint(audio_path: Union[str, BinaryIO], block_size: int = 1 << 20) -> str:
+    """
+    Hash de los bytes del archivo leídos por bloques. No decodifica ni
+    carga la pista en memoria: cada consulta cuesta una lectura secuencial,
+    mucho menos que el análisis que evita. Volver a codificar la pista
+    (otro formato o bitrate) da otra clave.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if hasattr(audio_path, "read"):
+        audio_path.seek(0)
+        for block in iter(lambda: audio_path.read(block_size), b""):
+            digest.update(block)
+        audio_path.seek(0)
+    else:
+        with open(audio_path, "rb") as audio_file:
+            for block in iter(lambda: audio_file.read(block_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_json(value: Any) -> Any:
+    """Arrays de numpy (MFCC, beats) como buffers base64 en lugar de listas"""
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": encode_array(value, value.dtype.str)}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} no serializable")
+
+
+def _decode_json(obj: Dict) -> Any:
+    if "__ndarray__" in obj:
+        return decode_array(obj["__ndarray__"])
+    return obj
+
+
+class AnalysisCache:
+    """Cache de dos niveles para resultados de análisis"""
+
+    def __init__(self, cache_dir: str = "cache/analysis", max_disk_bytes: int = 512 * 1024 * 1024,
+                 max_memory_entries: int = 128):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Índice del disco: clave -> (bytes, último acceso)
+        self._disk_index: Dict[str, tuple] = {}
+        self._disk_bytes = 0
+        self._load_disk_index()
+
+        # Estadísticas
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, audio_path: Union[str, BinaryIO], params: Dict[str, Any]) -> str:
+        """Clave = hash del archivo + parámetros del analizador"""
+        params_str = json.dumps(params, sort_keys=True)
+        return f"{audio_fingerprint(audio_path)}-{hashlib.sha256(params_str.encode()).hexdigest()[:16]}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Buscar resultado en memoria y luego en disco"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        path = self._path_for(key)
+        try:
+            with open(path, "r") as f:
+                result = json.load(f, object_hook=_decode_json)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.error(f"Error leyendo cache de análisis {key}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Marcar acceso para la expulsión LRU (compartida entre procesos vía mtime)
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+        with self._lock:
+            self.disk_hits += 1
+            self._track_disk_entry(key, path.stat().st_size if path.exists() else 0, now)
+            self._remember(key, result)
+        return result
+
+    def set(self, key: str, result: Dict):
+        """Guardar resultado en ambos niveles"""
+        path = self._path_for(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(result, f, default=_encode_json)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error escribiendo cache de análisis {key}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+
+        with self._lock:
+            self._track_disk_entry(key, path.stat().st_size, time.time())
+            self._remember(key, result)
+            self._evict_disk()
+
+    def clear(self):
+        """Vaciar ambos niveles"""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._remove_disk_entry(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de aciertos y ocupación"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate_percent": round(hits / total * 100, 2) if total else 0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes
+            }
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _remember(self, key: str, result: Dict):
+        """Insertar en el LRU de memoria (requiere el lock)"""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load_disk_index(self):
+        """Reconstruir índice a partir de los archivos existentes"""
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            self._disk_index[path.stem] = (stat.st_size, stat.st_mtime)
+            self._disk_bytes += stat.st_size
+
+    def _track_disk_entry(self, key: str, size: int, accessed_at: float):
+        """Actualizar índice de disco (requiere el lock)"""
+        previous = self._disk_index.get(key)
+        if previous:
+            self._disk_bytes -= previous[0]
+        self._disk_index[key] = (size, accessed_at)
+        self._disk_bytes += size
+
+    def _remove_disk_entry(self, key: str):
+        """Borrar entrada de disco (requiere el lock)"""
+        size, _ = self._disk_index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            self._path_for(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self):
+        """Expulsar las entradas menos usadas hasta respetar el límite (requiere el lock)"""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for key, _ in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove_disk_entry(key)
+            self._memory.pop(key, None)
+            self.evictions += 1
+
+
+# Instancia global
+analysis_cache = AnalysisCache(
+    cache_dir=os.getenv("ANALYSIS_CACHE_DIR", "cache/analysis"),
+    max_disk_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_MB", "512")) * 1024 * 1024,
+    max_memory_entries=int(os.getenv("ANALYSIS_CACHE_MEMORY_ENTRIES", "128"))
+)
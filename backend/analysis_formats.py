@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+📦 Analysis Formats - Formatos de respuesta compactos para análisis de audio
+Los MFCC (13 × miles de frames) y los beats como listas JSON de floats
+dominan el tamaño de la respuesta. Aquí se ofrecen alternativas:
+  - json:    listas anidadas (por defecto, compatible)
+  - base64:  buffers little-endian float16/float32 codificados en base64
+  - npy:     arrays guardados como .npy con URL de descarga (se borran
+             pasadas ARRAYS_TTL horas o al superar ARRAYS_MAX_BYTES)
+  - summary: solo estadísticas resumidas, sin frames
+"""
+
+import base64
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+RESPONSE_FORMATS = ("json", "base64", "npy", "summary")
+ARRAY_DTYPES = {"float16": "<f2", "float32": "<f4"}
+ARRAYS_DIR = Path("output/ghost_studio/analysis_arrays")
+ARRAY_FILES = ("mfccs.npy", "beats.npy")
+ARRAYS_TTL = float(os.getenv("ANALYSIS_ARRAYS_TTL", "3600"))
+ARRAYS_MAX_BYTES = int(os.getenv("ANALYSIS_ARRAYS_MAX_BYTES", str(256 * 1024 * 1024)))
+# Como mucho una limpieza por intervalo (recorre el directorio)
+CLEANUP_INTERVAL = 60
+
+logger = logging.getLogger(__name__)
+_cleanup_lock = threading.Lock()
+_last_cleanup = 0.0
+
+
+def encode_array(values: Any, dtype: str = "<f4") -> Dict[str, Any]:
+    """Codificar array como buffer little-endian en base64"""
+    array = np.ascontiguousarray(np.asarray(values, dtype=dtype))
+    return {
+        "encoding": "base64",
+        "dtype": dtype,
+        "shape": list(array.shape),
+        "data": base64.b64encode(array.tobytes()).decode("ascii")
+    }
+
+
+def decode_array(payload: Dict[str, Any]) -> np.ndarray:
+    """Decodificar un array producido por encode_array"""
+    buffer = base64.b64decode(payload["data"])
+    return np.frombuffer(buffer, dtype=payload["dtype"]).reshape(payload["shape"])
+
+
+def summarize_arrays(mfccs: np.ndarray, beats: np.ndarray) -> Dict[str, Any]:
+    """Estadísticas resumidas para clientes que no necesitan los frames"""
+    summary = {
+        "mfcc_summary": {
+            "frames": int(mfccs.shape[1]) if mfccs.ndim == 2 else 0,
+            "mean": mfccs.mean(axis=1).tolist() if mfccs.size else [],
+            "std": mfccs.std(axis=1).tolist() if mfccs.size else [],
+            "min": mfccs.min(axis=1).tolist() if mfccs.size else [],
+            "max": mfccs.max(axis=1).tolist() if mfccs.size else []
+        },
+        "beats_summary": {
+            "count": int(beats.size),
+            "first_frame": int(beats[0]) if beats.size else None,
+            "last_frame": int(beats[-1]) if beats.size else None,
+            "mean_interval_frames": float(np.diff(beats).mean()) if beats.size > 1 else 0.0
+        }
+    }
+    return summary
+
+
+def cleanup_arrays(max_age: float = ARRAYS_TTL, max_bytes: int = ARRAYS_MAX_BYTES) -> int:
+    """
+    Borrar los .npy caducados y, si aún se supera max_bytes, los más
+    antiguos. Devuelve el número de análisis borrados.
+    """
+    if not ARRAYS_DIR.exists():
+        return 0
+    entries = []
+    for directory in ARRAYS_DIR.iterdir():
+        try:
+            files = [path.stat() for path in directory.iterdir()]
+            created = directory.stat().st_mtime
+        except OSError:
+            continue
+        entries.append((created, sum(stat.st_size for stat in files), directory))
+
+    now = time.time()
+    total_bytes = sum(size for _, size, _ in entries)
+    removed = 0
+    for created, size, directory in sorted(entries, key=lambda entry: entry[0]):
+        if now - created <= max_age and total_bytes <= max_bytes:
+            break
+        shutil.rmtree(directory, ignore_errors=True)
+        total_bytes -= size
+        removed += 1
+    return removed
+
+
+def _maybe_cleanup():
+    """Limpieza oportunista al guardar, sin repetirla en cada petición"""
+    global _last_cleanup
+    now = time.time()
+    if now - _last_cleanup < CLEANUP_INTERVAL or not _cleanup_lock.acquire(blocking=False):
+        return
+    try:
+        _last_cleanup = now
+        removed = cleanup_arrays()
+        if removed:
+            logger.info(f"Arrays de análisis borrados: {removed}")
+    except Exception as e:
+        logger.warning(f"Error limpiando arrays de análisis: {e}")
+    finally:
+        _cleanup_lock.release()
+
+
+def save_arrays(mfccs: np.ndarray, beats: np.ndarray, dtype: str = "<f4") -> str:
+    """Guardar arrays como .npy y devolver su identificador de descarga"""
+    _maybe_cleanup()
+    array_id = uuid.uuid4().hex
+    target = ARRAYS_DIR / array_id
+    target.mkdir(parents=True, exist_ok=True)
+    np.save(target / "mfccs.npy", mfccs.astype(dtype))
+    np.save(target / "beats.npy", beats.astype("<f4"))
+    return array_id
+
+
+def get_array_path(array_id: str, name: str) -> Path:
+    """Ruta de un .npy guardado (valida id y nombre para evitar path traversal)"""
+    if name not in ARRAY_FILES:
+        raise ValueError(f"Array desconocido: {name}")
+    uuid.UUID(hex=array_id)
+    return ARRAYS_DIR / array_id / name
+
+
+def format_analysis_result(result: Dict[str, Any], response_format: str = "json",
+                           dtype: str = "float16",
+                           download_base_url: str = "/api/ghost-studio/analysis-arrays") -> Dict[str, Any]:
+    """
+    Adaptar un resultado de AudioAnalyzer al formato de respuesta pedido.
+    El analizador deja MFCC y beats como ndarray: solo el formato json los
+    convierte en listas. Los beats siempre se codifican como float32 para
+    conservar índices exactos.
+    """
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f"Formato de respuesta no soportado: {response_format}")
+    if dtype not in ARRAY_DTYPES:
+        raise ValueError(f"dtype no soportado: {dtype}")
+
+    if not result.get("success") or "mfccs" not in result:
+        return result
+    if response_format == "json":
+        return {
+            **result,
+            "mfccs": np.asarray(result["mfccs"]).tolist(),
+            "beats": np.asarray(result["beats"]).tolist()
+        }
+
+    mfccs = np.asarray(result["mfccs"], dtype=np.float32)
+    beats = np.asarray(result["beats"], dtype=np.float32)
+    formatted = {k: v for k, v in result.items() if k not in ("mfccs", "beats")}
+    formatted.update(summarize_arrays(mfccs, beats))
+    formatted["response_format"] = response_format
+
+    if response_format == "base64":
+        formatted["mfccs"] = encode_array(mfccs, ARRAY_DTYPES[dtype])
+        formatted["beats"] = encode_array(beats, "<f4")
+    elif response_format == "npy":
+        array_id = save_arrays(mfccs, beats, ARRAY_DTYPES[dtype])
+        formatted["arrays"] = {
+            name.split(".")[0]: f"{download_base_url}/{array_id}/{name}"
+            for name in ARRAY_FILES
+        }
+
+    return formatted
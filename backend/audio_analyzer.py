@@ -8,77 +8,496 @@ import librosa
 import numpy as np
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import asyncio
+import functools
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import os
-import tempfile
-import requests
+import time
+import tracemalloc
+import threading
+import multiprocessing
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import soundfile as sf
+import soxr
 from scipy import stats
 from scipy.signal import find_peaks
+from scipy.cluster.hierarchy import linkage, fcluster
+from numpy.lib.stride_tricks import sliding_window_view
+from analysis_cache import analysis_cache
+from analysis_formats import format_analysis_result
+from audio_download import AudioDownload, open_audio_stream, open_audio_stream_async
+from monitoring_analytics_system import metrics_dashboard
+from process_pools import shutdown_executor
 
 logger = logging.getLogger(__name__)
 
+# Versión del esquema de resultados (forma parte de la clave de cache)
+ANALYSIS_VERSION = 5
+
+# Modos de carga -> tipo de remuestreo de librosa.load
+#   hq:        comportamiento histórico, soxr_hq a 22050 Hz
+#   fast:      soxr_lq; calidad de sobra para extraer características
+#   polyphase: scipy resample_poly, muy rápido con relaciones enteras (44.1k -> 22.05k)
+# Todos analizan a 22050 Hz: centroide, rolloff, croma y género dependen de
+# la tasa y un modo sin remuestreo daría otro resultado para la misma pista.
+# benchmarks/bench_load_modes.py mide la aceleración de cada modo
+LOAD_MODES = {
+    "hq": "soxr_hq",
+    "fast": "soxr_lq",
+    "polyphase": "polyphase",
+}
+
+# Perfiles tonales de Krumhansl-Kessler
+KEY_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+def _build_key_templates() -> np.ndarray:
+    """
+    Matriz 24×12 con las 12 tonalidades mayores y 12 menores,
+    centradas y normalizadas: el producto escalar con un frame de croma
+    normalizado es directamente su correlación de Pearson
+    """
+    templates = np.stack(
+        [np.roll(MAJOR_PROFILE, i) for i in range(12)] +
+        [np.roll(MINOR_PROFILE, i) for i in range(12)]
+    )
+    templates = templates - templates.mean(axis=1, keepdims=True)
+    return templates / np.linalg.norm(templates, axis=1, keepdims=True)
+
+KEY_TEMPLATES = _build_key_templates()
+
+class StageProfiler:
+    """
+    Tiempo wall/CPU exclusivo y pico de memoria (tracemalloc) por etapa.
+    Las etapas pueden anidarse: el tiempo de las hijas se descuenta
+    de la madre. El tiempo de CPU es el del proceso completo.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stack: List[Dict[str, float]] = []
+        self._owns_tracemalloc = False
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Medir una etapa"""
+        self._flush_peak()
+        frame = {"children_wall": 0.0, "children_cpu": 0.0, "peak": 0}
+        self._stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._flush_peak()
+            self._stack.pop()
+
+            entry = self.stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_memory_mb": 0.0})
+            entry["calls"] += 1
+            entry["wall_ms"] += (wall - frame["children_wall"]) * 1000
+            entry["cpu_ms"] += (cpu - frame["children_cpu"]) * 1000
+            entry["peak_memory_mb"] = max(entry["peak_memory_mb"], frame["peak"] / (1024 * 1024))
+
+            if self._stack:
+                parent = self._stack[-1]
+                parent["children_wall"] += wall
+                parent["children_cpu"] += cpu
+                parent["peak"] = max(parent["peak"], frame["peak"])
+
+    def finish(self) -> Dict:
+        """Cerrar el perfil y devolver el resumen"""
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        peak = max([peak] + [entry["peak_memory_mb"] * 1024 * 1024 for entry in self.stages.values()])
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+        return {
+            "stages": {
+                name: {k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()}
+                for name, entry in self.stages.items()
+            },
+            "total_wall_ms": round((time.perf_counter() - self._wall_start) * 1000, 3),
+            "total_cpu_ms": round((time.process_time() - self._cpu_start) * 1000, 3),
+            "peak_memory_mb": round(peak / (1024 * 1024), 3)
+        }
+
+    def _flush_peak(self):
+        """Atribuir el pico desde el último corte a la etapa en curso"""
+        if not tracemalloc.is_tracing():
+            return
+        if self._stack:
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+
+class _NullProfiler:
+    """Profiler sin coste para el camino normal"""
+
+    def stage(self, name: str):
+        return nullcontext()
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class FeatureGraph:
+    """
+    Grafo de características memoizado por petición.
+    Calcula un único espectrograma de magnitud por pista y deriva de él
+    el resto de características espectrales.
+    """
+
+    def __init__(self, y: np.ndarray, sr: int, n_fft: int = 2048, hop_length: int = 512, n_mfcc: int = 13,
+                 profiler=NULL_PROFILER):
+        self.y = y
+        self.profiler = profiler
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+        self._cache: Dict[str, object] = {}
+
+        # Nodos del grafo: cada uno declara cómo calcularse a partir de otros
+        self._nodes = {
+            "magnitude": self._compute_magnitude,
+            "power": lambda: self.get("magnitude") ** 2,
+            "mel_db": self._compute_mel_db,
+            "spectral_centroid": lambda: librosa.feature.spectral_centroid(
+                S=self.get("magnitude"), sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0],
+            "spectral_rolloff": lambda: librosa.feature.spectral_rolloff(
+                S=self.get("magnitude"), sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0],
+            "mfcc": lambda: librosa.feature.mfcc(S=self.get("mel_db"), sr=self.sr, n_mfcc=self.n_mfcc),
+            "rms": lambda: librosa.feature.rms(
+                S=self.get("magnitude"), frame_length=self.n_fft, hop_length=self.hop_length
+            )[0],
+            # ZCR es una característica del dominio temporal; solo se memoiza
+            "zcr": lambda: librosa.feature.zero_crossing_rate(
+                self.y, frame_length=self.n_fft, hop_length=self.hop_length
+            )[0],
+            "onset_strength": lambda: librosa.onset.onset_strength(
+                S=self.get("mel_db"), sr=self.sr, hop_length=self.hop_length
+            ),
+            "chroma": lambda: librosa.feature.chroma_stft(
+                S=self.get("power"), sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length
+            ),
+            "piptrack": lambda: librosa.piptrack(
+                S=self.get("magnitude"), sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length
+            ),
+            "beat_track": lambda: librosa.beat.beat_track(
+                onset_envelope=self.get("onset_strength"), sr=self.sr, hop_length=self.hop_length
+            ),
+        }
+
+    def get(self, feature: str):
+        """Obtener característica, calculándola solo la primera vez"""
+        if feature not in self._cache:
+            with self.profiler.stage(feature):
+                self._cache[feature] = self._nodes[feature]()
+        return self._cache[feature]
+
+    def _compute_magnitude(self) -> np.ndarray:
+        """Espectrograma de magnitud compartido por todas las características"""
+        return np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length))
+
+    def _compute_mel_db(self) -> np.ndarray:
+        """Espectrograma mel en dB (base de MFCC y onset strength)"""
+        mel = librosa.feature.melspectrogram(S=self.get("power"), sr=self.sr)
+        # Sin top_db: el recorte relativo al máximo de la pista no se puede
+        # reproducir por bloques y el modo streaming daría otros MFCC
+        return librosa.power_to_db(mel, top_db=None)
+
+
+class RunningStats:
+    """
+    Media y varianza acumuladas por bloques (combinación de Chan),
+    con memoria constante independiente de la duración de la pista
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        """Incorporar un bloque de valores"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        n = values.size
+        if n == 0:
+            return
+
+        batch_mean = float(values.mean())
+        batch_m2 = float(np.sum((values - batch_mean) ** 2))
+        total = self.count + n
+        delta = batch_mean - self.mean
+
+        self.mean += delta * n / total
+        self._m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+
+class BoundedFrames:
+    """
+    Características a tasa de frame (filas x frames) con memoria acotada.
+    Hasta max_frames se guardan tal cual; al superarlo se promedian los
+    frames adyacentes por parejas y se duplica `factor`, el número de
+    frames originales que representa cada columna.
+    """
+
+    def __init__(self, max_frames: int):
+        self.max_frames = max_frames
+        self.factor = 1
+        self._blocks: List[np.ndarray] = []
+        self._frames = 0
+        # Frames sin agregar (menos de `factor`) a la espera del siguiente bloque
+        self._pending: Optional[np.ndarray] = None
+
+    def append(self, block: np.ndarray):
+        block = np.asarray(block, dtype=np.float32)
+        if self._pending is not None:
+            block = np.hstack([self._pending, block])
+            self._pending = None
+        usable = block.shape[1] - block.shape[1] % self.factor
+        if usable < block.shape[1]:
+            self._pending = block[:, usable:]
+        if usable:
+            pooled = block[:, :usable].reshape(block.shape[0], -1, self.factor).mean(axis=2)
+            self._blocks.append(pooled)
+            self._frames += pooled.shape[1]
+        while self._frames > self.max_frames:
+            self._halve()
+
+    def _halve(self):
+        data = np.hstack(self._blocks)
+        paired = data.shape[1] - data.shape[1] % 2
+        if paired < data.shape[1]:
+            # La columna sobrante vale por `factor` frames: se repite para conservar su peso
+            leftover = np.repeat(data[:, paired:], self.factor, axis=1)
+            self._pending = leftover if self._pending is None else np.hstack([leftover, self._pending])
+        data = data[:, :paired].reshape(data.shape[0], -1, 2).mean(axis=2)
+        self.factor *= 2
+        self._blocks = [data]
+        self._frames = data.shape[1]
+
+    def finish(self) -> np.ndarray:
+        """Todas las columnas; los frames pendientes forman una última columna parcial"""
+        blocks = list(self._blocks)
+        if self._pending is not None:
+            blocks.append(self._pending.mean(axis=1, keepdims=True))
+        return np.hstack(blocks)
+
+
 class AudioAnalyzer:
     def __init__(self):
         self.sample_rate = 22050
         self.hop_length = 512
         self.n_fft = 2048
         
-    def analyze_audio_file(self, audio_path: str) -> Dict:
+        # Frames por bloque en modo streaming (~6 s de audio por bloque)
+        self.stream_block_length = 256
+        # Frames retenidos en streaming para beats y secciones (~25 min a
+        # resolución completa); más allá se agregan y la memoria no crece
+        self.stream_max_frames = 1 << 16
+        
+        # Modo de carga por defecto (ver LOAD_MODES)
+        self.load_mode = "hq"
+        
+        # Pool de procesos persistente y de tamaño fijo, compartido por todos
+        # los lotes; cada llamada limita sus trabajos en vuelo con `workers`
+        self.pool_workers = int(os.getenv("ANALYSIS_POOL_WORKERS", os.cpu_count() or 1))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
+        # Segmentación estructural (en beats)
+        self.max_sections = 12
+        self.section_kernel_beats = 16
+        self.section_min_beats = 8
+        self.section_cluster_threshold = 0.25
+        
+        # Cache de resultados direccionado por contenido
+        self.cache = analysis_cache
+        
+        # Publicar perfiles en metrics_dashboard (desactivado en workers del pool)
+        self.record_profile_metrics = True
+        
+    def analyze_audio_file(self, audio_path: Union[str, BinaryIO], streaming: bool = False,
+                           use_cache: bool = True, profile: bool = False, load_mode: Optional[str] = None,
+                           offset: float = 0.0, duration: Optional[float] = None) -> Dict:
+        """
+        Analizar archivo de audio REAL (ruta o buffer en memoria).
+        Con profile=True el resultado incluye tiempos y memoria por etapa.
+        offset/duration (segundos) limitan el análisis a una ventana (previews).
+        """
+        load_mode = load_mode or self.load_mode
+        if load_mode not in LOAD_MODES:
+            return {"success": False, "error": f"Modo de carga no soportado: {load_mode}"}
+        
+        profiler = StageProfiler() if profile else NULL_PROFILER
+        if profile:
+            profiler.start()
+        
+        result = None
+        cache_key = None
+        if use_cache and self.cache is not None:
+            try:
+                with profiler.stage("cache_lookup"):
+                    cache_key = self.cache.make_key(
+                        audio_path, self._cache_params(streaming, load_mode, offset, duration)
+                    )
+                    cached = self.cache.get(cache_key)
+                if cached is not None:
+                    result = {**cached, "cached": True}
+            except Exception as e:
+                logger.warning(f"Cache de análisis no disponible: {e}")
+                cache_key = None
+        
+        if result is None:
+            if streaming:
+                result = self.analyze_audio_stream(audio_path, profiler=profiler, offset=offset,
+                                                   duration=duration, load_mode=load_mode)
+            else:
+                result = self._analyze_full(
+                    audio_path, profiler=profiler, load_mode=load_mode, offset=offset, duration=duration
+                )
+            
+            if cache_key and result.get("success"):
+                self.cache.set(cache_key, result)
+        
+        if profile:
+            result = {**result, "profile": profiler.finish()}
+            if self.record_profile_metrics:
+                self.record_profile(result["profile"], streaming)
+        
+        return result
+    
+    def record_profile(self, profile: Dict, streaming: bool = False):
+        """Publicar el perfil por etapa en metrics_dashboard"""
+        mode = "streaming" if streaming else "full"
+        tags = {"mode": mode, "n_fft": str(self.n_fft), "hop_length": str(self.hop_length)}
+        for stage, entry in profile["stages"].items():
+            stage_tags = {**tags, "stage": stage}
+            metrics_dashboard.record_metric(f"audio_analysis.{stage}.wall_ms", entry["wall_ms"], stage_tags)
+            metrics_dashboard.record_metric(f"audio_analysis.{stage}.cpu_ms", entry["cpu_ms"], stage_tags)
+        metrics_dashboard.record_metric("audio_analysis.total.wall_ms", profile["total_wall_ms"], tags)
+        metrics_dashboard.record_metric("audio_analysis.peak_memory_mb", profile["peak_memory_mb"], tags)
+    
+    def _cache_params(self, streaming: bool, load_mode: str, offset: float, duration: Optional[float]) -> Dict:
+        """Parámetros que afectan al resultado y forman parte de la clave de cache"""
+        return {
+            "sample_rate": self.sample_rate,
+            "hop_length": self.hop_length,
+            "n_fft": self.n_fft,
+            "streaming": streaming,
+            # En streaming load_mode elige la calidad del remuestreo por bloques
+            "load_mode": load_mode,
+            "offset": offset,
+            "duration": duration,
+            "version": ANALYSIS_VERSION
+        }
+    
+    def _to_standard_frames(self, frames: np.ndarray, sr: int, hop_length: int) -> np.ndarray:
+        """Expresar índices de frame en la rejilla estándar (sample_rate / hop_length)"""
+        if sr == self.sample_rate and hop_length == self.hop_length:
+            return frames
+        times = librosa.frames_to_time(frames, sr=sr, hop_length=hop_length)
+        return librosa.time_to_frames(times, sr=self.sample_rate, hop_length=self.hop_length)
+    
+    def _analyze_full(self, audio_path: Union[str, BinaryIO], profiler=NULL_PROFILER, load_mode: str = "hq",
+                      offset: float = 0.0, duration: Optional[float] = None) -> Dict:
         """
-        Analizar archivo de audio REAL
+        Análisis con la señal completa en memoria
         """
         try:
+            _rewind(audio_path)
+            
             # Cargar audio con librosa
-            y, sr = librosa.load(audio_path, sr=self.sample_rate)
+            with profiler.stage("load"):
+                y, sr = librosa.load(audio_path, sr=self.sample_rate, res_type=LOAD_MODES[load_mode],
+                                     offset=offset, duration=duration)
+            
+            # Un solo STFT por pista, compartido por todas las características
+            hop_length = self.hop_length
+            features = FeatureGraph(y, sr, n_fft=self.n_fft, hop_length=hop_length, profiler=profiler)
             
             # Análisis básico
             duration = len(y) / sr
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
+            tempo, beat_frames = features.get("beat_track")
             
             # Análisis espectral
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+            spectral_centroids = features.get("spectral_centroid")
+            spectral_rolloff = features.get("spectral_rolloff")
+            mfccs = features.get("mfcc")
             
             # Análisis de tono
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+            pitches, magnitudes = features.get("piptrack")
             pitch_mean = np.mean(pitches[pitches > 0])
             
             # Análisis de energía
-            rms = librosa.feature.rms(y=y)[0]
+            rms = features.get("rms")
             energy_mean = np.mean(rms)
             
             # Análisis de zero crossing rate
-            zcr = librosa.feature.zero_crossing_rate(y)[0]
+            zcr = features.get("zcr")
             zcr_mean = np.mean(zcr)
             
+            # Detección de tonalidad
+            with profiler.stage("key"):
+                key_info = self._key_from_scores(*self._key_scores(features.get("chroma")))
+            
             # Detección de género (básica)
-            genre = self._detect_genre(y, sr, tempo)
+            genre = self._detect_genre(np.mean(spectral_centroids), tempo)
             
             # Análisis de complejidad
-            complexity = self._calculate_complexity(y, sr)
+            with profiler.stage("complexity"):
+                complexity = self._calculate_complexity(features)
             
             # Detección de secciones
-            sections = self._detect_sections(y, sr)
+            with profiler.stage("sections"):
+                sections = self._detect_sections(
+                    features.get("chroma"), mfccs, beat_frames, sr, hop_length, duration
+                )
             
-            return {
-                "success": True,
-                "duration": float(duration),
-                "tempo": float(tempo),
-                "key_features": {
-                    "spectral_centroid_mean": float(np.mean(spectral_centroids)),
-                    "spectral_rolloff_mean": float(np.mean(spectral_rolloff)),
-                    "pitch_mean": float(pitch_mean) if not np.isnan(pitch_mean) else 0,
-                    "energy_mean": float(energy_mean),
-                    "zcr_mean": float(zcr_mean)
-                },
-                "mfccs": mfccs.tolist(),
-                "genre": genre,
-                "complexity": complexity,
-                "sections": sections,
-                "beats": beats.tolist(),
-                "analysis_timestamp": str(np.datetime64('now'))
-            }
+            with profiler.stage("build_result"):
+                result = self._build_result(
+                    duration=duration,
+                    tempo=tempo,
+                    spectral_centroid_mean=np.mean(spectral_centroids),
+                    spectral_rolloff_mean=np.mean(spectral_rolloff),
+                    pitch_mean=pitch_mean,
+                    energy_mean=energy_mean,
+                    zcr_mean=zcr_mean,
+                    mfccs=mfccs,
+                    genre=genre,
+                    complexity=complexity,
+                    sections=sections,
+                    beats=beat_frames,
+                    key_info=key_info
+                )
+            return result
             
         except Exception as e:
             logger.error(f"Error analizando audio: {e}")
@@ -87,50 +506,456 @@ class AudioAnalyzer:
                 "error": str(e)
             }
     
-    def analyze_audio_url(self, audio_url: str) -> Dict:
+    def analyze_audio_stream(self, audio_path: Union[str, BinaryIO], profiler=NULL_PROFILER,
+                             offset: float = 0.0, duration: Optional[float] = None,
+                             load_mode: Optional[str] = None) -> Dict:
         """
-        Analizar audio desde URL
+        Analizar archivo de audio por bloques con memoria acotada.
+        Solo se acumulan estadísticas y características a tasa de frame
+        (MFCC, croma, envolvente de onsets), como mucho stream_max_frames
+        columnas (ver BoundedFrames), nunca la señal completa.
+        Los bloques se remuestrean a self.sample_rate con un resampler soxr
+        con estado, igual que la carga completa: centroide, rolloff y género
+        no dependen del modo. load_mode elige la calidad (ver _stream_blocks).
         """
         try:
-            # Descargar audio temporalmente
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                response = requests.get(audio_url, timeout=30)
-                response.raise_for_status()
-                tmp_file.write(response.content)
-                tmp_file.flush()
+            _rewind(audio_path)
+            info = sf.info(audio_path)
+        except RuntimeError as e:
+            logger.warning(f"Formato no soportado para streaming ({e}), usando carga completa")
+            return self._analyze_full(audio_path, profiler=profiler, load_mode=load_mode or self.load_mode,
+                                      offset=offset, duration=duration)
+        
+        try:
+            sr = self.sample_rate
+            n_fft, hop_length = self.n_fft, self.hop_length
+            
+            total_duration = max(info.duration - offset, 0.0)
+            if duration is not None:
+                total_duration = min(total_duration, duration)
+            
+            centroid_stats = RunningStats()
+            rolloff_stats = RunningStats()
+            pitch_stats = RunningStats()
+            energy_stats = RunningStats()
+            zcr_stats = RunningStats()
+            mfcc_stats = [RunningStats() for _ in range(13)]
+            # MFCC (13) + croma (12) + onsets (1) con la misma rejilla de frames
+            frames = BoundedFrames(self.stream_max_frames)
+            has_frames = False
+            previous_mel = None
+            # onset_strength(center=True) retrasa la envolvente n_fft/(2*hop) frames
+            onset_carry = np.zeros(n_fft // (2 * hop_length))
+            key_score_sum = np.zeros(len(KEY_TEMPLATES))
+            key_weight_sum = 0.0
+            
+            # Mismas muestras que librosa.load: recorte a tasa nativa y longitud
+            # remuestreada ceil(n * sr / sr_nativo)
+            start_sample = int(offset * info.samplerate)
+            native_samples = max(info.frames - start_sample, 0)
+            if duration is not None:
+                native_samples = min(native_samples, int(duration * info.samplerate))
+            total_samples = int(np.ceil(native_samples * sr / info.samplerate))
+            
+            stream = self._stream_blocks(
+                audio_path, info.samplerate, start_sample, native_samples,
+                block_samples=(self.stream_block_length - 1) * hop_length + n_fft,
+                step=self.stream_block_length * hop_length,
+                res_type=LOAD_MODES.get(load_mode or self.load_mode)
+            )
+            
+            # Mismos frames que stft(center=True) del modo completo: n_fft/2 ceros
+            # en cada extremo (si la rejilla de frames lo permite) y sin el
+            # relleno del último bloque
+            pad = n_fft // 2 if (n_fft // 2) % hop_length == 0 else 0
+            block_start = 0
+            last_block = False
+            
+            while not last_block:
+                with profiler.stage("load"):
+                    y_block = next(stream, None)
+                if y_block is None:
+                    break
+                
+                real_samples = total_samples - block_start
+                if block_start + len(y_block) >= total_samples:
+                    # Este bloque contiene el final: sus frames llegan hasta el relleno final
+                    last_block = True
+                    y_block = np.concatenate([y_block[:max(real_samples, 0)], np.zeros(pad, dtype=y_block.dtype)])
+                if block_start == 0 and pad:
+                    y_block = np.concatenate([np.zeros(pad, dtype=y_block.dtype), y_block])
+                if len(y_block) < n_fft:
+                    y_block = np.pad(y_block, (0, n_fft - len(y_block)))
+                block_start += self.stream_block_length * hop_length
+                
+                with profiler.stage("magnitude"):
+                    magnitude = np.abs(librosa.stft(y_block, n_fft=n_fft, hop_length=hop_length, center=False))
                 
-                # Analizar archivo
-                result = self.analyze_audio_file(tmp_file.name)
+                with profiler.stage("spectral"):
+                    centroid_stats.update(librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=n_fft)[0])
+                    rolloff_stats.update(librosa.feature.spectral_rolloff(S=magnitude, sr=sr, n_fft=n_fft)[0])
+                    energy_stats.update(librosa.feature.rms(S=magnitude, frame_length=n_fft)[0])
+                    zcr_stats.update(librosa.feature.zero_crossing_rate(
+                        y_block, frame_length=n_fft, hop_length=hop_length, center=False
+                    )[0])
                 
-                # Limpiar archivo temporal
-                os.unlink(tmp_file.name)
+                with profiler.stage("piptrack"):
+                    pitches, _ = librosa.piptrack(S=magnitude, sr=sr, n_fft=n_fft, hop_length=hop_length)
+                    pitch_stats.update(pitches[pitches > 0])
                 
-                return result
+                # Las puntuaciones de tonalidad son sumas ponderadas: se acumulan por bloque
+                with profiler.stage("key"):
+                    chroma = librosa.feature.chroma_stft(S=magnitude ** 2, sr=sr, n_fft=n_fft)
+                    block_scores, block_weight = self._key_scores(chroma)
+                    key_score_sum += block_scores
+                    key_weight_sum += block_weight
                 
+                # Sin top_db, igual que FeatureGraph en el modo completo
+                with profiler.stage("mfcc"):
+                    mel_db = librosa.power_to_db(
+                        librosa.feature.melspectrogram(S=magnitude ** 2, sr=sr),
+                        top_db=None
+                    )
+                    mfcc = librosa.feature.mfcc(S=mel_db, n_mfcc=13)
+                    for coefficient, stats_row in zip(mfcc, mfcc_stats):
+                        stats_row.update(coefficient)
+                
+                # Flujo espectral con el último frame del bloque anterior como referencia
+                with profiler.stage("onset_strength"):
+                    if previous_mel is None:
+                        reference = np.hstack([mel_db[:, :1], mel_db])
+                    else:
+                        reference = np.hstack([previous_mel, mel_db])
+                    onset = np.maximum(0.0, np.diff(reference, axis=1)).mean(axis=0)
+                    previous_mel = mel_db[:, -1:]
+                    delayed = np.concatenate([onset_carry, onset])
+                    onset, onset_carry = delayed[:len(onset)], delayed[len(onset):]
+                
+                frames.append(np.vstack([mfcc, chroma, onset[np.newaxis, :]]))
+                has_frames = True
+            
+            if not has_frames:
+                raise ValueError("Archivo de audio vacío")
+            
+            frame_features = frames.finish()
+            mfccs, chroma, novelty = frame_features[:13], frame_features[13:25], frame_features[25]
+            # Pistas muy largas: cada columna agrega `factor` frames
+            frame_hop = hop_length * frames.factor
+            
+            with profiler.stage("beat_track"):
+                tempo, beat_frames = librosa.beat.beat_track(
+                    onset_envelope=novelty.astype(np.float64), sr=sr, hop_length=frame_hop
+                )
+            
+            # Expresar los beats en frames de la configuración estándar del analizador
+            beats = self._to_standard_frames(beat_frames, sr, frame_hop)
+            
+            genre = self._detect_genre(centroid_stats.mean, tempo)
+            complexity = self._complexity_from_stats(
+                centroid_stats.mean, centroid_stats.std,
+                rolloff_stats.mean, rolloff_stats.std,
+                np.mean([stats_row.variance for stats_row in mfcc_stats])
+            )
+            with profiler.stage("sections"):
+                sections = self._detect_sections(
+                    chroma, mfccs, beat_frames, sr, frame_hop, total_duration
+                )
+            
+            with profiler.stage("build_result"):
+                result = self._build_result(
+                    duration=total_duration,
+                    tempo=tempo,
+                    spectral_centroid_mean=centroid_stats.mean,
+                    spectral_rolloff_mean=rolloff_stats.mean,
+                    pitch_mean=pitch_stats.mean if pitch_stats.count else np.nan,
+                    energy_mean=energy_stats.mean,
+                    zcr_mean=zcr_stats.mean,
+                    mfccs=mfccs,
+                    genre=genre,
+                    complexity=complexity,
+                    sections=sections,
+                    beats=beats,
+                    key_info=self._key_from_scores(key_score_sum, key_weight_sum)
+                )
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error analizando audio en streaming: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _stream_blocks(self, audio_path: Union[str, BinaryIO], native_sr: int, start: int, frames: int,
+                       block_samples: int, step: int, res_type: Optional[str] = "soxr_hq") -> Iterator[np.ndarray]:
+        """
+        Bloques mono de block_samples muestras a self.sample_rate que avanzan
+        `step` (como librosa.stream; el último se rellena con ceros).
+        soxr.ResampleStream da exactamente la salida de soxr.resample sobre la
+        señal completa; polyphase no tiene versión por bloques y usa soxr_hq.
+        """
+        _rewind(audio_path)
+        resampler = None
+        if native_sr != self.sample_rate:
+            quality = res_type if res_type and res_type.startswith("soxr") else "soxr_hq"
+            resampler = soxr.ResampleStream(native_sr, self.sample_rate, 1, dtype="float32", quality=quality)
+        
+        def resampled_chunks() -> Iterator[np.ndarray]:
+            for block in sf.blocks(audio_path, blocksize=1 << 16, start=start, frames=frames,
+                                   dtype="float32", always_2d=True):
+                mono = block.mean(axis=1)
+                yield resampler.resample_chunk(mono) if resampler is not None else mono
+            if resampler is not None:
+                yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        
+        buffer = np.zeros(0, dtype=np.float32)
+        for chunk in resampled_chunks():
+            buffer = np.concatenate([buffer, chunk])
+            while len(buffer) >= block_samples:
+                yield buffer[:block_samples]
+                buffer = buffer[step:]
+        if len(buffer):
+            yield np.pad(buffer, (0, block_samples - len(buffer)))
+    
+    def _build_result(self, duration: float, tempo: float, spectral_centroid_mean: float,
+                      spectral_rolloff_mean: float, pitch_mean: float, energy_mean: float,
+                      zcr_mean: float, mfccs: np.ndarray, genre: str, complexity: float,
+                      sections: List[Dict], beats: np.ndarray, key_info: Dict) -> Dict:
+        """
+        Construir el diccionario de resultado común a todos los modos de análisis
+        """
+        return {
+            "success": True,
+            "duration": float(duration),
+            "tempo": float(tempo),
+            **key_info,
+            "key_features": {
+                "spectral_centroid_mean": float(spectral_centroid_mean),
+                "spectral_rolloff_mean": float(spectral_rolloff_mean),
+                "pitch_mean": float(pitch_mean) if not np.isnan(pitch_mean) else 0,
+                "energy_mean": float(energy_mean),
+                "zcr_mean": float(zcr_mean)
+            },
+            # Arrays tal cual: format_analysis_result los convierte según el formato pedido
+            "mfccs": mfccs,
+            "genre": genre,
+            "complexity": complexity,
+            "sections": sections,
+            "beats": np.asarray(beats),
+            "analysis_timestamp": str(np.datetime64('now'))
+        }
+    
+    def analyze_many(self, paths: Iterable[str], workers: Optional[int] = None,
+                     timeout: float = 300, streaming: bool = False, profile: bool = False,
+                     load_mode: Optional[str] = None, offset: float = 0.0,
+                     duration: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Analizar varios archivos en un pool de procesos.
+        Produce cada resultado en cuanto termina (no en orden de entrada).
+        Nunca hay más de `workers` trabajos en vuelo (como mucho el tamaño
+        del pool), de modo que `paths` se consume de forma perezosa y el
+        tiempo límite se mide por trabajo.
+        """
+        options = {
+            "streaming": streaming,
+            "profile": profile,
+            "load_mode": load_mode or self.load_mode,
+            "offset": offset,
+            "duration": duration
+        }
+        max_in_flight = max(1, min(workers or self.pool_workers, self.pool_workers))
+        pending = {}
+        path_iter = iter(paths)
+        
+        def submit_next() -> bool:
+            path = next(path_iter, None)
+            if path is None:
+                return False
+            # Siempre el pool vigente: un tiempo límite en otro lote puede haberlo reciclado
+            pool = self._get_pool()
+            future = pool.submit(_analyze_in_worker, path, options)
+            pending[future] = (path, time.monotonic(), pool)
+            return True
+        
+        while len(pending) < max_in_flight and submit_next():
+            pass
+        
+        while pending:
+            oldest_start = min(started for _, started, _ in pending.values())
+            remaining = max(0.0, oldest_start + timeout - time.monotonic())
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                path, started, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error en worker de análisis ({path}): {e}")
+                    result = {"success": False, "error": str(e)}
+                if "profile" in result and self.record_profile_metrics:
+                    # Los workers no publican: sus métricas vivirían en otro proceso
+                    self.record_profile(result["profile"], streaming)
+                yield {"path": path, "elapsed": time.monotonic() - started, **result}
+            
+            now = time.monotonic()
+            for future, (path, started, pool) in list(pending.items()):
+                if now - started >= timeout:
+                    # Un proceso ocupado no se puede interrumpir; se descarta su
+                    # resultado y los trabajos nuevos van a un pool sin ese worker
+                    future.cancel()
+                    pending.pop(future)
+                    self._recycle_pool(pool, grace=timeout)
+                    logger.warning(f"Análisis excedió {timeout}s: {path}")
+                    yield {"path": path, "elapsed": now - started, "success": False,
+                           "error": f"Tiempo límite excedido ({timeout}s)"}
+            
+            while len(pending) < max_in_flight and submit_next():
+                pass
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Obtener (o crear) el pool persistente con workers precalentados"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pool_workers,
+                    # spawn evita heredar hilos y event loop del servidor
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_analysis_worker,
+                    initargs=(self.sample_rate, self.hop_length, self.n_fft, self.stream_block_length)
+                )
+            return self._pool
+    
+    def _recycle_pool(self, pool: ProcessPoolExecutor, grace: float):
+        """
+        Sustituir un pool con un worker bloqueado. Los trabajos ya empezados
+        en el pool viejo (de este u otros lotes) tienen `grace` segundos, su
+        propio tiempo límite, para terminar; después se termina el proceso
+        colgado y los que sigan vivos.
+        """
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        shutdown_executor(pool, grace=grace)
+    
+    def shutdown_pool(self, wait: bool = True, grace: float = 5.0):
+        """Cerrar el pool de procesos de análisis (terminando workers colgados tras `grace` s)"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            shutdown_executor(pool, grace=grace, wait=wait)
+    
+    def analyze_audio_url(self, audio_url: str, streaming: bool = False, profile: bool = False,
+                          load_mode: Optional[str] = None, offset: float = 0.0,
+                          duration: Optional[float] = None) -> Dict:
+        """
+        Analizar audio desde URL
+        """
+        download = AudioDownload(audio_url)
+        try:
+            # Descargar por chunks con el cliente compartido (URL y redirecciones validadas)
+            with open_audio_stream(audio_url) as response:
+                response.raise_for_status()
+                download.check_content_length(response.headers.get("content-length"))
+                for chunk in response.iter_bytes(chunk_size=65536):
+                    download.write(chunk)
+            
+            return self.analyze_audio_file(
+                download.finish(), streaming=streaming, profile=profile,
+                load_mode=load_mode, offset=offset, duration=duration
+            )
+            
         except Exception as e:
             logger.error(f"Error analizando URL de audio: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            download.cleanup()
     
-    def _detect_genre(self, y: np.ndarray, sr: int, tempo: float) -> str:
+    async def analyze_audio_url_async(self, audio_url: str, streaming: bool = False,
+                                      profile: bool = False, load_mode: Optional[str] = None,
+                                      offset: float = 0.0, duration: Optional[float] = None) -> Dict:
         """
-        Detección básica de género musical
+        Analizar audio desde URL sin bloquear el event loop:
+        descarga asíncrona y análisis en el executor
+        """
+        download = AudioDownload(audio_url)
+        try:
+            async with open_audio_stream_async(audio_url) as response:
+                response.raise_for_status()
+                download.check_content_length(response.headers.get("content-length"))
+                async for chunk in response.aiter_bytes(chunk_size=65536):
+                    download.write(chunk)
+            
+            source = download.finish()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(
+                    self.analyze_audio_file, source, streaming=streaming, profile=profile,
+                    load_mode=load_mode, offset=offset, duration=duration
+                )
+            )
+            
+        except Exception as e:
+            logger.error(f"Error analizando URL de audio: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        finally:
+            download.cleanup()
+    
+    def _key_scores(self, chroma: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Puntuar las 24 tonalidades sobre todos los frames de croma con un
+        único producto matricial. Devuelve la suma de correlaciones ponderada
+        por la energía de cada frame y la suma de pesos.
+        """
+        centered = chroma - chroma.mean(axis=0, keepdims=True)
+        norms = np.linalg.norm(centered, axis=0)
+        valid = norms > 1e-8
+        if not np.any(valid):
+            return np.zeros(len(KEY_TEMPLATES)), 0.0
+        
+        frames = centered[:, valid] / norms[valid]
+        weights = chroma[:, valid].sum(axis=0)
+        
+        # (24×12)·(12×T) -> correlación de cada tonalidad con cada frame
+        correlations = KEY_TEMPLATES @ frames
+        return correlations @ weights, float(weights.sum())
+    
+    def _key_from_scores(self, score_sum: np.ndarray, weight_sum: float) -> Dict:
+        """
+        Elegir la tonalidad con mayor correlación media
         """
-        # Análisis de características para detección de género
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        if weight_sum <= 0:
+            return {"key": None, "scale": None, "key_confidence": 0.0}
         
+        scores = score_sum / weight_sum
+        best = int(np.argmax(scores))
+        tonic = KEY_NAMES[best % 12]
+        scale = "Major" if best < 12 else "Minor"
+        
+        return {
+            "key": f"{tonic} {scale}",
+            "scale": scale,
+            "key_confidence": float(scores[best])
+        }
+    
+    def _detect_genre(self, spectral_centroid_mean: float, tempo: float) -> str:
+        """
+        Detección básica de género musical
+        """
         # Reglas básicas de detección
         if tempo > 140:
-            if np.mean(spectral_centroids) > 3000:
+            if spectral_centroid_mean > 3000:
                 return "Electronic/Dance"
             else:
                 return "Rock/Metal"
         elif tempo > 100:
-            if np.mean(spectral_centroids) > 2000:
+            if spectral_centroid_mean > 2000:
                 return "Pop"
             else:
                 return "Hip-Hop"
@@ -139,48 +964,105 @@ class AudioAnalyzer:
         else:
             return "Classical/Ambient"
     
-    def _calculate_complexity(self, y: np.ndarray, sr: int) -> float:
+    def _calculate_complexity(self, features: FeatureGraph) -> float:
         """
         Calcular complejidad musical (0-1)
         """
         # Análisis de variabilidad espectral
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
+        spectral_centroids = features.get("spectral_centroid")
+        spectral_rolloff = features.get("spectral_rolloff")
         
         # Variabilidad de MFCCs
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        mfccs = features.get("mfcc")
         mfcc_variance = np.var(mfccs, axis=1)
         
+        return self._complexity_from_stats(
+            np.mean(spectral_centroids), np.std(spectral_centroids),
+            np.mean(spectral_rolloff), np.std(spectral_rolloff),
+            np.mean(mfcc_variance)
+        )
+    
+    def _complexity_from_stats(self, centroid_mean: float, centroid_std: float,
+                               rolloff_mean: float, rolloff_std: float,
+                               mfcc_variance_mean: float) -> float:
+        """
+        Complejidad (0-1) a partir de estadísticas ya agregadas
+        """
         # Complejidad basada en variabilidad
         complexity = (
-            np.std(spectral_centroids) / np.mean(spectral_centroids) +
-            np.std(spectral_rolloff) / np.mean(spectral_rolloff) +
-            np.mean(mfcc_variance) / 1000
+            centroid_std / centroid_mean +
+            rolloff_std / rolloff_mean +
+            mfcc_variance_mean / 1000
         ) / 3
         
-        return min(max(complexity, 0), 1)
+        return float(min(max(complexity, 0), 1))
     
-    def _detect_sections(self, y: np.ndarray, sr: int) -> List[Dict]:
+    def _detect_sections(self, chroma: np.ndarray, mfccs: np.ndarray, beats: np.ndarray,
+                         sr: int, hop_length: int, duration: float) -> List[Dict]:
         """
-        Detectar secciones del audio (intro, verse, chorus, etc.)
+        Segmentación estructural sobre features sincronizados al beat:
+        matriz de auto-similitud, novedad con kernel de tablero de ajedrez
+        y clustering aglomerativo para etiquetar secciones repetidas.
+        Coste O(beats²), independiente del número de frames.
         """
         try:
-            # Análisis de novedad
-            novelty = librosa.onset.onset_strength(y=y, sr=sr)
+            n_frames = min(chroma.shape[1], mfccs.shape[1])
+            beats = np.unique(np.asarray(beats, dtype=int))
+            beats = beats[(beats > 0) & (beats < n_frames)]
+            
+            if len(beats) < 2 * self.section_min_beats:
+                return [{
+                    "start_time": 0.0,
+                    "end_time": float(duration),
+                    "type": "verse",
+                    "label": "A",
+                    "confidence": 1.0
+                }]
+            
+            # Armonía (croma) + timbre (MFCC sin energía) por beat, normalizados
+            synced_chroma = librosa.util.sync(chroma[:, :n_frames], beats, aggregate=np.median)
+            synced_mfcc = librosa.util.sync(mfccs[:, :n_frames], beats, aggregate=np.mean)
+            timbre = synced_mfcc[1:]
+            timbre = (timbre - timbre.mean(axis=1, keepdims=True)) / (timbre.std(axis=1, keepdims=True) + 1e-8)
+            beat_features = np.vstack([
+                librosa.util.normalize(synced_chroma, axis=0),
+                librosa.util.normalize(timbre, axis=0)
+            ])
+            beat_features = librosa.util.normalize(beat_features, axis=0)
+            energy = synced_mfcc[0]
+            
+            # Matriz de auto-similitud (coseno) y novedad por kernel de tablero
+            similarity = beat_features.T @ beat_features
+            novelty = self._checkerboard_novelty(similarity, self.section_kernel_beats)
             
-            # Detectar picos de novedad
-            peaks, _ = find_peaks(novelty, height=np.mean(novelty))
+            # Fronteras: picos de novedad más fuertes, separados al menos section_min_beats
+            peaks, properties = find_peaks(novelty, distance=self.section_min_beats, height=np.mean(novelty))
+            strongest = np.argsort(properties["peak_heights"])[::-1][:self.max_sections - 1]
+            peaks = np.sort(peaks[strongest])
+            n_beats = similarity.shape[0]
+            bounds = np.concatenate([[0], peaks, [n_beats]]).astype(int)
             
-            # Convertir a tiempo
-            times = librosa.frames_to_time(peaks, sr=sr)
+            # Etiquetar segmentos por similitud de su vector medio
+            segment_features = np.stack([
+                beat_features[:, start:end].mean(axis=1) for start, end in zip(bounds[:-1], bounds[1:])
+            ])
+            segment_energy = np.array([energy[start:end].mean() for start, end in zip(bounds[:-1], bounds[1:])])
+            clusters = self._cluster_segments(segment_features)
+            types, labels = self._label_segments(clusters, segment_energy)
+            
+            # Convertir fronteras (índices de beat) a tiempo
+            beat_times = librosa.frames_to_time(beats, sr=sr, hop_length=hop_length)
+            boundary_times = np.concatenate([[0.0], beat_times])
+            max_novelty = float(novelty.max()) or 1.0
             
             sections = []
-            for i, time in enumerate(times):
-                section_type = self._classify_section(i, len(times))
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
                 sections.append({
-                    "start_time": float(time),
-                    "type": section_type,
-                    "confidence": float(novelty[peaks[i]])
+                    "start_time": float(boundary_times[start]),
+                    "end_time": float(boundary_times[end]) if end < n_beats else float(duration),
+                    "type": types[i],
+                    "label": labels[i],
+                    "confidence": 1.0 if start == 0 else float(novelty[start] / max_novelty)
                 })
             
             return sections
@@ -189,25 +1071,132 @@ class AudioAnalyzer:
             logger.error(f"Error detectando secciones: {e}")
             return []
     
-    def _classify_section(self, index: int, total_sections: int) -> str:
+    def _checkerboard_novelty(self, similarity: np.ndarray, kernel_size: int) -> np.ndarray:
         """
-        Clasificar tipo de sección
+        Novedad de Foote: correlación de un kernel de tablero con taper
+        gaussiano a lo largo de la diagonal, en una sola operación einsum
         """
-        if index == 0:
-            return "intro"
-        elif index == total_sections - 1:
-            return "outro"
-        elif index % 4 == 0:
-            return "chorus"
-        else:
-            return "verse"
+        half = kernel_size // 2
+        offsets = np.arange(-half, half) + 0.5
+        taper = np.exp(-0.5 * (offsets / (half / 2)) ** 2)
+        kernel = np.outer(np.sign(offsets), np.sign(offsets)) * np.outer(taper, taper)
+        
+        n_beats = similarity.shape[0]
+        padded = np.pad(similarity, half, mode="constant")
+        windows = sliding_window_view(padded, (2 * half, 2 * half))
+        index = np.arange(n_beats)
+        novelty = np.einsum("bij,ij->b", windows[index, index], kernel)
+        return np.maximum(novelty, 0)
+    
+    def _cluster_segments(self, segment_features: np.ndarray) -> np.ndarray:
+        """
+        Clustering aglomerativo (enlace medio, distancia coseno) de segmentos
+        """
+        if len(segment_features) < 2:
+            return np.ones(len(segment_features), dtype=int)
+        
+        tree = linkage(segment_features, method="average", metric="cosine")
+        clusters = fcluster(tree, t=self.section_cluster_threshold, criterion="distance")
+        if clusters.max() > 4:
+            clusters = fcluster(tree, t=4, criterion="maxclust")
+        return clusters
+    
+    def _label_segments(self, clusters: np.ndarray, segment_energy: np.ndarray) -> Tuple[List[str], List[str]]:
+        """
+        Asignar tipo de sección y letra a cada segmento.
+        Los grupos repetidos son estribillo (el más enérgico) o verso;
+        los segmentos únicos son intro, outro o puente según su posición.
+        """
+        # Letras por orden de aparición: A, B, C...
+        letters = {}
+        for cluster in clusters:
+            letters.setdefault(cluster, chr(ord("A") + len(letters)))
+        
+        counts = {cluster: int(np.sum(clusters == cluster)) for cluster in letters}
+        repeated = [cluster for cluster in letters if counts[cluster] > 1]
+        repeated.sort(key=lambda cluster: segment_energy[clusters == cluster].mean(), reverse=True)
+        repeated_types = {cluster: "chorus" if i == 0 else "verse" for i, cluster in enumerate(repeated)}
+        
+        last = len(clusters) - 1
+        types = []
+        for i, cluster in enumerate(clusters):
+            if cluster in repeated_types:
+                types.append(repeated_types[cluster])
+            elif i == 0:
+                types.append("intro")
+            elif i == last:
+                types.append("outro")
+            else:
+                types.append("bridge" if repeated else "verse")
+        
+        return types, [letters[cluster] for cluster in clusters]
+
+def _rewind(audio_source: Union[str, BinaryIO]):
+    """Volver al inicio si la fuente es un buffer (se lee varias veces)"""
+    if hasattr(audio_source, "seek"):
+        audio_source.seek(0)
+
+# Analizador propio de cada proceso del pool
+_worker_analyzer: Optional[AudioAnalyzer] = None
+
+def _init_analysis_worker(sample_rate: int, hop_length: int, n_fft: int, stream_block_length: int):
+    """Inicializar worker: configurar analizador y precalentar librosa"""
+    global _worker_analyzer
+    _worker_analyzer = AudioAnalyzer()
+    _worker_analyzer.sample_rate = sample_rate
+    _worker_analyzer.hop_length = hop_length
+    _worker_analyzer.n_fft = n_fft
+    _worker_analyzer.stream_block_length = stream_block_length
+    _worker_analyzer.record_profile_metrics = False
+    
+    # Ejecutar una vez el grafo sobre ruido para cargar filtros y compilar numba
+    warmup = np.random.default_rng(0).standard_normal(sample_rate).astype(np.float32)
+    features = FeatureGraph(warmup, sample_rate, n_fft=n_fft, hop_length=hop_length)
+    for name in ("beat_track", "mfcc", "chroma", "piptrack", "spectral_rolloff", "spectral_centroid"):
+        features.get(name)
+
+def _analyze_in_worker(audio_path: str, options: Dict) -> Dict:
+    """Punto de entrada de cada trabajo en el pool"""
+    return _worker_analyzer.analyze_audio_file(audio_path, **options)
 
 # Instancia global
 analyzer = AudioAnalyzer()
 
-def analyze_audio(audio_path_or_url: str) -> Dict:
+def analyze_audio(audio_path_or_url: str, streaming: bool = False,
+                  response_format: str = "json", dtype: str = "float16", profile: bool = False,
+                  load_mode: Optional[str] = None, offset: float = 0.0,
+                  duration: Optional[float] = None) -> Dict:
     """Función de conveniencia para analizar audio"""
+    options = {
+        "streaming": streaming,
+        "profile": profile,
+        "load_mode": load_mode,
+        "offset": offset,
+        "duration": duration
+    }
+    if audio_path_or_url.startswith('http'):
+        result = analyzer.analyze_audio_url(audio_path_or_url, **options)
+    else:
+        result = analyzer.analyze_audio_file(audio_path_or_url, **options)
+    return format_analysis_result(result, response_format, dtype)
+
+async def analyze_audio_async(audio_path_or_url: str, streaming: bool = False,
+                              response_format: str = "json", dtype: str = "float16", profile: bool = False,
+                              load_mode: Optional[str] = None, offset: float = 0.0,
+                              duration: Optional[float] = None) -> Dict:
+    """Versión de analyze_audio para código async: descarga con httpx async y análisis en el executor"""
+    options = {
+        "streaming": streaming,
+        "profile": profile,
+        "load_mode": load_mode,
+        "offset": offset,
+        "duration": duration
+    }
     if audio_path_or_url.startswith('http'):
-        return analyzer.analyze_audio_url(audio_path_or_url)
+        result = await analyzer.analyze_audio_url_async(audio_path_or_url, **options)
     else:
-        return analyzer.analyze_audio_file(audio_path_or_url)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, functools.partial(analyzer.analyze_audio_file, audio_path_or_url, **options)
+        )
+    return format_analysis_result(result, response_format, dtype)
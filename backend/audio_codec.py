@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+🗜️ Audio Codec - Compresión de audio según su formato
+gzip apenas reduce PCM y nada MP3/OGG, así que el formato se detecta
+por cabecera y se elige:
+  - PCM (WAV/AIFF de 8/16/24 bits): FLAC sin pérdida
+  - formatos ya comprimidos (MP3, OGG, M4A, FLAC): sin cambios
+  - desconocido: gzip, solo si reduce el tamaño
+El resultado lleva una cabecera con el codec aplicado: decode_audio
+deshace exactamente ese codec y nunca deduce nada de los bytes (un FLAC
+guardado tal cual sigue siendo FLAC).
+Además, previews en Opus (con pérdida) cuando libsndfile lo soporta.
+"""
+
+import gzip
+import io
+import time
+from collections import deque
+from math import gcd
+from typing import Any, Dict
+
+import numpy as np
+import soundfile as sf
+
+from audio_download import sniff_audio_format
+
+COMPRESSED_FORMATS = {"mp3", "ogg", "m4a", "flac"}
+PCM_FORMATS = {"wav", "aiff"}
+# Subtipos PCM que FLAC representa sin pérdida (WAV de 8 bits es unsigned)
+FLAC_SUBTYPES = {"PCM_16": "PCM_16", "PCM_24": "PCM_24", "PCM_S8": "PCM_S8", "PCM_U8": "PCM_S8"}
+WAV_SUBTYPES = {"PCM_S8": "PCM_U8"}
+# Opus solo admite estas frecuencias de muestreo
+OPUS_SAMPLE_RATE = 48000
+BLOCK_FRAMES = 65536
+
+# Cabecera de encode_audio: magic + versión + id del codec aplicado
+CONTAINER_MAGIC = b"S1KA\x01"
+# id -> (codec, contenedor al que vuelve el FLAC)
+CONTAINER_CODECS = {0: ("none", None), 1: ("gzip", None), 2: ("flac", "wav"), 3: ("flac", "aiff")}
+CODEC_IDS = {value: key for key, value in CONTAINER_CODECS.items()}
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def opus_available() -> bool:
+    """libsndfile >= 1.0.29 incluye Opus en contenedor OGG"""
+    return "OPUS" in sf.available_subtypes("OGG")
+
+
+def _transcode(data: bytes, format: str, subtype: str) -> bytes:
+    """Copiar muestras enteras por bloques a otro contenedor (sin pérdida)"""
+    output = io.BytesIO()
+    with sf.SoundFile(io.BytesIO(data)) as source:
+        with sf.SoundFile(output, "w", samplerate=source.samplerate, channels=source.channels,
+                          format=format, subtype=subtype) as target:
+            for block in source.blocks(blocksize=BLOCK_FRAMES, dtype="int32"):
+                target.write(block)
+    return output.getvalue()
+
+
+def encode_audio(data: bytes) -> Dict[str, Any]:
+    """
+    Comprimir audio para almacenamiento.
+    Función de módulo para poder ejecutarla en el pool de procesos.
+    """
+    started = time.perf_counter()
+    input_format = sniff_audio_format(data[:12]) or "unknown"
+    encoded, codec = data, "none"
+
+    if input_format in PCM_FORMATS:
+        subtype = sf.info(io.BytesIO(data)).subtype
+        if subtype in FLAC_SUBTYPES:
+            encoded, codec = _transcode(data, "FLAC", FLAC_SUBTYPES[subtype]), "flac"
+    elif input_format not in COMPRESSED_FORMATS:
+        encoded, codec = gzip.compress(data), "gzip"
+
+    if len(encoded) >= len(data):
+        encoded, codec = data, "none"
+    codec_id = CODEC_IDS[(codec, input_format if codec == "flac" else None)]
+
+    return {
+        "data": CONTAINER_MAGIC + bytes([codec_id]) + encoded,
+        "input_format": input_format,
+        "codec": codec,
+        "input_bytes": len(data),
+        "output_bytes": len(encoded),
+        "seconds": time.perf_counter() - started
+    }
+
+
+def store_uncompressed(data: bytes) -> bytes:
+    """Mismo formato que encode_audio con codec "none" (p.ej. si la compresión falla)"""
+    return CONTAINER_MAGIC + bytes([CODEC_IDS[("none", None)]]) + data
+
+
+def decode_audio(data: bytes) -> bytes:
+    """
+    Deshacer el codec que registró encode_audio: gzip se descomprime y el
+    FLAC vuelve a su contenedor original (WAV o AIFF); "none" se devuelve
+    tal cual. Sin cabecera solo se reconoce el gzip heredado (antes todo
+    se guardaba con gzip); el resto no se toca.
+    """
+    if not data.startswith(CONTAINER_MAGIC):
+        return gzip.decompress(data) if data[:2] == GZIP_MAGIC else data
+
+    header_size = len(CONTAINER_MAGIC) + 1
+    codec_id = data[header_size - 1]
+    if codec_id not in CONTAINER_CODECS:
+        raise ValueError(f"Codec de audio desconocido: {codec_id}")
+    codec, container = CONTAINER_CODECS[codec_id]
+    payload = data[header_size:]
+
+    if codec == "gzip":
+        return gzip.decompress(payload)
+    if codec == "flac":
+        subtype = sf.info(io.BytesIO(payload)).subtype
+        if container == "wav":
+            return _transcode(payload, "WAV", WAV_SUBTYPES.get(subtype, subtype))
+        return _transcode(payload, "AIFF", subtype)
+    return payload
+
+
+def encode_preview(data: bytes, duration: float = 30.0, quality: float = 0.5) -> Dict[str, Any]:
+    """
+    Preview con pérdida en OGG/Opus de los primeros `duration` segundos.
+    quality: 0 (máxima calidad) a 1 (máxima compresión), nivel de libsndfile.
+    """
+    if not opus_available():
+        raise ValueError("Opus no disponible (requiere libsndfile >= 1.0.29)")
+
+    started = time.perf_counter()
+    input_format = sniff_audio_format(data[:12]) or "unknown"
+    with sf.SoundFile(io.BytesIO(data)) as source:
+        sample_rate = source.samplerate
+        audio = source.read(frames=int(duration * sample_rate), dtype="float32", always_2d=True)
+
+    if sample_rate != OPUS_SAMPLE_RATE:
+        from scipy.signal import resample_poly
+        divisor = gcd(sample_rate, OPUS_SAMPLE_RATE)
+        audio = resample_poly(audio, OPUS_SAMPLE_RATE // divisor, sample_rate // divisor, axis=0)
+
+    output = io.BytesIO()
+    sf.write(output, np.clip(audio, -1.0, 1.0), OPUS_SAMPLE_RATE, format="OGG", subtype="OPUS",
+             compression_level=quality)
+    encoded = output.getvalue()
+
+    return {
+        "data": encoded,
+        "input_format": input_format,
+        "codec": "opus",
+        "input_bytes": len(data),
+        "output_bytes": len(encoded),
+        "seconds": time.perf_counter() - started
+    }
+
+
+class AudioCompressionStats:
+    """Ratio y throughput por formato, más un ratio medio móvil"""
+
+    def __init__(self, window: int = 100):
+        self._formats: Dict[str, Dict[str, float]] = {}
+        self._recent_ratios: deque = deque(maxlen=window)
+
+    def record(self, result: Dict[str, Any], rolling: bool = True) -> float:
+        """
+        Registrar un resultado de encode_audio/encode_preview; devuelve su ratio.
+        Las previews recortan el audio: se registran con rolling=False para
+        no inflar el ratio medio de almacenamiento.
+        """
+        ratio = 1 - result["output_bytes"] / result["input_bytes"] if result["input_bytes"] else 0.0
+        if rolling:
+            self._recent_ratios.append(ratio)
+
+        key = f"{result['input_format']}->{result['codec']}"
+        stats = self._formats.setdefault(key, {"count": 0, "input_bytes": 0, "output_bytes": 0, "seconds": 0.0})
+        stats["count"] += 1
+        stats["input_bytes"] += result["input_bytes"]
+        stats["output_bytes"] += result["output_bytes"]
+        stats["seconds"] += result["seconds"]
+        return ratio
+
+    @property
+    def rolling_ratio(self) -> float:
+        """Media de los últimos `window` ratios"""
+        return sum(self._recent_ratios) / len(self._recent_ratios) if self._recent_ratios else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        formats = {}
+        for key, stats in self._formats.items():
+            formats[key] = {
+                "count": stats["count"],
+                "input_bytes": stats["input_bytes"],
+                "output_bytes": stats["output_bytes"],
+                "compression_ratio_percent": round(
+                    (1 - stats["output_bytes"] / stats["input_bytes"]) * 100, 2
+                ) if stats["input_bytes"] else 0,
+                "throughput_mb_s": round(
+                    stats["input_bytes"] / stats["seconds"] / 1e6, 2
+                ) if stats["seconds"] else 0
+            }
+        return {
+            "rolling_compression_ratio_percent": round(self.rolling_ratio * 100, 2),
+            "window": self._recent_ratios.maxlen,
+            "formats": formats
+        }
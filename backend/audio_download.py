@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+🌐 Audio Download - Descarga de audio por streaming para el analizador
+Clientes httpx con pool de conexiones, límite de tamaño, detección de
+formato por cabecera y buffer en memoria que solo pasa a disco si la
+pista es grande o el decodificador necesita una ruta.
+Las URLs vienen de clientes: solo http(s) hacia direcciones públicas. Las
+redirecciones se siguen a mano para validar cada salto (SSRF).
+"""
+
+import asyncio
+import contextlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, Union
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Mismo límite que GhostStudioService.validate_audio_file
+MAX_DOWNLOAD_BYTES = 50 * 1024 * 1024
+# Por debajo de este tamaño se decodifica directamente desde memoria
+IN_MEMORY_MAX_BYTES = 8 * 1024 * 1024
+# Formatos que libsndfile decodifica desde un objeto en memoria
+SOUNDFILE_FORMATS = {"wav", "flac", "ogg", "aiff"}
+KNOWN_EXTENSIONS = {"wav", "flac", "ogg", "aiff", "mp3", "m4a"}
+ALLOWED_SCHEMES = ("http", "https")
+MAX_REDIRECTS = 5
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _client_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+
+def get_http_client() -> httpx.Client:
+    """Cliente síncrono compartido (reutiliza conexiones entre descargas)"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(timeout=30, follow_redirects=False, limits=_client_limits())
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Cliente asíncrono compartido (reutiliza conexiones entre descargas)"""
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(timeout=30, follow_redirects=False, limits=_client_limits())
+    return _async_http_client
+
+
+async def close_http_clients():
+    """Cerrar clientes compartidos (apagado de la aplicación)"""
+    global _http_client, _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+
+def _parse_url(url: str):
+    parsed = urlparse(url)
+    if parsed.scheme not in ALLOWED_SCHEMES or not parsed.hostname:
+        raise ValueError(f"URL no permitida (solo http/https): {url}")
+    return parsed
+
+
+def _check_addresses(host: str, addresses) -> None:
+    """Rechazar si alguna dirección resuelta no es pública (privada, loopback, link-local...)"""
+    for family, _, _, _, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Host no permitido: {host} resuelve a una dirección no pública")
+
+
+def check_url(url: str) -> None:
+    """
+    Validar una URL antes de conectar: esquema http(s) y todas las
+    direcciones del host públicas. Se repite en cada redirección.
+    """
+    parsed = _parse_url(url)
+    try:
+        addresses = socket.getaddrinfo(parsed.hostname, parsed.port or 0, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"No se pudo resolver {parsed.hostname}: {e}")
+    _check_addresses(parsed.hostname, addresses)
+
+
+async def check_url_async(url: str) -> None:
+    """check_url con la resolución DNS del event loop"""
+    parsed = _parse_url(url)
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            parsed.hostname, parsed.port or 0, type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise ValueError(f"No se pudo resolver {parsed.hostname}: {e}")
+    _check_addresses(parsed.hostname, addresses)
+
+
+def _redirect_target(response: httpx.Response) -> str:
+    return urljoin(str(response.url), response.headers["location"])
+
+
+@contextlib.contextmanager
+def open_audio_stream(url: str) -> Iterator[httpx.Response]:
+    """GET en streaming validando la URL inicial y cada redirección"""
+    client = get_http_client()
+    for _ in range(MAX_REDIRECTS + 1):
+        check_url(url)
+        response = client.send(client.build_request("GET", url), stream=True)
+        if not (response.is_redirect and "location" in response.headers):
+            break
+        response.close()
+        url = _redirect_target(response)
+    else:
+        raise ValueError(f"Demasiadas redirecciones (máx. {MAX_REDIRECTS})")
+    try:
+        yield response
+    finally:
+        response.close()
+
+
+@contextlib.asynccontextmanager
+async def open_audio_stream_async(url: str) -> AsyncIterator[httpx.Response]:
+    """Versión asíncrona de open_audio_stream"""
+    client = get_async_http_client()
+    for _ in range(MAX_REDIRECTS + 1):
+        await check_url_async(url)
+        response = await client.send(client.build_request("GET", url), stream=True)
+        if not (response.is_redirect and "location" in response.headers):
+            break
+        await response.aclose()
+        url = _redirect_target(response)
+    else:
+        raise ValueError(f"Demasiadas redirecciones (máx. {MAX_REDIRECTS})")
+    try:
+        yield response
+    finally:
+        await response.aclose()
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """Detectar formato de audio por los primeros bytes"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+class AudioDownload:
+    """
+    Acumula los chunks de una descarga. Mantiene los datos en memoria
+    hasta IN_MEMORY_MAX_BYTES y después los vuelca a un archivo temporal
+    con la extensión correcta.
+    """
+
+    def __init__(self, url: str, max_bytes: int = MAX_DOWNLOAD_BYTES,
+                 in_memory_max_bytes: int = IN_MEMORY_MAX_BYTES):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.in_memory_max_bytes = in_memory_max_bytes
+        self.size = 0
+        self.format: Optional[str] = None
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._header = b""
+
+    def check_content_length(self, content_length: Optional[str]):
+        """Rechazar antes de descargar si el servidor declara un tamaño excesivo"""
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ValueError(f"Archivo demasiado grande ({int(content_length)} bytes, máx. {self.max_bytes})")
+
+    def write(self, chunk: bytes):
+        """Agregar un chunk descargado"""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ValueError(f"Archivo demasiado grande (máx. {self.max_bytes} bytes)")
+
+        if self.format is None and len(self._header) < 12:
+            self._header += chunk[:12 - len(self._header)]
+            if len(self._header) >= 12:
+                self.format = self._detect_format()
+
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+
+        self._buffer.write(chunk)
+        if self.size > self.in_memory_max_bytes:
+            self._spill_to_disk()
+
+    def finish(self) -> Union[str, BinaryIO]:
+        """Devolver la fuente a analizar: buffer en memoria o ruta de archivo"""
+        if self.format is None:
+            self.format = self._detect_format()
+
+        if self._file is None and self.format in SOUNDFILE_FORMATS:
+            self._buffer.seek(0)
+            return self._buffer
+
+        # mp3/m4a u otros formatos necesitan una ruta para el decodificador
+        if self._file is None:
+            self._spill_to_disk()
+        self._file.flush()
+        return self._file.name
+
+    def cleanup(self):
+        """Liberar buffer y archivo temporal"""
+        self._buffer = io.BytesIO()
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+            self._file = None
+
+    def _detect_format(self) -> Optional[str]:
+        detected = sniff_audio_format(self._header)
+        if detected:
+            return detected
+        # Respaldo: extensión de la URL
+        extension = os.path.splitext(urlparse(self.url).path)[1].lstrip(".").lower()
+        return extension if extension in KNOWN_EXTENSIONS else None
+
+    def _spill_to_disk(self):
+        suffix = f".{self.format}" if self.format else ""
+        self._file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = io.BytesIO()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Throughput de análisis por lotes
+Mide pistas/minuto de AudioAnalyzer.analyze_many según el número de workers.
+
+Uso: python benchmarks/bench_batch_throughput.py [pistas] [duración_segundos]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analyzer import AudioAnalyzer
+
+SAMPLE_RATE = 22050
+
+
+def write_fixtures(directory: str, tracks: int, duration: float) -> list:
+    """Escribir pistas sintéticas (seno + ruido) en WAV"""
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, duration, int(SAMPLE_RATE * duration), endpoint=False)
+    paths = []
+    for i in range(tracks):
+        y = 0.5 * np.sin(2 * np.pi * (220 + 20 * i) * t) + 0.1 * rng.standard_normal(len(t))
+        path = os.path.join(directory, f"track_{i}.wav")
+        sf.write(path, y.astype(np.float32), SAMPLE_RATE)
+        paths.append(path)
+    return paths
+
+
+def main():
+    tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    max_workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_fixtures(directory, tracks, duration)
+        print(f"🎵 {tracks} pistas sintéticas de {duration:.0f}s\n")
+        print(f"{'workers':>7} {'tiempo (s)':>11} {'pistas/min':>11}")
+
+        workers = 1
+        while workers <= max_workers:
+            analyzer = AudioAnalyzer()
+            # Calentar el pool para medir solo el análisis
+            list(analyzer.analyze_many(paths[:workers], workers=workers))
+
+            start = time.perf_counter()
+            results = list(analyzer.analyze_many(paths, workers=workers))
+            elapsed = time.perf_counter() - start
+            analyzer.shutdown_pool()
+
+            failures = sum(1 for r in results if not r["success"])
+            note = f"  ⚠️ {failures} fallos" if failures else ""
+            print(f"{workers:>7} {elapsed:>11.2f} {tracks / elapsed * 60:>11.1f}{note}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Codec del cache
+Latencia de codificación/decodificación y bytes almacenados del codec
+de cache_codec frente al pickle + gzip anterior de PerformanceOptimizer,
+sobre payloads representativos: texto de Qwen, resultado de The Creator
+y salidas del analizador (listas JSON y arrays de numpy).
+
+Uso: python benchmarks/bench_cache_codec.py [repeticiones]
+"""
+
+import gzip
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_codec import CacheCodec, COMPRESSORS, SERIALIZERS, NO_COMPRESSION
+
+
+def legacy_encode(value):
+    """Codificación anterior: pickle y gzip por encima de 1KB"""
+    pickled_data = pickle.dumps(value)
+    if len(pickled_data) > 1000:
+        return gzip.compress(pickled_data)
+    return pickled_data
+
+
+def legacy_decode(payload):
+    if payload[:2] == b"\x1f\x8b":
+        return pickle.loads(gzip.decompress(payload))
+    return pickle.loads(payload)
+
+
+def build_payloads():
+    rng = np.random.default_rng(0)
+    lyrics = "\n".join(f"Verso {i}: luces de neón sobre la ciudad dormida" for i in range(30))
+    mfccs = rng.normal(size=(13, 2600)).astype(np.float32)
+    beats = np.cumsum(rng.integers(20, 24, size=400))
+    analysis = {
+        "success": True, "tempo": 120.2, "key": "A", "scale": "Minor",
+        "duration": 60.3, "genre": "electronic", "complexity": 0.61,
+        "sections": [{"start": i * 8.0, "end": (i + 1) * 8.0, "label": "A"} for i in range(8)],
+    }
+    return {
+        "ai_text": lyrics,
+        "creator_result": {"lyrics": lyrics, "title": "Neón", "style": "synthwave",
+                           "tags": ["retro", "night"], "bpm": 110, "duration": "3:00"},
+        "analysis_lists": {**analysis, "mfccs": mfccs.tolist(), "beats": beats.tolist()},
+        "analysis_arrays": {**analysis, "mfccs": mfccs, "beats": beats},
+    }
+
+
+def measure(encode, decode, value, repeat):
+    # Calentamiento (contextos de compresión, imports perezosos)
+    payload = decode(encode(value))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = encode(value)
+    encode_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(payload)
+    decode_us = (time.perf_counter() - start) / repeat * 1e6
+    return encode_us, decode_us, payload
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    codecs = [("pickle+gzip (anterior)", None, legacy_encode, legacy_decode)]
+    auto = CacheCodec()
+    codecs.append(("auto", auto, auto.encode, auto.decode))
+    for serializer in SERIALIZERS:
+        for compressor in [NO_COMPRESSION, *COMPRESSORS]:
+            codec = CacheCodec(serializers=(serializer,), compressor=compressor)
+            codecs.append((codec.format_name(serializer | compressor), codec, codec.encode, codec.decode))
+
+    print(f"serializadores: {[name for name, _, _ in SERIALIZERS.values()]}, "
+          f"compresores: {[name for name, _, _ in COMPRESSORS.values()]}")
+    for payload_name, value in build_payloads().items():
+        print(f"\n📦 {payload_name}")
+        print(f"{'codec':<24} {'encode (µs)':>12} {'decode (µs)':>12} {'bytes':>10}")
+        baseline = None
+        for name, codec, encode, decode in codecs:
+            encode_us, decode_us, payload = measure(encode, decode, value, repeat)
+            if codec is not None:
+                # Formato real (p.ej. orjson recurre a pickle con arrays de numpy)
+                actual = codec.format_name(payload[0])
+                if name == "auto":
+                    name = f"auto ({actual})"
+                elif actual != name:
+                    name = f"{name}→{actual}"
+            size = len(payload)
+            baseline = baseline or size
+            print(f"{name:<24} {encode_us:>12.1f} {decode_us:>12.1f} {size:>10} ({size / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
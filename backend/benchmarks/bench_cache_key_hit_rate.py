@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Tasa de aciertos de las claves de cache
+Compara la clave anterior de PerformanceOptimizer (json.dumps de args
+crudos) con cache_keys.build_cache_key sobre variaciones realistas de
+un mismo prompt: espacios, tabuladores, finales de línea CRLF, Unicode
+NFD, mayúsculas, orden de diccionarios y argumentos por nombre. También
+comprueba que prompts distintos no colisionan. Los saltos de línea no son
+variaciones equivalentes (separan versos): ver tests/test_cache_keys.py.
+
+Uso: python benchmarks/bench_cache_key_hit_rate.py
+"""
+
+import hashlib
+import json
+import os
+import sys
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_keys import build_cache_key
+
+
+class CreatorService:
+    """Misma forma que TheCreatorService: métodos con self"""
+
+    async def _call_qwen_api(self, prompt: str):
+        pass
+
+    async def _generate_with_suno(self, prompt: str, config: dict):
+        pass
+
+    async def translate(self, text: str, target_language: str = "en"):
+        pass
+
+
+def legacy_key(func_name, *args, **kwargs):
+    """Clave anterior: falla con objetos no serializables como self"""
+    params_str = json.dumps({'args': args, 'kwargs': kwargs}, sort_keys=True)
+    return f"son1k:{func_name}:{hashlib.sha256(params_str.encode()).hexdigest()[:16]}"
+
+
+def prompt_variations(prompt: str):
+    """Variantes que un usuario o el código generan para el mismo prompt"""
+    return [
+        prompt,
+        f"  {prompt}  ",
+        prompt.replace(" ", "  "),
+        prompt.replace(", ", ",\t"),
+        unicodedata.normalize("NFD", prompt),
+        prompt + "\r\n",
+    ]
+
+
+PROMPTS = [
+    "Canción de reggaetón romántica, tempo medio, voz femenina",
+    "Balada épica sobre la ciudad de neón, con piano y cuerdas",
+    "Música electrónica oscura, 128 BPM, sintetizadores analógicos",
+]
+
+TRANSLATIONS = ["Crear Música", "Letra con Emoción", "Ritmo Rápido"]
+
+SUNO_CONFIGS = [
+    ({"title": "Neón", "lyrics": "luces", "style": "synthwave", "request_id": i}, "Neón synthwave")
+    for i in range(4)
+]
+
+
+def run_case(name, calls, key_builder):
+    """calls: lista de grupos; cada grupo son llamadas equivalentes"""
+    hits = lookups = errors = 0
+    seen = set()
+    group_keys = []
+    for group in calls:
+        keys = set()
+        for call in group:
+            lookups += 1
+            try:
+                key = key_builder(*call)
+            except TypeError:
+                errors += 1
+                continue
+            if key in seen:
+                hits += 1
+            seen.add(key)
+            keys.add(key)
+        group_keys.append(keys)
+
+    collisions = sum(
+        1 for i, a in enumerate(group_keys) for b in group_keys[i + 1:] if a & b
+    )
+    ideal = lookups - len(calls)
+    print(f"  {name:<10} aciertos {hits:>3}/{ideal:<3} ({hits / ideal * 100:5.1f}%)  "
+          f"errores {errors:>3}  colisiones {collisions}")
+    return hits, ideal, collisions
+
+
+def main():
+    service = CreatorService()
+    qwen = CreatorService._call_qwen_api
+    suno = CreatorService._generate_with_suno
+    translate = CreatorService.translate
+
+    cases = {
+        "Prompts a Qwen (método con self)": (
+            [[(qwen, (service, variant), {}) for variant in prompt_variations(p)] for p in PROMPTS],
+            lambda func, args, kwargs: legacy_key(func.__name__, *args, **kwargs),
+            lambda func, args, kwargs: build_cache_key(func, args, kwargs),
+        ),
+        "Botones traducidos (mayúsculas, case_insensitive)": (
+            [[(translate, (service, v), {}) for v in (t, t.lower(), t.upper(), f" {t} ")] for t in TRANSLATIONS],
+            lambda func, args, kwargs: legacy_key(func.__name__, *args, **kwargs),
+            lambda func, args, kwargs: build_cache_key(func, args, kwargs, case_insensitive=True),
+        ),
+        "Argumentos por nombre vs posición": (
+            [[(translate, (service, t), {}), (translate, (service,), {"text": t}),
+              (translate, (service, t, "en"), {})] for t in TRANSLATIONS],
+            lambda func, args, kwargs: legacy_key(func.__name__, *args[1:], **kwargs),
+            lambda func, args, kwargs: build_cache_key(func, args, kwargs),
+        ),
+        "Suno con orden de config y request_id (key_fields)": (
+            [[(suno, (service, prompt, dict(reversed(list(config.items())))), {})
+              if i % 2 else (suno, (service, prompt, config), {})
+              for i, (config, prompt) in enumerate(SUNO_CONFIGS)]],
+            lambda func, args, kwargs: legacy_key(func.__name__, *args[1:], **kwargs),
+            lambda func, args, kwargs: build_cache_key(
+                func, args, kwargs, key_fields=("prompt", "config.title", "config.lyrics", "config.style")),
+        ),
+    }
+
+    totals = {"anterior": [0, 0, 0], "canónica": [0, 0, 0]}
+    for title, (calls, old_builder, new_builder) in cases.items():
+        print(f"\n🔑 {title}")
+        for label, builder in (("anterior", old_builder), ("canónica", new_builder)):
+            hits, ideal, collisions = run_case(label, calls, builder)
+            totals[label][0] += hits
+            totals[label][1] += ideal
+            totals[label][2] += collisions
+
+    print("\nTotal")
+    for label, (hits, ideal, collisions) in totals.items():
+        print(f"  {label:<10} {hits / ideal * 100:5.1f}% de aciertos posibles, {collisions} colisiones")
+
+
+if __name__ == "__main__":
+    main()
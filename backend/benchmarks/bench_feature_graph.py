@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Extracción de características en un solo paso
+Compara el camino anterior (tres pasadas STFT por pista) con FeatureGraph
+sobre fixtures sintéticos de seno y ruido.
+
+Uso: python benchmarks/bench_feature_graph.py [duración_segundos]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import librosa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analyzer import AudioAnalyzer, FeatureGraph
+
+SAMPLE_RATE = 22050
+
+
+def make_fixtures(duration: float) -> dict:
+    """Generar señales sintéticas de prueba"""
+    t = np.linspace(0, duration, int(SAMPLE_RATE * duration), endpoint=False)
+    rng = np.random.default_rng(0)
+    sine = 0.5 * np.sin(2 * np.pi * 440 * t)
+    noise = 0.3 * rng.standard_normal(len(t))
+    return {
+        "sine": sine.astype(np.float32),
+        "noise": noise.astype(np.float32),
+        "sine+noise": (sine + 0.3 * noise).astype(np.float32),
+    }
+
+
+def legacy_path(y: np.ndarray, sr: int) -> None:
+    """Camino anterior: cada etapa recalcula sus características desde la señal"""
+    librosa.beat.beat_track(y=y, sr=sr)
+    librosa.feature.spectral_centroid(y=y, sr=sr)
+    librosa.feature.spectral_rolloff(y=y, sr=sr)
+    librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    librosa.piptrack(y=y, sr=sr)
+    librosa.feature.rms(y=y)
+    librosa.feature.zero_crossing_rate(y)
+    # _detect_genre
+    librosa.feature.spectral_centroid(y=y, sr=sr)
+    librosa.feature.spectral_rolloff(y=y, sr=sr)
+    librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    # _calculate_complexity
+    librosa.feature.spectral_centroid(y=y, sr=sr)
+    librosa.feature.spectral_rolloff(y=y, sr=sr)
+    librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    # _detect_sections
+    librosa.onset.onset_strength(y=y, sr=sr)
+
+
+def graph_path(y: np.ndarray, sr: int) -> None:
+    """Camino nuevo: un solo espectrograma compartido"""
+    analyzer = AudioAnalyzer()
+    features = FeatureGraph(y, sr, n_fft=analyzer.n_fft, hop_length=analyzer.hop_length)
+    tempo, _ = features.get("beat_track")
+    for name in ("spectral_centroid", "spectral_rolloff", "mfcc", "piptrack", "rms", "zcr"):
+        features.get(name)
+    analyzer._detect_genre(np.mean(features.get("spectral_centroid")), tempo)
+    analyzer._calculate_complexity(features)
+    _, beats = features.get("beat_track")
+    analyzer._detect_sections(
+        features.get("chroma"), features.get("mfcc"), beats, sr, analyzer.hop_length, len(y) / sr
+    )
+
+
+def measure(func, y: np.ndarray, repeats: int = 3) -> float:
+    """Mejor tiempo de CPU de varias repeticiones"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        func(y, SAMPLE_RATE)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 240.0
+    print(f"🎵 Fixtures sintéticos de {duration:.0f}s @ {SAMPLE_RATE} Hz\n")
+    print(f"{'fixture':<12} {'anterior (s)':>13} {'grafo (s)':>10} {'speedup':>8}")
+
+    for name, y in make_fixtures(duration).items():
+        legacy = measure(legacy_path, y)
+        graph = measure(graph_path, y)
+        print(f"{name:<12} {legacy:>13.2f} {graph:>10.2f} {legacy / graph:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
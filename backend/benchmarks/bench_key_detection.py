@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Detección de tonalidad
+Latencia por pista y acierto de la detección de tonalidad sobre
+progresiones de acordes sintéticas (I-IV-V-I / i-iv-V-i).
+Referencia: el análisis simulado anterior tardaba 2 s fijos (asyncio.sleep).
+
+Uso: python benchmarks/bench_key_detection.py [duración_segundos]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analyzer import AudioAnalyzer, FeatureGraph, KEY_NAMES
+
+SAMPLE_RATE = 22050
+
+# Intervalos (semitonos desde la tónica) de cada acorde de la progresión
+MAJOR_PROGRESSION = [(0, 4, 7), (5, 9, 12), (7, 11, 14), (0, 4, 7)]
+MINOR_PROGRESSION = [(0, 3, 7), (5, 8, 12), (7, 11, 14), (0, 3, 7)]
+
+
+def chord_progression(tonic: str, scale: str, duration: float) -> np.ndarray:
+    """Sintetizar una progresión con armónicos sobre la tónica dada"""
+    base_midi = 48 + KEY_NAMES.index(tonic)
+    progression = MAJOR_PROGRESSION if scale == "Major" else MINOR_PROGRESSION
+    chord_duration = duration / len(progression)
+    t = np.linspace(0, chord_duration, int(SAMPLE_RATE * chord_duration), endpoint=False)
+
+    chunks = []
+    for chord in progression:
+        chunk = np.zeros_like(t)
+        for interval in chord:
+            freq = 440.0 * 2 ** ((base_midi + interval - 69) / 12)
+            for harmonic, gain in ((1, 1.0), (2, 0.5), (3, 0.25)):
+                chunk += gain * np.sin(2 * np.pi * freq * harmonic * t)
+        chunks.append(chunk)
+    y = np.concatenate(chunks)
+    return (0.3 * y / np.max(np.abs(y))).astype(np.float32)
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 30.0
+    analyzer = AudioAnalyzer()
+    fixtures = [("C", "Major"), ("G", "Major"), ("D#", "Major"), ("A", "Minor"), ("F#", "Minor"), ("D", "Minor")]
+
+    print(f"🎹 Progresiones sintéticas de {duration:.0f}s\n")
+    print(f"{'esperada':<10} {'detectada':<10} {'conf':>6} {'key (ms)':>9} {'total (ms)':>11}")
+
+    correct = 0
+    for tonic, scale in fixtures:
+        y = chord_progression(tonic, scale, duration)
+        features = FeatureGraph(y, SAMPLE_RATE, n_fft=analyzer.n_fft, hop_length=analyzer.hop_length)
+
+        # Croma + tonalidad: la parte nueva del análisis
+        start = time.perf_counter()
+        key_info = analyzer._key_from_scores(*analyzer._key_scores(features.get("chroma")))
+        key_ms = (time.perf_counter() - start) * 1000
+
+        # Resto de etapas que alimentan BPM y estructura
+        start = time.perf_counter()
+        _, beats = features.get("beat_track")
+        analyzer._detect_sections(
+            features.get("chroma"), features.get("mfcc"), beats, SAMPLE_RATE, analyzer.hop_length, len(y) / SAMPLE_RATE
+        )
+        total_ms = key_ms + (time.perf_counter() - start) * 1000
+
+        expected = f"{tonic} {scale}"
+        correct += key_info["key"] == expected
+        print(f"{expected:<10} {key_info['key']:<10} {key_info['key_confidence']:>6.2f} {key_ms:>9.1f} {total_ms:>11.1f}")
+
+    print(f"\n✅ Aciertos: {correct}/{len(fixtures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Modos de carga del analizador
+Compara los modos de LOAD_MODES (hq, fast, polyphase) y una
+preview de 30 s sobre WAV sintéticos a 44.1 kHz y 48 kHz: tiempo de
+carga, tiempo total de análisis y aceleración respecto a "hq".
+
+Uso: python benchmarks/bench_load_modes.py [duración_segundos]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analyzer import AudioAnalyzer, LOAD_MODES
+
+
+def write_fixture(directory: str, sr: int, duration: float) -> str:
+    """WAV estéreo sintético (acordes + ruido) a la tasa indicada"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sr * duration)) / sr
+    mono = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.2, 329.6)) / 3
+    stereo = np.stack([mono, mono]) + 0.05 * rng.standard_normal((2, len(t)))
+    path = os.path.join(directory, f"fixture_{sr}.wav")
+    sf.write(path, (0.5 * stereo.T).astype(np.float32), sr)
+    return path
+
+
+def time_load(path: str, mode: str, analyzer: AudioAnalyzer, duration=None) -> float:
+    start = time.perf_counter()
+    librosa.load(path, sr=analyzer.sample_rate, res_type=LOAD_MODES[mode], duration=duration)
+    return time.perf_counter() - start
+
+
+def time_analysis(path: str, analyzer: AudioAnalyzer, **options) -> float:
+    start = time.perf_counter()
+    result = analyzer.analyze_audio_file(path, use_cache=False, **options)
+    elapsed = time.perf_counter() - start
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return elapsed
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 240.0
+    analyzer = AudioAnalyzer()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for sr in (44100, 48000):
+            path = write_fixture(directory, sr, duration)
+            print(f"🎵 {sr} Hz · {duration:.0f}s")
+            print(f"{'modo':<16} {'carga (s)':>10} {'análisis (s)':>13} {'speedup':>8}")
+
+            baseline = None
+            cases = [(mode, {"load_mode": mode}, None) for mode in LOAD_MODES]
+            cases.append(("polyphase+30s", {"load_mode": "polyphase", "duration": 30.0}, 30.0))
+            for label, options, window in cases:
+                load = time_load(path, options["load_mode"], analyzer, window)
+                total = time_analysis(path, analyzer, **options)
+                baseline = baseline or total
+                print(f"{label:<16} {load:>10.2f} {total:>13.2f} {baseline / total:>7.2f}x")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Percentiles de MetricsDashboard
+Compara el cálculo anterior (deque de 1000 dicts, filtro y sort completo
+en cada consulta) con los sketches de quantile_sketch:
+  - throughput de record_metric (objetivo: 50k registros/s)
+  - latencia de get_metric_stats con 1 h de intervalos poblados
+  - precisión de p50/p95/p99 en ventanas de 1 y 5 min frente al valor
+    exacto, con una regresión de latencia en el último minuto
+  - memoria (buckets) por métrica
+
+Uso: python benchmarks/bench_metric_quantiles.py [registros_por_segundo] [segundos_simulados]
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_analytics_system import MetricsDashboard
+from quantile_sketch import WindowedQuantileSketch
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def legacy_stats(points: deque, time_window: float, now: float):
+    """Cálculo anterior: filtrar la deque y ordenar todos los valores"""
+    values = sorted(m["value"] for m in points if m["timestamp"] >= now - time_window)
+    if not values:
+        return {q: 0 for q in QUANTILES}, 0
+    return {q: values[min(int(len(values) * q), len(values) - 1)] for q in QUANTILES}, len(values)
+
+
+def latencies(rng, size, regression=False):
+    """Latencias lognormales (ms); la regresión triplica la cola"""
+    values = rng.lognormal(mean=3.0, sigma=0.6, size=size)
+    if regression:
+        slow = rng.random(size) < 0.1
+        values[slow] *= 3
+    return values
+
+
+def bench_throughput(rate: int):
+    dashboard = MetricsDashboard()
+    values = latencies(np.random.default_rng(0), rate * 5).tolist()
+    start = time.perf_counter()
+    for value in values:
+        dashboard.record_metric("api.response_time_ms", value)
+    elapsed = time.perf_counter() - start
+    capacity = len(values) / elapsed
+    print(f"record_metric: {elapsed / len(values) * 1e6:.2f} µs/registro, "
+          f"{capacity:,.0f} registros/s ({'OK' if capacity >= rate else 'por debajo de'} {rate:,}/s)")
+
+
+def bench_query():
+    """1 h de intervalos poblados: coste de consulta por ventana"""
+    rng = np.random.default_rng(1)
+    sketch = WindowedQuantileSketch()
+    legacy = deque(maxlen=1000)
+    now = 3600.0 * 1000
+    timestamps = np.sort(rng.uniform(now - 3600, now, 360_000))
+    for ts, value in zip(timestamps.tolist(), latencies(rng, len(timestamps)).tolist()):
+        sketch.add(value, ts)
+        legacy.append({"name": "m", "value": value, "timestamp": ts, "tags": {}})
+
+    print(f"\nconsulta con 1 h poblada ({sketch.memory_bins()} buckets en "
+          f"{sum(len(b) for _, b in sketch.tiers)} intervalos)")
+    for window in (60, 300, 3600):
+        repeat = 200
+        start = time.perf_counter()
+        for _ in range(repeat):
+            sketch.window(window, now).quantiles(QUANTILES)
+        sketch_us = (time.perf_counter() - start) / repeat * 1e6
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy_stats(legacy, window, now)
+        legacy_us = (time.perf_counter() - start) / repeat * 1e6
+        print(f"  ventana {window:>5}s  sketch {sketch_us:>8.1f} µs   anterior {legacy_us:>8.1f} µs")
+
+
+def bench_accuracy(rate: int, seconds: int):
+    """Flujo simulado a `rate`/s; el último minuto con regresión de latencia"""
+    rng = np.random.default_rng(2)
+    sketch = WindowedQuantileSketch()
+    legacy = deque(maxlen=1000)
+    start_ts = 1_000_000.0
+    history = []
+
+    for second in range(seconds):
+        regression = second >= seconds - 60
+        values = latencies(rng, rate, regression)
+        stamps = start_ts + second + np.arange(rate) / rate
+        history.append((stamps, values))
+        for ts, value in zip(stamps.tolist(), values.tolist()):
+            sketch.add(value, ts)
+        legacy.extend({"name": "m", "value": v, "timestamp": t, "tags": {}}
+                      for t, v in zip(stamps[-1000:].tolist(), values[-1000:].tolist()))
+
+    now = start_ts + seconds
+    all_stamps = np.concatenate([s for s, _ in history])
+    all_values = np.concatenate([v for _, v in history])
+
+    print(f"\nprecisión: {rate:,} registros/s durante {seconds}s simulados (regresión en el último minuto)")
+    for window in (60, 300):
+        if window > seconds:
+            continue
+        exact_values = all_values[all_stamps >= now - window]
+        merged = sketch.window(window, now)
+        approx = merged.quantiles(QUANTILES)
+        old, old_count = legacy_stats(legacy, window, now)
+        print(f"  ventana {window}s: exacto n={len(exact_values):,}, sketch n={merged.count:,}, anterior n={old_count:,}")
+        for q in QUANTILES:
+            exact = float(np.quantile(exact_values, q))
+            print(f"    p{int(q * 100):<3} exacto {exact:8.2f}  sketch {approx[q]:8.2f} "
+                  f"({(approx[q] / exact - 1) * 100:+5.2f}%)  anterior {old[q]:8.2f} "
+                  f"({(old[q] / exact - 1) * 100:+6.2f}%)")
+
+
+def main():
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    bench_throughput(rate)
+    bench_query()
+    bench_accuracy(rate, seconds)
+
+
+if __name__ == "__main__":
+    main()
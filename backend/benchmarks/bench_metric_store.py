@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Almacenamiento de métricas
+Deque de dicts (formato anterior de MetricsDashboard.metrics) frente al
+ring buffer columnar de metric_store: memoria por millón de puntos,
+coste de registro, tiempo de GC durante el registro y consulta de una
+ventana de 1 minuto (filtro lineal frente a búsqueda binaria).
+
+Uso: python benchmarks/bench_metric_store.py [puntos]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metric_store import MetricRingBuffer, TagInterner
+
+TAG_SETS = [{"mode": mode, "stage": stage} for mode in ("full", "streaming")
+            for stage in ("load", "tempo", "key", "mfcc", "segments")]
+
+
+class GCTimer:
+    """Tiempo total pasado en recolecciones del GC"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.collections = 0
+        self._started = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            self.seconds += time.perf_counter() - self._started
+            self.collections += 1
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+def fill_legacy(points: int, start: float):
+    store = deque(maxlen=points)
+    for i in range(points):
+        store.append({
+            "name": "audio_analysis.total.wall_ms",
+            "value": float(i % 997),
+            "timestamp": start + i * 0.001,
+            "tags": dict(TAG_SETS[i % len(TAG_SETS)])
+        })
+    return store
+
+
+def fill_columnar(points: int, start: float):
+    interner = TagInterner()
+    store = MetricRingBuffer(points)
+    for i in range(points):
+        store.append(float(i % 997), start + i * 0.001, interner.intern(TAG_SETS[i % len(TAG_SETS)]))
+    return store, interner
+
+
+def measure(label, fill, points, start):
+    gc.collect()
+    tracemalloc.start()
+    with GCTimer() as gc_timer:
+        began = time.perf_counter()
+        store = fill(points, start)
+        elapsed = time.perf_counter() - began
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_million = current / points * 1_000_000 / 1024 / 1024
+    print(f"{label:<22} {per_million:>9.1f} MB/millón  {elapsed / points * 1e6:>6.2f} µs/punto  "
+          f"GC {gc_timer.seconds * 1000:>7.1f} ms en {gc_timer.collections} recolecciones")
+    return store
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    start = 1_000_000.0
+    end = start + points * 0.001
+
+    print(f"{points:,} puntos\n")
+    legacy = measure("deque de dicts", fill_legacy, points, start)
+    columnar, interner = measure("ring buffer columnar", fill_columnar, points, start)
+
+    since = end - 60
+    repeat = 5
+    began = time.perf_counter()
+    for _ in range(repeat):
+        window = [m["value"] for m in legacy if m["timestamp"] >= since]
+    legacy_ms = (time.perf_counter() - began) / repeat * 1000
+
+    began = time.perf_counter()
+    for _ in range(repeat):
+        _, values, _ = columnar.window(since)
+    columnar_ms = (time.perf_counter() - began) / repeat * 1000
+
+    began = time.perf_counter()
+    for _ in range(1000):
+        columnar.window_start(since)
+    bisect_us = (time.perf_counter() - began) / 1000 * 1e6
+
+    print(f"\nventana de 60 s ({len(window):,} puntos)")
+    print(f"  filtro lineal (anterior)   {legacy_ms:>8.2f} ms")
+    print(f"  búsqueda binaria + copia   {columnar_ms:>8.2f} ms (bisect: {bisect_us:.1f} µs)")
+    assert len(values) == len(window)
+
+
+if __name__ == "__main__":
+    main()
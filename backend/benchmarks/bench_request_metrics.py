@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark - Sobrecarga del middleware de métricas por petición
+Llama directamente a la app ASGI (sin red ni servidor) con y sin
+RequestMetricsMiddleware, con distintas tasas de muestreo, y compara con
+un middleware equivalente sobre BaseHTTPMiddleware. Muestra también las
+rutas registradas para comprobar que se usa la plantilla, no la URL.
+
+Uso: python benchmarks/bench_request_metrics.py [peticiones] [rondas]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from monitoring_analytics_system import MetricsDashboard
+from request_metrics import RequestMetricsMiddleware
+
+
+def build_app(middleware=None, **options):
+    app = FastAPI()
+
+    @app.get("/api/tracks/{track_id}")
+    async def get_track(track_id: int):
+        return {"id": track_id, "title": "Neón"}
+
+    if middleware is not None:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+class BaseHTTPTimingMiddleware(BaseHTTPMiddleware):
+    """Referencia: la misma medición con BaseHTTPMiddleware"""
+
+    def __init__(self, app, dashboard):
+        super().__init__(app)
+        self.dashboard = dashboard
+
+    async def dispatch(self, request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        self.dashboard.record_metric("http.request.duration_ms", (time.perf_counter() - started) * 1000,
+                                     {"method": request.method, "path": request.url.path})
+        return response
+
+
+async def call(app, track_id: int):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": f"/api/tracks/{track_id}", "raw_path": f"/api/tracks/{track_id}".encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Cliente conectado hasta que termine la respuesta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, i)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    configs = {"sin middleware": build_app()}
+    for rate in (1.0, 0.1, 0.0):
+        configs[f"RequestMetricsMiddleware ({rate:.0%})"] = build_app(
+            RequestMetricsMiddleware, dashboard=MetricsDashboard(), sample_rate=rate)
+    configs["BaseHTTPMiddleware (referencia)"] = build_app(BaseHTTPTimingMiddleware, dashboard=MetricsDashboard())
+
+    # Rondas intercaladas y mínimo por configuración: reduce el ruido de la máquina
+    best = {name: float("inf") for name in configs}
+    for app in configs.values():
+        await measure(app, 200)
+    for _ in range(rounds):
+        for name, app in configs.items():
+            best[name] = min(best[name], await measure(app, requests))
+
+    baseline = best["sin middleware"]
+    print(f"{requests:,} peticiones x {rounds} rondas (mínimo por configuración)")
+    print(f"{'configuración':<34} {'µs/petición':>12} {'sobrecarga':>12}")
+    for name, elapsed in best.items():
+        overhead = "" if name == "sin middleware" else f"{elapsed - baseline:>+11.1f}"
+        print(f"{name:<34} {elapsed:>12.1f} {overhead:>12}")
+
+    sampled = MetricsDashboard()
+    await measure(build_app(RequestMetricsMiddleware, dashboard=sampled), 1000)
+    stats = sampled.get_metric_stats("http.request.duration_ms")
+    routes = {point["tags"]["route"] for point in sampled.get_metric_points("http.request.duration_ms")}
+    print(f"\nrutas registradas: {sorted(routes)}")
+    print(f"p50/p99: {stats['median']:.3f} / {stats['p99']:.3f} ms, peticiones: {sampled.counters['total_requests']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+🧬 Cache Codec - Serialización y compresión de entradas del cache
+Cada payload empieza con un byte de cabecera que identifica el formato:
+  bits 0-3: serializador (pickle, msgpack, orjson)
+  bits 4-7: compresión (ninguna, gzip, zstd, lz4)
+msgpack/orjson/zstd/lz4 son opcionales: si no están instalados se usa
+pickle + gzip. Los arrays de numpy (salidas del analizador) se guardan
+como buffers binarios en lugar de listas.
+Las entradas antiguas (pickle o pickle+gzip sin cabecera) se siguen leyendo.
+"""
+
+import gzip
+import math
+import pickle
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Identificadores de formato (no deben cambiar: se guardan en Redis)
+PICKLE = 0x01
+MSGPACK = 0x02
+ORJSON = 0x03
+
+NO_COMPRESSION = 0x00
+GZIP = 0x10
+ZSTD = 0x20
+LZ4 = 0x30
+
+# Tipos extendidos de msgpack
+_EXT_NDARRAY = 1
+_EXT_TUPLE = 2
+
+# Cabeceras de entradas anteriores al codec
+_LEGACY_PICKLE = 0x80
+_LEGACY_GZIP = b"\x1f\x8b"
+
+
+class UnsupportedValue(TypeError):
+    """El serializador no puede representar el valor sin pérdida"""
+
+
+# ========================================
+# SERIALIZADORES
+# ========================================
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_EXT_TUPLE, _msgpack_dumps(list(value)))
+    if np is not None:
+        if isinstance(value, np.ndarray) and value.dtype.kind in "biufc":
+            array = np.ascontiguousarray(value)
+            return msgpack.ExtType(_EXT_NDARRAY, msgpack.packb(
+                [array.dtype.str, list(array.shape), array.tobytes()], use_bin_type=True
+            ))
+        if isinstance(value, np.generic):
+            return value.item()
+    raise UnsupportedValue(f"msgpack no soporta {type(value).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_NDARRAY:
+        dtype, shape, buffer = msgpack.unpackb(data, raw=False)
+        return np.frombuffer(buffer, dtype=dtype).reshape(shape).copy()
+    if code == _EXT_TUPLE:
+        return tuple(_msgpack_loads(data))
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    try:
+        # strict_types: las tuplas pasan por _msgpack_default y vuelven como tuplas
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, strict_types=True)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise UnsupportedValue(str(e))
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+def _is_json_safe(value: Any) -> bool:
+    """orjson solo se usa si el valor sobrevive intacto a un viaje por JSON"""
+    kind = type(value)
+    if kind in (str, bool, int) or value is None:
+        return True
+    if kind is float:
+        # orjson convierte NaN/inf en null
+        return math.isfinite(value)
+    if kind is list:
+        return all(_is_json_safe(item) for item in value)
+    if kind is dict:
+        return all(type(key) is str and _is_json_safe(item) for key, item in value.items())
+    return False
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    if not _is_json_safe(value):
+        raise UnsupportedValue("valor no representable en JSON sin pérdida")
+    try:
+        return orjson.dumps(value)
+    except TypeError as e:
+        raise UnsupportedValue(str(e))
+
+
+SERIALIZERS: Dict[int, Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    PICKLE: ("pickle", lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+}
+if msgpack is not None:
+    SERIALIZERS[MSGPACK] = ("msgpack", _msgpack_dumps, _msgpack_loads)
+if orjson is not None:
+    SERIALIZERS[ORJSON] = ("orjson", _orjson_dumps, orjson.loads)
+
+
+# ========================================
+# COMPRESORES
+# ========================================
+
+COMPRESSORS: Dict[int, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    GZIP: ("gzip", lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+}
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    COMPRESSORS[ZSTD] = ("zstd", _zstd_compressor.compress, _zstd_decompressor.decompress)
+if lz4_frame is not None:
+    COMPRESSORS[LZ4] = ("lz4", lz4_frame.compress, lz4_frame.decompress)
+
+
+def register_serializer(format_id: int, name: str, dumps: Callable[[Any], bytes],
+                        loads: Callable[[bytes], Any]):
+    """Registrar un serializador adicional (format_id entre 0x04 y 0x0F)"""
+    if not 0x04 <= format_id <= 0x0F:
+        raise ValueError("format_id de serializador fuera de rango (0x04-0x0F)")
+    SERIALIZERS[format_id] = (name, dumps, loads)
+
+
+def register_compressor(format_id: int, name: str, compress: Callable[[bytes], bytes],
+                        decompress: Callable[[bytes], bytes]):
+    """Registrar un compresor adicional (format_id entre 0x40 y 0x70)"""
+    if format_id & 0x0F or not 0x40 <= format_id <= 0x70:
+        raise ValueError("format_id de compresor fuera de rango (0x40-0x70)")
+    COMPRESSORS[format_id] = (name, compress, decompress)
+
+
+# ========================================
+# CODEC
+# ========================================
+
+class CacheCodec:
+    """
+    Codifica valores para el cache eligiendo el serializador más rápido
+    que represente el valor sin pérdida y comprimiendo por encima de
+    compress_threshold bytes.
+    """
+
+    def __init__(self, serializers: Optional[Tuple[int, ...]] = None,
+                 compressor: Optional[int] = None, compress_threshold: int = 1024):
+        # Orden de preferencia; pickle siempre queda como respaldo
+        preferred = serializers or (MSGPACK, ORJSON, PICKLE)
+        self.serializers = tuple(fid for fid in preferred if fid in SERIALIZERS)
+        if PICKLE not in self.serializers:
+            self.serializers += (PICKLE,)
+        if compressor is None:
+            compressor = next(fid for fid in (ZSTD, LZ4, GZIP) if fid in COMPRESSORS)
+        self.compressor = compressor
+        self.compress_threshold = compress_threshold
+
+        # Estadísticas por formato
+        self.format_counts: Dict[str, int] = {}
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def encode(self, value: Any) -> bytes:
+        """Valor -> cabecera + payload"""
+        return self.encode_sized(value)[0]
+
+    def encode_sized(self, value: Any) -> Tuple[bytes, int]:
+        """Como encode, devolviendo también los bytes serializados sin comprimir"""
+        for format_id in self.serializers:
+            dumps = SERIALIZERS[format_id][1]
+            try:
+                data = dumps(value)
+                break
+            except UnsupportedValue:
+                continue
+
+        raw_size = len(data)
+        self.raw_bytes += raw_size
+        compression = NO_COMPRESSION
+        if self.compressor and len(data) > self.compress_threshold:
+            compressed = COMPRESSORS[self.compressor][1](data)
+            # Datos ya comprimidos (p.ej. audio) pueden no reducirse
+            if len(compressed) < len(data):
+                compression = self.compressor
+                data = compressed
+
+        self.stored_bytes += len(data) + 1
+        label = self.format_name(format_id | compression)
+        self.format_counts[label] = self.format_counts.get(label, 0) + 1
+        return bytes([format_id | compression]) + data, raw_size
+
+    def decode(self, payload: bytes) -> Any:
+        """Cabecera + payload -> valor (acepta entradas sin cabecera)"""
+        header = payload[0]
+        if header == _LEGACY_PICKLE:
+            return pickle.loads(payload)
+        if payload[:2] == _LEGACY_GZIP:
+            return pickle.loads(gzip.decompress(payload))
+
+        serializer, compression = header & 0x0F, header & 0xF0
+        data = payload[1:]
+        if compression:
+            if compression not in COMPRESSORS:
+                raise ValueError(f"Compresión no disponible en este proceso: 0x{compression:02x}")
+            data = COMPRESSORS[compression][2](data)
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Serializador no disponible en este proceso: 0x{serializer:02x}")
+        return SERIALIZERS[serializer][2](data)
+
+    @staticmethod
+    def format_name(header: int) -> str:
+        serializer = SERIALIZERS.get(header & 0x0F, (f"0x{header & 0x0F:02x}",))[0]
+        compression = header & 0xF0
+        if not compression:
+            return serializer
+        return f"{serializer}+{COMPRESSORS.get(compression, (f'0x{compression:02x}',))[0]}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Formatos usados y ratio de compresión acumulado"""
+        return {
+            'serializers': [SERIALIZERS[fid][0] for fid in self.serializers],
+            'compressor': COMPRESSORS[self.compressor][0] if self.compressor else None,
+            'compress_threshold': self.compress_threshold,
+            'format_counts': dict(self.format_counts),
+            'raw_bytes': self.raw_bytes,
+            'stored_bytes': self.stored_bytes,
+            'compression_ratio_percent': round(
+                (1 - self.stored_bytes / self.raw_bytes) * 100, 2
+            ) if self.raw_bytes else 0
+        }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+🔑 Cache Keys - Claves canónicas para el cache de resultados de IA
+Dos llamadas equivalentes deben producir la misma clave:
+  - se ignora `self`/`cls` de los métodos
+  - argumentos posicionales y por nombre se enlazan a la firma (f(1) == f(x=1))
+  - el texto se normaliza (Unicode NFC, espacios horizontales, finales de
+    línea; mayúsculas opcional). Los saltos de línea se conservan: en letras
+    separan versos y estrofas, y dos letras no pueden compartir clave
+  - diccionarios y sets se ordenan; tuplas y listas son equivalentes
+Cada clave lleva un namespace de versión: cambiar CACHE_KEY_VERSION en un
+despliegue invalida todas las claves anteriores de una vez.
+"""
+
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Callable, Dict, Optional, Sequence
+
+CACHE_KEY_PREFIX = "son1k"
+# 2: los saltos de línea dejaron de colapsarse (las claves v1 podían mezclar letras)
+CACHE_KEY_VERSION = os.getenv("CACHE_KEY_VERSION", "2")
+BOUND_ARGUMENTS = ("self", "cls")
+# Espacios, tabuladores y demás blancos excepto el salto de línea
+HORIZONTAL_WHITESPACE = re.compile(r"[^\S\n]+")
+
+
+def normalize_text(text: str, case_insensitive: bool = False) -> str:
+    """
+    NFC, CRLF/CR como LF y espacios horizontales colapsados en cada línea
+    (sin blancos al principio o final). Los saltos de línea se mantienen.
+    casefold solo si el llamador lo declara seguro.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(HORIZONTAL_WHITESPACE.sub(" ", line).strip() for line in text.split("\n")).strip("\n")
+    return text.casefold() if case_insensitive else text
+
+
+def canonicalize(value: Any, case_insensitive: bool = False) -> Any:
+    """Convertir un valor en una estructura JSON estable"""
+    if isinstance(value, str):
+        return normalize_text(value, case_insensitive)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {
+            str(canonicalize(key, case_insensitive)): canonicalize(item, case_insensitive)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item, case_insensitive) for item in value]
+    if isinstance(value, (set, frozenset)):
+        items = [canonicalize(item, case_insensitive) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, bytes):
+        return {"__bytes__": hashlib.blake2b(value, digest_size=16).hexdigest()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return canonicalize(dataclasses.asdict(value), case_insensitive)
+    if hasattr(value, "model_dump"):
+        # Modelos pydantic
+        return canonicalize(value.model_dump(), case_insensitive)
+    # Último recurso: repr (puede fallar el acierto, nunca mezclar valores distintos)
+    return {"__repr__": f"{type(value).__module__}.{type(value).__qualname__}:{value!r}"}
+
+
+def _select_field(arguments: Dict[str, Any], field: str) -> Any:
+    """Extraer 'arg' o 'arg.campo' (dicts u objetos) de los argumentos enlazados"""
+    name, *path = field.split(".")
+    value = arguments.get(name)
+    for part in path:
+        if isinstance(value, dict):
+            value = value.get(part)
+        else:
+            value = getattr(value, part, None)
+    return value
+
+
+def bind_arguments(func: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """Argumentos por nombre según la firma, con defaults y sin self/cls"""
+    try:
+        signature = inspect.signature(func)
+        bound = signature.bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        # Firma no inspeccionable o llamada inválida: mantener la forma posicional
+        return {"args": list(args), "kwargs": kwargs}
+
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    for name in BOUND_ARGUMENTS:
+        arguments.pop(name, None)
+    # **kwargs de la firma se aplanan: f(a=1) y f(**{"a": 1}) dan la misma clave
+    for name, parameter in signature.parameters.items():
+        if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+            arguments.update(arguments.pop(name, {}))
+    return arguments
+
+
+def build_cache_key(func: Callable, args: tuple, kwargs: dict,
+                    key_fields: Optional[Sequence[str]] = None, case_insensitive: bool = False,
+                    version: Optional[str] = None, prefix: str = CACHE_KEY_PREFIX) -> str:
+    """
+    Clave '<prefix>:v<versión>:<módulo.función>:<hash>'.
+    key_fields limita la clave a los argumentos (o 'arg.campo') que
+    determinan el resultado, ignorando p.ej. timestamps o ids de petición.
+    """
+    arguments = bind_arguments(func, args, kwargs)
+    if key_fields is not None:
+        arguments = {field: _select_field(arguments, field) for field in key_fields}
+
+    params_str = json.dumps(canonicalize(arguments, case_insensitive), sort_keys=True,
+                            ensure_ascii=False, separators=(",", ":"))
+    params_hash = hashlib.sha256(params_str.encode()).hexdigest()[:16]
+    name = f"{func.__module__}.{func.__qualname__}"
+    return f"{prefix}:v{version or CACHE_KEY_VERSION}:{name}:{params_hash}"
+
+
+def key_namespace(cache_key: str) -> str:
+    """
+    Namespace de una clave: 'v<versión>:<módulo.función>'.
+    Las claves anteriores al versionado ('son1k:<función>:<hash>') se
+    agrupan como 'unversioned:<función>'.
+    """
+    parts = cache_key.split(":")
+    if len(parts) >= 4 and parts[1].startswith("v"):
+        return f"{parts[1]}:{parts[2]}"
+    if len(parts) >= 3:
+        return f"unversioned:{parts[1]}"
+    return "other"
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+📊 Cache Stats - Observabilidad del cache de PerformanceOptimizer
+  - FunctionCacheStats: aciertos, tamaño medio, compresión y tiempo
+    ahorrado por función decorada (namespace de la clave)
+  - RedisMemorySampler: estima la memoria de Redis por namespace con
+    SCAN incremental y MEMORY USAGE sobre una muestra, sin KEYS ni
+    bloqueos largos del servidor
+Sirve para dimensionar los niveles local y Redis del cache.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from cache_keys import CACHE_KEY_PREFIX, key_namespace
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_OUTCOMES = ("fresh_hits", "stale_hits", "negative_hits", "misses")
+
+
+class FunctionCacheStats:
+    """Contadores por namespace ('v<versión>:<módulo.función>')"""
+
+    def __init__(self):
+        self._namespaces: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _empty_counters() -> Dict[str, float]:
+        return {
+            **{outcome: 0 for outcome in LOOKUP_OUTCOMES},
+            'hit_seconds': 0.0,
+            'upstream_calls': 0,
+            'upstream_failures': 0,
+            'upstream_seconds': 0.0,
+            'stores': 0,
+            'raw_bytes': 0,
+            'stored_bytes': 0
+        }
+
+    def _counters(self, cache_key: str) -> Dict[str, float]:
+        namespace = key_namespace(cache_key)
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = self._empty_counters()
+        return self._namespaces[namespace]
+
+    def record_lookup(self, cache_key: str, outcome: str, seconds: float):
+        """outcome: fresh_hits, stale_hits, negative_hits o misses"""
+        counters = self._counters(cache_key)
+        counters[outcome] += 1
+        if outcome != 'misses':
+            counters['hit_seconds'] += seconds
+
+    def record_upstream(self, cache_key: str, seconds: float, failed: bool = False):
+        """Duración de la llamada real (sin cache)"""
+        counters = self._counters(cache_key)
+        counters['upstream_calls'] += 1
+        counters['upstream_seconds'] += seconds
+        if failed:
+            counters['upstream_failures'] += 1
+
+    def record_store(self, cache_key: str, raw_bytes: int, stored_bytes: int):
+        """Tamaño serializado y almacenado (tras compresión) de un valor"""
+        counters = self._counters(cache_key)
+        counters['stores'] += 1
+        counters['raw_bytes'] += raw_bytes
+        counters['stored_bytes'] += stored_bytes
+
+    def get_stats(self, local_namespaces: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, Any]:
+        """
+        Estadísticas por namespace. time_saved_seconds estima el ahorro de
+        los aciertos servidos: aciertos × (latencia upstream media − latencia de acierto media)
+        """
+        local_namespaces = local_namespaces or {}
+        stats = {}
+        for namespace in sorted(set(self._namespaces) | set(local_namespaces)):
+            counters = self._namespaces.get(namespace) or self._empty_counters()
+            hits = sum(counters[outcome] for outcome in LOOKUP_OUTCOMES if outcome != 'misses')
+            served = counters['fresh_hits'] + counters['stale_hits']
+            lookups = hits + counters['misses']
+            mean_hit = counters['hit_seconds'] / hits if hits else 0.0
+            upstream_ok = counters['upstream_calls'] - counters['upstream_failures']
+            mean_upstream = counters['upstream_seconds'] / counters['upstream_calls'] if counters['upstream_calls'] else 0.0
+            stats[namespace] = {
+                **{outcome: int(counters[outcome]) for outcome in LOOKUP_OUTCOMES},
+                'hit_ratio_percent': round(hits / lookups * 100, 2) if lookups else 0,
+                'upstream_calls': int(counters['upstream_calls']),
+                'upstream_failures': int(counters['upstream_failures']),
+                'mean_upstream_ms': round(mean_upstream * 1000, 2),
+                'mean_hit_ms': round(mean_hit * 1000, 3),
+                'time_saved_seconds': round(served * max(mean_upstream - mean_hit, 0.0), 3) if upstream_ok else 0,
+                'stores': int(counters['stores']),
+                'mean_value_bytes': round(counters['stored_bytes'] / counters['stores']) if counters['stores'] else 0,
+                'compression_ratio_percent': round(
+                    (1 - counters['stored_bytes'] / counters['raw_bytes']) * 100, 2
+                ) if counters['raw_bytes'] else 0,
+                'local_tier': local_namespaces.get(namespace, {'entries': 0, 'bytes': 0})
+            }
+        return stats
+
+
+class RedisMemorySampler:
+    """
+    Estimación de memoria por namespace sin bloquear Redis ni el event loop:
+    SCAN en lotes de scan_count con pausas, muestreo reservoir de
+    samples_per_namespace claves y MEMORY USAGE solo sobre la muestra.
+    Si se corta en max_keys, los conteos se extrapolan con DBSIZE.
+    """
+
+    def __init__(self, redis_client, prefix: str = CACHE_KEY_PREFIX, scan_count: int = 500,
+                 max_keys: int = 50000, samples_per_namespace: int = 32,
+                 pause: float = 0.005, max_age: float = 60.0):
+        self.redis_client = redis_client
+        self.prefix = f"{prefix}:"
+        self.scan_count = scan_count
+        self.max_keys = max_keys
+        self.samples_per_namespace = samples_per_namespace
+        self.pause = pause
+        # Las muestras se reutilizan durante max_age segundos
+        self.max_age = max_age
+
+        self._lock = asyncio.Lock()
+        self.last_sample: Optional[Dict[str, Any]] = None
+
+    async def sample(self, refresh: bool = False) -> Dict[str, Any]:
+        """Última muestra vigente o una nueva (una sola en curso a la vez)"""
+        if not refresh and self._is_fresh():
+            return self.last_sample
+        async with self._lock:
+            if refresh or not self._is_fresh():
+                self.last_sample = await self._sample()
+            return self.last_sample
+
+    def _is_fresh(self) -> bool:
+        return self.last_sample is not None and time.time() - self.last_sample['sampled_at'] < self.max_age
+
+    async def _sample(self) -> Dict[str, Any]:
+        started = time.time()
+        client = self.redis_client
+        dbsize = await client.dbsize()
+
+        # SCAN sin MATCH: así se conoce la fracción del keyspace examinada
+        counts: Dict[str, int] = {}
+        reservoirs: Dict[str, list] = {}
+        examined = other_keys = 0
+        cursor = 0
+        while True:
+            cursor, keys = await client.scan(cursor, count=self.scan_count)
+            for key in keys:
+                examined += 1
+                name = key.decode(errors='replace') if isinstance(key, bytes) else key
+                if not name.startswith(self.prefix):
+                    other_keys += 1
+                    continue
+                namespace = key_namespace(name)
+                seen = counts.get(namespace, 0) + 1
+                counts[namespace] = seen
+                reservoir = reservoirs.setdefault(namespace, [])
+                if len(reservoir) < self.samples_per_namespace:
+                    reservoir.append(key)
+                else:
+                    slot = random.randrange(seen)
+                    if slot < self.samples_per_namespace:
+                        reservoir[slot] = key
+            if cursor == 0 or examined >= self.max_keys:
+                break
+            await asyncio.sleep(self.pause)
+
+        complete = cursor == 0
+        scale = dbsize / examined if not complete and examined else 1.0
+
+        namespaces = {}
+        total_bytes = 0
+        for namespace, sample in reservoirs.items():
+            sizes = []
+            for start in range(0, len(sample), 100):
+                async with client.pipeline(transaction=False) as pipe:
+                    for key in sample[start:start + 100]:
+                        pipe.memory_usage(key)
+                    # Claves expiradas entre SCAN y MEMORY USAGE devuelven None
+                    sizes += [size for size in await pipe.execute() if size]
+                await asyncio.sleep(self.pause)
+
+            mean_bytes = sum(sizes) / len(sizes) if sizes else 0
+            estimated_keys = round(counts[namespace] * scale)
+            estimated_bytes = round(mean_bytes * estimated_keys)
+            total_bytes += estimated_bytes
+            namespaces[namespace] = {
+                'keys_seen': counts[namespace],
+                'estimated_keys': estimated_keys,
+                'sampled': len(sizes),
+                'mean_bytes': round(mean_bytes),
+                'estimated_bytes': estimated_bytes,
+                'estimated_mb': round(estimated_bytes / 1024 / 1024, 3)
+            }
+
+        try:
+            used_memory = (await client.info('memory')).get('used_memory')
+        except Exception as e:
+            logger.warning(f"INFO memory no disponible: {e}")
+            used_memory = None
+
+        return {
+            'sampled_at': started,
+            'seconds': round(time.time() - started, 3),
+            'dbsize': dbsize,
+            'keys_examined': examined,
+            'other_keys': other_keys,
+            'complete': complete,
+            'scale': round(scale, 3),
+            'namespaces': dict(sorted(namespaces.items(), key=lambda item: item[1]['estimated_bytes'], reverse=True)),
+            'estimated_total_bytes': total_bytes,
+            'estimated_total_mb': round(total_bytes / 1024 / 1024, 3),
+            'redis_used_memory_bytes': used_memory
+        }
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+🔥 Cache Warm-up - Precarga del cache de IA con los prompts más pedidos
+Cada worker nuevo empieza con el cache local vacío y los prompts de
+estilos, botones y traducciones se vuelven a calcular con Qwen. Este
+módulo:
+  - cuenta las peticiones recientes en un count-min sketch (memoria fija)
+    con decaimiento periódico, y mantiene los top-N candidatos
+  - al arrancar y cada cierto intervalo, vuelve a ejecutar esas llamadas
+    (más semillas fijas) a través de las funciones decoradas con
+    cache_ai_result, que dejan el resultado en el cache
+  - limita la concurrencia para no competir con el tráfico real
+  - con Redis, solo un worker por intervalo hace la precarga periódica
+    (lock de líder SET NX EX); el resto lee los resultados del cache
+La precarga periódica está desactivada por defecto (CACHE_WARMUP_ENABLED).
+Uso:
+    cache_warmer.register("creator_style_prompt", service.generate_prompt_from_style,
+                          seeds=[{"style": "Synthwave"}])
+    cache_warmer.record("creator_style_prompt", style="Synthwave")
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cache_keys import canonicalize
+
+logger = logging.getLogger(__name__)
+
+# Lock de líder de la precarga periódica, compartido por todos los workers
+WARMUP_LEADER_KEY = "son1k:cache:warmup:leader"
+
+# Activo dentro de la precarga: sus llamadas no cuentan como peticiones reales
+_warming = contextvars.ContextVar("cache_warming", default=False)
+
+
+class FrequencySketch:
+    """
+    Count-min sketch con actualización conservadora y decaimiento.
+    Las frecuencias son estimaciones por exceso; con width=2048 y depth=4
+    ocupa 8192 contadores sea cual sea el número de prompts distintos.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[i * 8:(i + 1) * 8], "little") % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Sumar `count` y devolver la nueva estimación"""
+        indexes = self._indexes(key)
+        estimate = min(row[index] for row, index in zip(self.table, indexes)) + count
+        # Conservadora: solo se suben los contadores por debajo de la estimación
+        for row, index in zip(self.table, indexes):
+            if row[index] < estimate:
+                row[index] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.table, self._indexes(key)))
+
+    def decay(self, factor: float = 0.5):
+        """Envejecer los contadores para que pesen las peticiones recientes"""
+        for row in self.table:
+            for index, value in enumerate(row):
+                row[index] = int(value * factor)
+        self.total = int(self.total * factor)
+
+
+class CacheWarmer:
+    """Top-N de llamadas recientes y trabajo de precarga con concurrencia limitada"""
+
+    def __init__(self, top_n: int = 20, concurrency: int = 2, job_timeout: float = 60.0,
+                 max_candidates: int = 256, decay_factor: float = 0.5, lock_ttl: float = 600.0):
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.job_timeout = job_timeout
+        self.max_candidates = max_candidates
+        self.decay_factor = decay_factor
+        # Duración del lock de líder cuando la precarga es de una sola vez
+        self.lock_ttl = lock_ttl
+        self.redis_client = None
+
+        self.sketch = FrequencySketch()
+        self._handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._seeds: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        # Candidatos al top-N: clave -> (tipo, parámetros); acotado a max_candidates
+        self._candidates: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Estadísticas
+        self.runs = 0
+        self.warmed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _key(kind: str, params: Dict[str, Any]) -> str:
+        return f"{kind}:{json.dumps(canonicalize(params), sort_keys=True, ensure_ascii=False)}"
+
+    def register(self, kind: str, handler: Callable[..., Awaitable[Any]],
+                 seeds: Iterable[Dict[str, Any]] = ()):
+        """
+        Registrar una función async cacheada (handler(**params)) y las
+        llamadas que se precargan siempre, se hayan pedido o no
+        """
+        self._handlers[kind] = handler
+        for params in seeds:
+            self._seeds[self._key(kind, params)] = (kind, dict(params))
+
+    def record(self, kind: str, **params):
+        """Anotar una petición real; barato, se llama en la ruta caliente"""
+        if _warming.get():
+            return
+        key = self._key(kind, params)
+        self.sketch.add(key)
+        if key not in self._candidates:
+            self._candidates[key] = (kind, params)
+            if len(self._candidates) > self.max_candidates:
+                # Descartar el candidato menos frecuente
+                coldest = min(self._candidates, key=self.sketch.estimate)
+                del self._candidates[coldest]
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], int]]:
+        """Llamadas más frecuentes: (tipo, parámetros, frecuencia estimada)"""
+        ranked = sorted(
+            ((kind, params, self.sketch.estimate(key)) for key, (kind, params) in self._candidates.items()),
+            key=lambda item: item[2], reverse=True
+        )
+        return [item for item in ranked[:n or self.top_n] if item[2] > 0]
+
+    def _plan(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Top-N recientes primero, después las semillas, sin duplicados"""
+        plan, seen = [], set()
+        recent = [(kind, params) for kind, params, _ in self.top(limit)]
+        for kind, params in recent + list(self._seeds.values()):
+            key = self._key(kind, params)
+            if kind in self._handlers and key not in seen:
+                seen.add(key)
+                plan.append((kind, params))
+        return plan
+
+    async def warm_up(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Ejecutar una pasada de precarga con como mucho `concurrency` llamadas a la vez"""
+        if self._running:
+            return {"skipped": True, "reason": "warm-up en curso"}
+        self._running = True
+        started = time.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {"warmed": 0, "failed": 0, "timeouts": 0}
+
+        async def warm(kind: str, params: Dict[str, Any]):
+            async with semaphore:
+                _warming.set(True)
+                try:
+                    await asyncio.wait_for(self._handlers[kind](**params), timeout=self.job_timeout)
+                    results["warmed"] += 1
+                except asyncio.TimeoutError:
+                    results["timeouts"] += 1
+                    logger.warning(f"Warm-up {kind} superó {self.job_timeout}s: {params}")
+                except Exception as e:
+                    results["failed"] += 1
+                    logger.warning(f"Warm-up {kind} falló: {e}")
+
+        try:
+            plan = self._plan(limit)
+            await asyncio.gather(*(warm(kind, params) for kind, params in plan))
+        finally:
+            self._running = False
+
+        self.runs += 1
+        self.warmed += results["warmed"]
+        self.failed += results["failed"]
+        self.timeouts += results["timeouts"]
+        self.last_run = {
+            **results,
+            "planned": len(plan),
+            "started_at": started,
+            "seconds": round(time.time() - started, 3)
+        }
+        logger.info(f"Cache warm-up: {results['warmed']}/{len(plan)} llamadas precargadas")
+        return self.last_run
+
+    async def _acquire_leadership(self, ttl: float) -> bool:
+        """
+        Solo un worker precarga en cada intervalo: el lock caduca solo y no
+        se libera al terminar. Sin Redis cada worker precarga su cache local.
+        """
+        if self.redis_client is None:
+            return True
+        try:
+            acquired = await self.redis_client.set(
+                WARMUP_LEADER_KEY, f"{socket.gethostname()}:{os.getpid()}",
+                nx=True, ex=max(int(ttl), 1)
+            )
+        except Exception as e:
+            logger.error(f"Error adquiriendo el lock de warm-up: {e}")
+            return False
+        return bool(acquired)
+
+    async def _run_periodically(self, interval: float):
+        while True:
+            try:
+                if await self._acquire_leadership(interval if interval > 0 else self.lock_ttl):
+                    await self.warm_up()
+                else:
+                    self.skipped += 1
+                    logger.info("Cache warm-up: otro worker tiene el lock de líder")
+            except Exception as e:
+                logger.error(f"Error en cache warm-up: {e}")
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+            self.sketch.decay(self.decay_factor)
+
+    def start(self, interval: float = 0, redis_client=None) -> asyncio.Task:
+        """
+        Lanzar la precarga en segundo plano; interval=0 la ejecuta una sola vez.
+        Con redis_client, las pasadas se reparten con un lock de líder.
+        """
+        if self._task is None or self._task.done():
+            self.redis_client = redis_client
+            self._task = asyncio.create_task(self._run_periodically(interval))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "handlers": sorted(self._handlers),
+            "seeds": len(self._seeds),
+            "candidates": len(self._candidates),
+            "recorded_requests": self.sketch.total,
+            "top": [{"kind": kind, "params": params, "estimated_count": count}
+                    for kind, params, count in self.top()],
+            "top_n": self.top_n,
+            "concurrency": self.concurrency,
+            "runs": self.runs,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "skipped_not_leader": self.skipped,
+            "last_run": self.last_run,
+            "scheduled": self._task is not None and not self._task.done()
+        }
+
+
+def translation_seed_prompts() -> List[str]:
+    """Prompts predefinidos y de los botones en español, si el servicio está disponible"""
+    try:
+        from services.auto_translation_service import auto_translation_service
+    except ImportError:
+        return []
+    prompts = list(auto_translation_service.predefined_prompts)
+    prompts += [button["prompt"] for button in auto_translation_service.generate_spanish_prompt_buttons()]
+    return prompts
+
+
+# Instancia global; se configura por entorno
+cache_warmer = CacheWarmer(
+    top_n=int(os.getenv("CACHE_WARMUP_TOP_N", "20")),
+    concurrency=int(os.getenv("CACHE_WARMUP_CONCURRENCY", "2")),
+    job_timeout=float(os.getenv("CACHE_WARMUP_JOB_TIMEOUT", "60")),
+    lock_ttl=float(os.getenv("CACHE_WARMUP_LOCK_TTL", "600"))
+)
@@ -9,10 +9,13 @@ import asyncio
 import os
 import json
 import subprocess
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 import logging
 
+from model_registry import model_registry
+
 logger = logging.getLogger(__name__)
 
 class CloneStationService:
@@ -36,7 +39,8 @@ class CloneStationService:
                 "best_for": "singing",
                 "model_path": self.models_dir / "so_vits",
                 "config_file": "config.json",
-                "checkpoint": "model.pth"
+                "checkpoint": "model.pth",
+                "weights": "model.safetensors"
             },
             "bark": {
                 "name": "Bark",
@@ -44,10 +48,16 @@ class CloneStationService:
                 "speed": "fast",
                 "best_for": "speech",
                 "model_path": self.models_dir / "bark",
+                "weights": "model.safetensors",
                 "speakers": ["v2/en_speaker_0", "v2/en_speaker_1", "v2/en_speaker_2"]
             }
         }
         
+        # Pesos base de cada motor en el registro compartido (mmap, carga única por proceso)
+        for engine, config in self.voice_engines.items():
+            if not model_registry.is_registered(engine):
+                model_registry.register(engine, weights_path=config["model_path"] / config["weights"])
+        
         # Configuración de plugins Waves
         self.waves_plugins = {
             "compressor": {
@@ -305,11 +315,13 @@ class CloneStationService:
         try:
             output_path = self.output_dir / f"sovits_clone_{int(asyncio.get_event_loop().time())}.wav"
             
-            # En producción, ejecutar so-VITS
-            # comando = f"python so_vits_inference.py --model {model_info['model_path']} --text '{text}' --output {output_path}"
-            
-            # Simular procesamiento
-            await asyncio.sleep(3)
+            # Los pesos base quedan fijados en el registro mientras dura la inferencia
+            async with self._engine_lease("so-vits"):
+                # En producción, ejecutar so-VITS con los pesos del lease
+                # comando = f"python so_vits_inference.py --model {model_info['model_path']} --text '{text}' --output {output_path}"
+                
+                # Simular procesamiento
+                await asyncio.sleep(3)
             
             return {
                 "success": True,
@@ -328,12 +340,13 @@ class CloneStationService:
         try:
             output_path = self.output_dir / f"bark_clone_{int(asyncio.get_event_loop().time())}.wav"
             
-            # En producción, ejecutar Bark
-            # from bark import generate_audio, SAMPLE_RATE
-            # audio_array = generate_audio(text, history_prompt=model_info["speaker"])
-            
-            # Simular procesamiento
-            await asyncio.sleep(1.5)
+            async with self._engine_lease("bark"):
+                # En producción, ejecutar Bark con los pesos del lease
+                # from bark import generate_audio, SAMPLE_RATE
+                # audio_array = generate_audio(text, history_prompt=model_info["speaker"])
+                
+                # Simular procesamiento
+                await asyncio.sleep(1.5)
             
             return {
                 "success": True,
@@ -378,11 +391,12 @@ class CloneStationService:
             preserve_melody = settings.get("preserve_melody", True)
             clone_intensity = settings.get("clone_intensity", 80) / 100
             
-            # En producción, aplicar algoritmo de transferencia vocal
-            # Esto requiere técnicas avanzadas de procesamiento de señales
-            
-            # Simular transferencia
-            await asyncio.sleep(4)
+            async with self._engine_lease(model_info["engine"]):
+                # En producción, aplicar algoritmo de transferencia vocal
+                # Esto requiere técnicas avanzadas de procesamiento de señales
+                
+                # Simular transferencia
+                await asyncio.sleep(4)
             
             return {
                 "audio_path": str(output_path),
@@ -464,6 +478,15 @@ class CloneStationService:
             logger.error(f"Error aplicando {plugin}: {e}")
             raise
     
+    def _engine_lease(self, engine: str):
+        """
+        Lease de los pesos base del motor en model_registry (no se expulsan
+        mientras dure el bloque). Sin pesos en disco no hay nada que fijar.
+        """
+        if model_registry.is_available(engine):
+            return model_registry.lease(engine)
+        return nullcontext()
+    
     async def _get_model_info(self, model_id: str) -> Optional[Dict]:
         """Obtener información del modelo entrenado"""
         try:
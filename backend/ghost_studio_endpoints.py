@@ -5,7 +5,14 @@ API para la herramienta que democratiza la música
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse, FileResponse
+from typing import List, Optional
 from ghost_studio_service import GhostStudioService
+from audio_analyzer import analyzer
+from analysis_formats import RESPONSE_FORMATS, ARRAY_DTYPES, format_analysis_result, get_array_path
+import json
+import os
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,6 +80,86 @@ async def analyze_audio_track(
         logger.error(f"Error analizando audio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze-batch")
+async def analyze_audio_batch(
+    audios: List[UploadFile] = File(...),
+    workers: int = 2,
+    timeout: float = 300,
+    streaming: bool = False,
+    response_format: str = "json",
+    dtype: str = "float16",
+    profile: bool = False,
+    load_mode: Optional[str] = None,
+    offset: float = 0.0,
+    duration: Optional[float] = None
+):
+    """Analizar varias pistas en un pool de procesos (resultados NDJSON a medida que terminan)"""
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"response_format debe ser uno de {RESPONSE_FORMATS}")
+    if dtype not in ARRAY_DTYPES:
+        raise HTTPException(status_code=400, detail=f"dtype debe ser uno de {tuple(ARRAY_DTYPES)}")
+    
+    # Concurrencia pedida por el cliente, acotada a los núcleos disponibles
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    
+    try:
+        batch_id = uuid.uuid4().hex
+        valid_paths = []
+        rejected = []
+        filenames = {}
+        
+        for index, audio in enumerate(audios):
+            # El nombre del cliente solo aporta la extensión: sin rutas ni colisiones
+            extension = os.path.splitext(os.path.basename(audio.filename or ""))[1]
+            temp_path = f"temp/batch_{batch_id}_{index}{extension}"
+            filenames[temp_path] = audio.filename
+            with open(temp_path, "wb") as buffer:
+                content = await audio.read()
+                buffer.write(content)
+            
+            validation = ghost_service.validate_audio_file(temp_path)
+            if validation["valid"]:
+                valid_paths.append(temp_path)
+            else:
+                rejected.append({"path": temp_path, "filename": audio.filename,
+                                 "success": False, "error": validation["error"]})
+                os.unlink(temp_path)
+        
+        def result_lines():
+            try:
+                for result in rejected:
+                    yield json.dumps(result) + "\n"
+                for result in analyzer.analyze_many(valid_paths, workers=workers,
+                                                    timeout=timeout, streaming=streaming,
+                                                    profile=profile, load_mode=load_mode,
+                                                    offset=offset, duration=duration):
+                    result = {**result, "filename": filenames.get(result["path"])}
+                    yield json.dumps(format_analysis_result(result, response_format, dtype)) + "\n"
+            finally:
+                for path in valid_paths:
+                    if os.path.exists(path):
+                        os.unlink(path)
+        
+        # Starlette itera el generador síncrono en el threadpool, sin bloquear el event loop
+        return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+        
+    except Exception as e:
+        logger.error(f"Error en análisis por lotes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analysis-arrays/{array_id}/{name}")
+async def download_analysis_array(array_id: str, name: str):
+    """Descargar MFCC o beats de un análisis como .npy"""
+    try:
+        path = get_array_path(array_id, name)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Identificador o nombre de array inválido")
+    
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Array no encontrado")
+    
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
 @router.post("/generate")
 async def generate_professional_track(request: dict):
     """Generar pista profesional con Ghost Studio"""
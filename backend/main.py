@@ -8,6 +8,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
+import asyncio
 import os
 import logging
 from datetime import datetime
@@ -45,6 +46,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia, tamaños y códigos de estado por ruta (REQUEST_METRICS_SAMPLE_RATE: fracción medida)
+from request_metrics import RequestMetricsMiddleware
+
+app.add_middleware(
+    RequestMetricsMiddleware,
+    sample_rate=float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", "1.0")),
+)
+
 # Incluir routers
 app.include_router(community_router)
 
@@ -63,7 +72,7 @@ from the_creator_endpoints import router as the_creator_router
 from ux_enhancement_endpoints import router as ux_router
 from advanced_features_endpoints import router as advanced_router
 from integrations_endpoints import router as integrations_router
-from monitoring_endpoints import router as monitoring_router
+from monitoring_endpoints import router as monitoring_router, metrics_router
 
 app.include_router(waves_router)
 app.include_router(store_router)
@@ -80,6 +89,48 @@ app.include_router(ux_router)
 app.include_router(advanced_router)
 app.include_router(integrations_router)
 app.include_router(monitoring_router)
+app.include_router(metrics_router)
+
+# Precargar modelos configurados (MODEL_WARMUP) al arrancar
+from model_registry import model_registry
+
+@app.on_event("startup")
+async def warm_up_models():
+    await model_registry.warm_up()
+
+# Precarga del cache de IA en segundo plano, desactivada por defecto
+# (CACHE_WARMUP_INTERVAL=0: solo al arrancar; un solo worker a la vez vía Redis)
+from cache_warmup import cache_warmer
+from performance_optimizer import performance_optimizer
+
+@app.on_event("startup")
+async def warm_up_cache():
+    if os.getenv("CACHE_WARMUP_ENABLED", "false").lower() == "true":
+        cache_warmer.start(interval=float(os.getenv("CACHE_WARMUP_INTERVAL", "3600")),
+                           redis_client=performance_optimizer.redis_client)
+
+# Muestreo de CPU, memoria, red y proceso en segundo plano (SYSTEM_METRICS_INTERVAL en segundos)
+from monitoring_analytics_system import metrics_dashboard
+
+@app.on_event("startup")
+async def start_system_metrics():
+    metrics_dashboard.system_sampler.start(interval=float(os.getenv("SYSTEM_METRICS_INTERVAL", "5")))
+
+# Cerrar clientes HTTP compartidos y la conexión del cache al apagar
+from audio_analyzer import analyzer as audio_analyzer
+from audio_download import close_http_clients
+from prometheus_exporter import prometheus_exporter
+
+@app.on_event("shutdown")
+async def shutdown_resources():
+    # Tareas de fondo, clientes HTTP, Redis y el pool de procesos del
+    # análisis de audio (sus workers colgados se terminan tras la gracia)
+    prometheus_exporter.mark_process_dead()
+    await cache_warmer.stop()
+    await metrics_dashboard.system_sampler.stop()
+    await close_http_clients()
+    await performance_optimizer.close()
+    await asyncio.to_thread(audio_analyzer.shutdown_pool)
 
 # Importar el procesador del CODEX
 from codex_processor import init_codex_processor
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+🗃️ Metric Store - Almacenamiento columnar de métricas recientes
+Sustituye la deque de dicts de MetricsDashboard: cada punto ocupaba un
+dict con nombre, valor, timestamp y otro dict de tags (cientos de bytes
+y trabajo para el GC). Aquí cada métrica es un ring buffer que crece por
+duplicación hasta su capacidad (las métricas poco usadas ocupan poco):
+  - timestamps y valores en array('d'), ids de tags en array('I')
+  - los conjuntos de tags se internan una vez y se referencian por id
+  - las ventanas de tiempo se localizan con búsqueda binaria
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Id reservado para "sin tags" y para tag sets por encima del límite
+NO_TAGS = 0
+# Puntos reservados al crear un buffer; se duplica al llenarse
+INITIAL_SLOTS = 64
+
+
+class TagInterner:
+    """Tabla tag set -> id compartida por todas las métricas"""
+
+    def __init__(self, max_tag_sets: int = 10000):
+        self.max_tag_sets = max_tag_sets
+        self._ids: Dict[Tuple[Tuple[str, str], ...], int] = {(): NO_TAGS}
+        self._tag_sets: List[Dict[str, str]] = [{}]
+        self._lock = threading.Lock()
+        self.overflow = 0
+
+    def intern(self, tags: Optional[Dict[str, str]]) -> int:
+        if not tags:
+            return NO_TAGS
+        key = tuple(sorted(tags.items()))
+        tag_id = self._ids.get(key)
+        if tag_id is not None:
+            return tag_id
+        with self._lock:
+            tag_id = self._ids.get(key)
+            if tag_id is None:
+                if len(self._tag_sets) >= self.max_tag_sets:
+                    # Tags de cardinalidad alta (ids, timestamps): no se guardan
+                    self.overflow += 1
+                    return NO_TAGS
+                tag_id = len(self._tag_sets)
+                self._tag_sets.append(dict(key))
+                self._ids[key] = tag_id
+            return tag_id
+
+    def lookup(self, tag_id: int) -> Dict[str, str]:
+        return self._tag_sets[tag_id]
+
+    def matching(self, tags: Dict[str, str]) -> set:
+        """Ids de los tag sets que contienen todos los tags pedidos"""
+        items = tags.items()
+        return {tag_id for tag_id, tag_set in enumerate(self._tag_sets) if items <= tag_set.items()}
+
+    def __len__(self) -> int:
+        return len(self._tag_sets)
+
+
+class _RingView:
+    """Índice lógico (del más antiguo al más nuevo) sobre el buffer circular, para bisect"""
+
+    def __init__(self, buffer: "MetricRingBuffer"):
+        self.buffer = buffer
+
+    def __len__(self) -> int:
+        return self.buffer.size
+
+    def __getitem__(self, index: int) -> float:
+        return self.buffer.timestamps[(self.buffer.start + index) % self.buffer.allocated]
+
+
+class MetricRingBuffer:
+    """
+    Últimos `capacity` puntos de una métrica, ordenados por timestamp.
+    20 bytes por punto (dos doubles y un uint32) frente a ~400 de un dict con tags.
+    Las columnas empiezan con INITIAL_SLOTS puntos y se duplican hasta
+    `capacity`; solo entonces empieza a sobrescribir los más antiguos.
+    Se escribe desde varios hilos (executors, sampler): escritura, crecimiento
+    y lectura van bajo un lock, y ninguna vista numpy de una columna
+    sobrevive fuera de él (array.frombytes falla con vistas exportadas).
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.allocated = min(INITIAL_SLOTS, capacity)
+        self.timestamps = array('d', bytes(8 * self.allocated))
+        self.values = array('d', bytes(8 * self.allocated))
+        self.tag_ids = array('I', bytes(4 * self.allocated))
+        self.start = 0
+        self.size = 0
+        self._last_timestamp = float('-inf')
+        self._lock = threading.Lock()
+
+    def append(self, value: float, timestamp: float, tag_id: int = NO_TAGS):
+        with self._lock:
+            # Un reloj que retrocede no debe romper el orden de la búsqueda binaria
+            if timestamp < self._last_timestamp:
+                timestamp = self._last_timestamp
+            self._last_timestamp = timestamp
+
+            if self.size == self.allocated < self.capacity:
+                self._grow()
+            index = (self.start + self.size) % self.allocated
+            self.timestamps[index] = timestamp
+            self.values[index] = value
+            self.tag_ids[index] = tag_id
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self.start = (self.start + 1) % self.allocated
+
+    def _grow(self):
+        """Duplicar las columnas; antes de llenarse el buffer no ha dado la vuelta (start == 0)"""
+        extra = min(self.allocated, self.capacity - self.allocated)
+        self.timestamps.frombytes(bytes(8 * extra))
+        self.values.frombytes(bytes(8 * extra))
+        self.tag_ids.frombytes(bytes(4 * extra))
+        self.allocated += extra
+
+    def __len__(self) -> int:
+        return self.size
+
+    def window_start(self, since: float) -> int:
+        """Primer índice lógico con timestamp >= since (O(log n))"""
+        return bisect_left(_RingView(self), since)
+
+    def window(self, since: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (timestamps, valores, tag_ids) con timestamp >= since, del más
+        antiguo al más nuevo. Copia solo la ventana, en a lo sumo dos tramos.
+        """
+        with self._lock:
+            first = self.window_start(since)
+            begin = (self.start + first) % self.allocated
+            count = self.size - first
+            return (
+                self._copy_range(self.timestamps, np.float64, begin, count),
+                self._copy_range(self.values, np.float64, begin, count),
+                self._copy_range(self.tag_ids, np.uint32, begin, count),
+            )
+
+    def _copy_range(self, column: array, dtype, begin: int, count: int) -> np.ndarray:
+        """Copia de `count` slots desde `begin`; la vista sobre la columna muere aquí"""
+        data = np.frombuffer(column, dtype=dtype)
+        end = begin + count
+        if end <= self.allocated:
+            return data[begin:end].copy()
+        return np.concatenate((data[begin:], data[:end - self.allocated]))
+
+    @property
+    def oldest_timestamp(self) -> Optional[float]:
+        with self._lock:
+            return self.timestamps[self.start] if self.size else None
+
+    @property
+    def nbytes(self) -> int:
+        return self.allocated * (self.timestamps.itemsize + self.values.itemsize + self.tag_ids.itemsize)
+
+    def points(self, since: float, tag_interner: TagInterner, tags: Optional[Dict[str, str]] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Puntos de la ventana como dicts (value, timestamp, tags), filtrando por tags"""
+        timestamps, values, tag_ids = self.window(since)
+        if tags:
+            mask = np.isin(tag_ids, list(tag_interner.matching(tags)))
+            timestamps, values, tag_ids = timestamps[mask], values[mask], tag_ids[mask]
+        if limit is not None:
+            # [-0:] devolvería la ventana entera: limit=0 no devuelve ningún punto
+            first = max(len(timestamps) - max(limit, 0), 0)
+            timestamps, values, tag_ids = timestamps[first:], values[first:], tag_ids[first:]
+        return [
+            {"value": value, "timestamp": timestamp, "tags": dict(tag_interner.lookup(tag_id))}
+            for timestamp, value, tag_id in zip(timestamps.tolist(), values.tolist(), tag_ids.tolist())
+        ]
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+🧠 Model Registry - Modelos residentes en memoria compartidos entre servicios
+Los modelos se cargan una vez por proceso y se reutilizan:
+  - conteo de referencias: un modelo en uso nunca se expulsa
+  - presupuesto de memoria con expulsión LRU de los modelos sin uso
+  - pesos safetensors abiertos con mmap (los tensores se leen bajo demanda)
+  - precarga (warm-up) al arrancar de los modelos configurados
+Uso:
+    model_registry.register("bark", loader=build_bark, weights_path="models/bark.safetensors")
+    async with model_registry.lease("bark") as model:
+        ...
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SafetensorsWeights:
+    """
+    Vista perezosa de un archivo safetensors: el archivo se mapea en memoria
+    y cada tensor se materializa al pedirlo
+    """
+
+    def __init__(self, path: str, framework: str = "pt", device: str = "cpu"):
+        from safetensors import safe_open
+
+        self.path = path
+        self._handle = safe_open(path, framework=framework, device=device)
+
+    def keys(self) -> List[str]:
+        return list(self._handle.keys())
+
+    def __getitem__(self, name: str) -> Any:
+        return self._handle.get_tensor(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def metadata(self) -> Optional[Dict[str, str]]:
+        return self._handle.metadata()
+
+
+def estimate_model_bytes(model: Any, weights_path: Optional[str] = None) -> int:
+    """Estimación de memoria de un modelo para el presupuesto"""
+    if weights_path and os.path.exists(weights_path):
+        return os.path.getsize(weights_path)
+    if hasattr(model, "parameters"):
+        # Módulos de torch: parámetros + buffers
+        tensors = list(model.parameters()) + list(getattr(model, "buffers", lambda: [])())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if hasattr(model, "nbytes"):
+        return int(model.nbytes)
+    return sys.getsizeof(model)
+
+
+class _ResidentModel:
+    def __init__(self, model: Any, size_bytes: int, load_seconds: float):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.refcount = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """Registro de modelos residentes con referencia contada y presupuesto de memoria"""
+
+    def __init__(self, memory_budget_bytes: int = 4 * 1024 * 1024 * 1024,
+                 warm_up_models: Iterable[str] = ()):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.warm_up_models = list(warm_up_models)
+
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._resident: "OrderedDict[str, _ResidentModel]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+
+        # Estadísticas
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+
+    def register(self, name: str, loader: Optional[Callable] = None, weights_path: Optional[str] = None,
+                 framework: str = "pt", memory_bytes: Optional[int] = None, warm_up: bool = False):
+        """
+        Registrar cómo cargar un modelo.
+        loader() construye el modelo; con weights_path recibe los pesos
+        safetensors mapeados (loader(weights)). Sin loader, el modelo son
+        los propios pesos.
+        """
+        if loader is None and weights_path is None:
+            raise ValueError(f"Modelo {name}: se necesita loader o weights_path")
+        self._specs[name] = {
+            "loader": loader,
+            "weights_path": str(weights_path) if weights_path else None,
+            "framework": framework,
+            "memory_bytes": memory_bytes,
+            "warm_up": warm_up
+        }
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._specs
+
+    def is_available(self, name: str) -> bool:
+        """Registrado y con sus pesos presentes en disco"""
+        spec = self._specs.get(name)
+        if spec is None:
+            return False
+        return spec["weights_path"] is None or os.path.exists(spec["weights_path"])
+
+    async def get(self, name: str) -> Any:
+        """
+        Obtener el modelo (cargándolo si hace falta) y sumar una referencia.
+        Cada get debe ir seguido de release(name); ver lease().
+        """
+        with self._lock:
+            resident = self._resident.get(name)
+            if resident is not None:
+                resident.refcount += 1
+                resident.last_used = time.time()
+                self._resident.move_to_end(name)
+                self.hits += 1
+                return resident.model
+
+        if name not in self._specs:
+            raise KeyError(f"Modelo no registrado: {name}")
+
+        # Una sola carga por modelo aunque lo pidan varias tareas a la vez
+        loading = self._loading.get(name)
+        if loading is None:
+            loading = asyncio.get_running_loop().create_future()
+            self._loading[name] = loading
+            try:
+                resident = await asyncio.get_running_loop().run_in_executor(None, self._load, name)
+                loading.set_result(resident)
+            except Exception as e:
+                loading.set_exception(e)
+                loading.exception()
+                raise
+            finally:
+                self._loading.pop(name, None)
+        else:
+            resident = await asyncio.shield(loading)
+
+        with self._lock:
+            if name not in self._resident:
+                self._resident[name] = resident
+                self._resident_bytes += resident.size_bytes
+            resident = self._resident[name]
+            resident.refcount += 1
+            resident.last_used = time.time()
+            self._resident.move_to_end(name)
+            self._evict_over_budget()
+            return resident.model
+
+    def release(self, name: str):
+        """Devolver una referencia obtenida con get"""
+        with self._lock:
+            resident = self._resident.get(name)
+            if resident is None or resident.refcount == 0:
+                logger.warning(f"release sin get previo: {name}")
+                return
+            resident.refcount -= 1
+            self._evict_over_budget()
+
+    @asynccontextmanager
+    async def lease(self, name: str):
+        """async with model_registry.lease(name) as model: ..."""
+        model = await self.get(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Precargar modelos (secuencialmente, para no disparar picos de memoria)"""
+        if names is None:
+            names = self.warm_up_models + [name for name, spec in self._specs.items()
+                                           if spec["warm_up"] and name not in self.warm_up_models]
+        status = {}
+        for name in names:
+            if not self.is_available(name):
+                logger.warning(f"Warm-up omitido, modelo no disponible: {name}")
+                status[name] = "unavailable"
+                continue
+            try:
+                await self.get(name)
+                self.release(name)
+                status[name] = "loaded"
+            except Exception as e:
+                logger.error(f"Error precargando modelo {name}: {e}")
+                status[name] = "error"
+        return status
+
+    def unload(self, name: str, force: bool = False) -> bool:
+        """Descargar un modelo (solo si no está en uso, salvo force)"""
+        with self._lock:
+            resident = self._resident.get(name)
+            if resident is None or (resident.refcount and not force):
+                return False
+            self._drop(name)
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Modelos residentes, memoria usada y actividad"""
+        with self._lock:
+            return {
+                "registered": sorted(self._specs),
+                "resident": {
+                    name: {
+                        "size_mb": round(resident.size_bytes / 1024 / 1024, 2),
+                        "refcount": resident.refcount,
+                        "load_seconds": round(resident.load_seconds, 3),
+                        "last_used": resident.last_used
+                    }
+                    for name, resident in self._resident.items()
+                },
+                "resident_mb": round(self._resident_bytes / 1024 / 1024, 2),
+                "budget_mb": round(self.memory_budget_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "evictions": self.evictions
+            }
+
+    def _load(self, name: str) -> _ResidentModel:
+        """Cargar el modelo (se ejecuta en un hilo)"""
+        spec = self._specs[name]
+        started = time.perf_counter()
+        try:
+            weights = None
+            if spec["weights_path"]:
+                weights = SafetensorsWeights(spec["weights_path"], spec["framework"])
+            if spec["loader"] is None:
+                model = weights
+            elif weights is not None:
+                model = spec["loader"](weights)
+            else:
+                model = spec["loader"]()
+        except Exception:
+            self.load_failures += 1
+            raise
+
+        elapsed = time.perf_counter() - started
+        size = spec["memory_bytes"] or estimate_model_bytes(model, spec["weights_path"])
+        self.loads += 1
+        logger.info(f"Modelo {name} cargado en {elapsed:.2f}s ({size / 1024 / 1024:.1f} MB)")
+        return _ResidentModel(model, size, elapsed)
+
+    def _evict_over_budget(self):
+        """Expulsar modelos sin referencias, del menos usado al más usado (requiere el lock)"""
+        if self._resident_bytes <= self.memory_budget_bytes:
+            return
+        for name in [name for name, resident in self._resident.items() if resident.refcount == 0]:
+            if self._resident_bytes <= self.memory_budget_bytes:
+                return
+            self._drop(name)
+            self.evictions += 1
+            logger.info(f"Modelo {name} expulsado por presupuesto de memoria")
+        if self._resident_bytes > self.memory_budget_bytes:
+            logger.warning(
+                f"Modelos en uso superan el presupuesto: "
+                f"{self._resident_bytes / 1024 / 1024:.1f} MB > {self.memory_budget_bytes / 1024 / 1024:.1f} MB"
+            )
+
+    def _drop(self, name: str):
+        """Quitar del registro (requiere el lock)"""
+        resident = self._resident.pop(name)
+        self._resident_bytes -= resident.size_bytes
+
+
+# Instancia global compartida por Clone Station, backends de voz y PerformanceOptimizer
+model_registry = ModelRegistry(
+    memory_budget_bytes=int(os.getenv("MODEL_REGISTRY_BUDGET_MB", "4096")) * 1024 * 1024,
+    warm_up_models=[name for name in os.getenv("MODEL_WARMUP", "").split(",") if name]
+)
@@ -8,65 +8,110 @@ Incluye: dashboard de métricas, alertas de rendimiento, logs estructurados, rep
 import asyncio
 import json
 import time
-import psutil
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
-import statistics
+
+from metric_store import MetricRingBuffer, TagInterner
+from prometheus_exporter import prometheus_exporter
+from quantile_sketch import WindowedQuantileSketch
+from system_metrics import SystemMetricsSampler
 
 logger = logging.getLogger(__name__)
 
 class MetricsDashboard:
     """Dashboard de métricas en tiempo real"""
 
-    def __init__(self):
-        self.metrics = defaultdict(lambda: deque(maxlen=1000))
+    def __init__(self, buffer_size: int = 10000):
+        # Últimos valores crudos en ring buffers columnares (tags internados)
+        # y sketches de cuantiles por ventana de tiempo
+        self.buffer_size = buffer_size
+        self.tag_sets = TagInterner()
+        self.metrics = defaultdict(lambda: MetricRingBuffer(self.buffer_size))
+        self.sketches = defaultdict(WindowedQuantileSketch)
+        # Espejo en prometheus_client para /metrics
+        self.exporter = prometheus_exporter
         self.counters = defaultdict(int)
+        # Contadores con tags: nombre -> id de tag set -> valor
+        self.tagged_counters = defaultdict(lambda: defaultdict(int))
         self.gauges = defaultdict(float)
         self.histograms = defaultdict(list)
+        # CPU, memoria, disco, red y proceso muestreados en segundo plano
+        self.system_sampler = SystemMetricsSampler(self)
 
     def record_metric(self, metric_name: str, value: float, tags: Dict[str, str] = None):
         """Registrar métrica"""
-        metric_data = {
-            "name": metric_name,
-            "value": value,
-            "timestamp": time.time(),
-            "tags": tags or {}
-        }
-
-        self.metrics[metric_name].append(metric_data)
-
-    def increment_counter(self, counter_name: str, amount: int = 1):
-        """Incrementar contador"""
+        timestamp = time.time()
+        self.metrics[metric_name].append(value, timestamp, self.tag_sets.intern(tags))
+        self.sketches[metric_name].add(value, timestamp)
+        self.exporter.observe(metric_name, value, tags)
+
+    def record_metrics(self, values: Dict[str, float], tags: Dict[str, str] = None):
+        """Registrar varias métricas con los mismos tags (un solo timestamp e interning)"""
+        timestamp = time.time()
+        tag_id = self.tag_sets.intern(tags)
+        for metric_name, value in values.items():
+            self.metrics[metric_name].append(value, timestamp, tag_id)
+            self.sketches[metric_name].add(value, timestamp)
+            self.exporter.observe(metric_name, value, tags)
+
+    def increment_counter(self, counter_name: str, amount: int = 1, tags: Dict[str, str] = None):
+        """Incrementar contador (con tags: también el desglose por tag set)"""
         self.counters[counter_name] += amount
+        if tags:
+            self.tagged_counters[counter_name][self.tag_sets.intern(tags)] += amount
+        self.exporter.increment(counter_name, amount, tags)
+
+    def get_counter(self, counter_name: str, tags: Dict[str, str] = None) -> int:
+        """Valor del contador; con tags, solo los incrementos que los incluyen"""
+        if not tags:
+            return self.counters.get(counter_name, 0)
+        breakdown = self.tagged_counters.get(counter_name, {})
+        return sum(breakdown.get(tag_id, 0) for tag_id in self.tag_sets.matching(tags))
+
+    def get_counter_breakdown(self, counter_name: str) -> List[Dict]:
+        """Valor del contador por tag set"""
+        return [
+            {"tags": dict(self.tag_sets.lookup(tag_id)), "value": value}
+            for tag_id, value in self.tagged_counters.get(counter_name, {}).items()
+        ]
 
     def set_gauge(self, gauge_name: str, value: float):
         """Establecer gauge"""
         self.gauges[gauge_name] = value
+        self.exporter.set_gauge(gauge_name, value)
 
     def record_histogram(self, histogram_name: str, value: float):
         """Registrar valor en histograma"""
         self.histograms[histogram_name].append(value)
+        self.exporter.observe(histogram_name, value)
 
         # Mantener solo últimos 1000 valores
         if len(self.histograms[histogram_name]) > 1000:
             self.histograms[histogram_name] = self.histograms[histogram_name][-1000:]
 
     def get_metric_stats(self, metric_name: str, time_window: int = 3600) -> Dict:
-        """Obtener estadísticas de métrica"""
-        current_time = time.time()
-        cutoff_time = current_time - time_window
-
-        # Filtrar métricas en ventana de tiempo
-        recent_metrics = [
-            m for m in self.metrics[metric_name]
-            if m["timestamp"] >= cutoff_time
-        ]
+        """
+        Obtener estadísticas de métrica.
+        count, min, max y avg son exactos; los percentiles salen del sketch
+        (error relativo del 1%) y la ventana se redondea al intervalo del sketch.
+        covered_seconds es la ventana realmente cubierta: no pasa de
+        retention_seconds aunque se pida más.
+        """
+        sketch = self.sketches.get(metric_name)
+        now = time.time()
+        window, covered_start = sketch.window_span(time_window, now) if sketch else (None, None)
+        coverage = {
+            "window_seconds": time_window,
+            "covered_seconds": round(now - covered_start, 3) if covered_start is not None else 0,
+            "retention_seconds": sketch.retention if sketch else None
+        }
 
-        if not recent_metrics:
+        if not window or not window.count:
             return {
                 "metric": metric_name,
+                **coverage,
                 "count": 0,
                 "min": 0,
                 "max": 0,
@@ -76,63 +121,53 @@ class MetricsDashboard:
                 "p99": 0
             }
 
-        values = [m["value"] for m in recent_metrics]
+        quantiles = window.quantiles([0.5, 0.95, 0.99])
 
         return {
             "metric": metric_name,
-            "count": len(values),
-            "min": min(values),
-            "max": max(values),
-            "avg": statistics.mean(values),
-            "median": statistics.median(values),
-            "p95": self._percentile(values, 95),
-            "p99": self._percentile(values, 99)
+            **coverage,
+            "count": window.count,
+            "min": window.min,
+            "max": window.max,
+            "avg": window.avg,
+            "median": quantiles[0.5],
+            "p95": quantiles[0.95],
+            "p99": quantiles[0.99]
         }
 
-    def _percentile(self, values: List[float], percentile: int) -> float:
-        """Calcular percentil"""
-        if not values:
-            return 0
-        sorted_values = sorted(values)
-        index = int(len(sorted_values) * (percentile / 100))
-        return sorted_values[min(index, len(sorted_values) - 1)]
+    def get_metric_points(self, metric_name: str, time_window: int = 3600,
+                          tags: Dict[str, str] = None, limit: int = 1000) -> List[Dict]:
+        """Últimos puntos crudos de la ventana (búsqueda binaria sobre el ring buffer)"""
+        buffer = self.metrics.get(metric_name)
+        if buffer is None:
+            return []
+        points = buffer.points(time.time() - time_window, self.tag_sets, tags, limit)
+        for point in points:
+            point["name"] = metric_name
+        return points
 
     def get_all_metrics(self) -> Dict:
         """Obtener todas las métricas"""
         return {
             "counters": dict(self.counters),
+            "tagged_counters": {
+                name: self.get_counter_breakdown(name)
+                for name in list(self.tagged_counters.keys())
+            },
             "gauges": dict(self.gauges),
             "metrics": {
                 name: self.get_metric_stats(name)
-                for name in self.metrics.keys()
+                for name in list(self.sketches.keys())
             }
         }
 
     def get_system_metrics(self) -> Dict:
-        """Obtener métricas del sistema"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        """Obtener métricas del sistema (última muestra, sin bloquear)"""
+        return self.system_sampler.get_latest()
 
-        return {
-            "cpu": {
-                "percent": cpu_percent,
-                "count": psutil.cpu_count()
-            },
-            "memory": {
-                "total": memory.total,
-                "available": memory.available,
-                "percent": memory.percent,
-                "used": memory.used
-            },
-            "disk": {
-                "total": disk.total,
-                "used": disk.used,
-                "free": disk.free,
-                "percent": disk.percent
-            },
-            "timestamp": time.time()
-        }
+    def get_system_history(self, time_window: int = 300) -> Dict:
+        """Histórico reciente de métricas del sistema para sparklines"""
+        return self.system_sampler.get_history(time_window)
 
 
 class PerformanceAlerts:
@@ -384,7 +419,7 @@ class AutomatedReports:
                 "total_requests": metrics["counters"].get("total_requests", 0),
                 "total_errors": metrics["counters"].get("total_errors", 0),
                 "error_rate": log_stats.get("error_rate", 0),
-                "avg_response_time": metrics["metrics"].get("response_time", {}).get("avg", 0)
+                "avg_response_time": metrics["metrics"].get("http.request.duration_ms", {}).get("avg", 0)
             },
             "system_health": {
                 "cpu_usage": system_metrics["cpu"]["percent"],
@@ -4,9 +4,10 @@
 Endpoints para sistema de monitoreo y analytics
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
+import asyncio
 import logging
 from monitoring_analytics_system import (
     metrics_dashboard,
@@ -15,10 +16,35 @@ from monitoring_analytics_system import (
     automated_reports,
     health_check_system
 )
+from analysis_cache import analysis_cache
+from cache_warmup import cache_warmer
+from performance_optimizer import performance_optimizer
+from prometheus_exporter import prometheus_exporter
+from user_accounts import get_user_system
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/monitoring", tags=["Monitoring & Analytics"])
+# /metrics va en la raíz, donde lo buscan los scrapers de Prometheus
+metrics_router = APIRouter(tags=["Monitoring & Analytics"])
+user_system = get_user_system()
+
+
+def verify_admin_token(request: Request):
+    """Verificar que el token Bearer pertenece a un admin (acciones que gastan cuota de APIs)"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        raise HTTPException(status_code=401, detail="Token requerido")
+
+    token_result = user_system.verify_session_token(auth_header.split(' ')[1])
+    if not token_result['valid']:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    user = user_system.get_user_by_id(token_result['user_id'])
+    if not user or user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Acceso denegado - Solo administradores")
+
+    return user
 
 # ============= MODELOS DE DATOS =============
 
@@ -109,6 +135,17 @@ async def get_metric_stats(metric_name: str, time_window: int = 3600):
         logger.error(f"Error getting metric stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/metrics/points/{metric_name}")
+async def get_metric_points(metric_name: str, time_window: int = 3600, limit: int = 1000):
+    """Obtener los últimos valores crudos de una métrica"""
+    try:
+        points = metrics_dashboard.get_metric_points(metric_name, time_window, limit=limit)
+        return {"success": True, "points": points}
+    except Exception as e:
+        logger.error(f"Error getting metric points: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/metrics/all")
 async def get_all_metrics():
     """Obtener todas las métricas"""
@@ -119,6 +156,20 @@ async def get_all_metrics():
         logger.error(f"Error getting all metrics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@metrics_router.get("/metrics")
+async def prometheus_metrics(request: Request):
+    """Exposición en formato Prometheus/OpenMetrics (agrega todos los workers en modo multiproceso)"""
+    if not prometheus_exporter.enabled:
+        raise HTTPException(status_code=503, detail="prometheus_client no está instalado")
+    try:
+        # En modo multiproceso se leen los ficheros de todos los workers: fuera del event loop
+        body, content_type = await asyncio.to_thread(prometheus_exporter.render, request.headers.get("accept"))
+        return Response(content=body, media_type=content_type)
+    except Exception as e:
+        logger.error(f"Error rendering Prometheus metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/metrics/system")
 async def get_system_metrics():
     """Obtener métricas del sistema"""
@@ -130,6 +181,86 @@ async def get_system_metrics():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics/system/history")
+async def get_system_metrics_history(time_window: int = 300):
+    """Histórico de métricas del sistema (CPU, memoria, red, proceso, lag del event loop)"""
+    try:
+        history = metrics_dashboard.get_system_history(time_window)
+        return {
+            "success": True,
+            "history": history,
+            "sampler": metrics_dashboard.system_sampler.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error getting system metrics history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/analysis")
+async def get_analysis_cache_stats():
+    """Obtener estadísticas del cache de análisis de audio"""
+    try:
+        return {"success": True, "cache": analysis_cache.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting analysis cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/functions")
+async def get_function_cache_stats():
+    """Obtener estadísticas del cache de IA por función decorada"""
+    try:
+        return {"success": True, "functions": performance_optimizer.get_function_cache_stats()}
+    except Exception as e:
+        logger.error(f"Error getting function cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/memory")
+async def get_cache_memory(refresh: bool = False):
+    """Estimar la memoria de Redis por namespace del cache (muestreo con SCAN)"""
+    try:
+        return {"success": True, "memory": await performance_optimizer.sample_cache_memory(refresh)}
+    except Exception as e:
+        logger.error(f"Error sampling cache memory: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/warmup")
+async def get_cache_warmup_stats():
+    """Obtener el top de prompts recientes y el estado de la precarga del cache"""
+    try:
+        return {"success": True, "warmup": cache_warmer.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting cache warm-up stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cache/warmup")
+async def run_cache_warmup(limit: Optional[int] = None, admin=Depends(verify_admin_token)):
+    """Lanzar una pasada de precarga del cache (solo administradores: llama a las APIs externas)"""
+    try:
+        return {"success": True, "run": await cache_warmer.warm_up(limit)}
+    except Exception as e:
+        logger.error(f"Error running cache warm-up: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/audio-analysis/stages")
+async def get_audio_analysis_stage_stats(time_window: int = 3600):
+    """Obtener estadísticas por etapa de los análisis de audio perfilados"""
+    try:
+        stages = {
+            name[len("audio_analysis."):]: metrics_dashboard.get_metric_stats(name, time_window)
+            for name in list(metrics_dashboard.metrics.keys())
+            if name.startswith("audio_analysis.")
+        }
+        return {"success": True, "stages": stages}
+    except Exception as e:
+        logger.error(f"Error getting audio analysis stage stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============= ALERTS ENDPOINTS =============
 
 @router.post("/alerts/add-rule")
@@ -344,6 +475,7 @@ async def get_dashboard_data():
                 },
                 "logs": log_stats,
                 "health": health_results,
+                "analysis_cache": analysis_cache.get_stats(),
                 "timestamp": system_metrics["timestamp"]
             }
         }
@@ -7,33 +7,342 @@ Incluye: cache inteligente, procesamiento paralelo, compresión de audio, lazy l
 
 import asyncio
 import hashlib
+import importlib
 import json
+import multiprocessing
+import os
 import time
-import redis
-import pickle
-from typing import Dict, List, Optional, Any, Callable
+import threading
+import uuid
+import redis.asyncio as aioredis
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Sequence, Tuple
 import logging
 import functools
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import gzip
-import io
-import base64
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from audio_codec import AudioCompressionStats, decode_audio, encode_audio, encode_preview, store_uncompressed
+from cache_codec import CacheCodec
+from cache_keys import CACHE_KEY_PREFIX, CACHE_KEY_VERSION, build_cache_key, canonicalize, key_namespace
+from cache_stats import FunctionCacheStats, RedisMemorySampler
+from model_registry import model_registry
+from process_pools import shutdown_executor
 
 logger = logging.getLogger(__name__)
 
+# Canal pub/sub para invalidar el nivel local en todos los workers
+INVALIDATION_CHANNEL = "son1k:cache:invalidate"
+
+# Libera el lock distribuido solo si sigue siendo nuestro
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class CachedUpstreamError(RuntimeError):
+    """Fallo upstream servido desde el cache negativo"""
+
+
+class LocalCacheTier:
+    """
+    Nivel de cache en memoria del proceso (LRU + TTL) delante de Redis.
+    Guarda los bytes serializados, no el objeto, para que cada acierto
+    devuelva una copia independiente igual que una lectura de Redis.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, max_ttl: int = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # TTL máximo local: acota la incoherencia si se pierde una invalidación
+        self.max_ttl = max_ttl
+
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Buscar payload vigente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, key: str, payload: bytes, ttl: Optional[int] = None):
+        """Guardar payload respetando límites de entradas y bytes"""
+        if len(payload) > self.max_bytes:
+            return
+        ttl = min(ttl, self.max_ttl) if ttl else self.max_ttl
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (payload, time.monotonic() + ttl)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Eliminar una clave (invalidación local o remota)"""
+        with self._lock:
+            removed = self._remove(key)
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def clear(self):
+        """Vaciar el nivel local"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del nivel local"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate_percent': round(self.hits / total * 100, 2) if total else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+    def get_namespace_stats(self) -> Dict[str, Dict[str, int]]:
+        """Entradas y bytes del nivel local por namespace de clave"""
+        with self._lock:
+            namespaces: Dict[str, Dict[str, int]] = {}
+            for key, (payload, _) in self._entries.items():
+                stats = namespaces.setdefault(key_namespace(key), {'entries': 0, 'bytes': 0})
+                stats['entries'] += 1
+                stats['bytes'] += len(payload)
+            return namespaces
+
+    def _remove(self, key: str) -> bool:
+        """Quitar entrada (requiere el lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[0])
+        return True
+
+
+class ExecutorQueueFull(RuntimeError):
+    """La cola del pool está llena (backpressure hacia el llamador)"""
+
+
+class ExecutorLane:
+    """
+    Un pool (hilos o procesos) con concurrencia limitada a sus workers,
+    cola de espera acotada, tiempo límite por tarea y métricas de uso.
+    """
+
+    def __init__(self, name: str, executor_factory: Callable[[], Executor], max_workers: int,
+                 max_queue: int = 64, recycle_on_timeout: bool = False):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        # Un proceso ocupado no se puede interrumpir: se recicla el pool
+        self.recycle_on_timeout = recycle_on_timeout
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Métricas
+        self.created_at = time.monotonic()
+        self.active = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.recycled = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        """Pool subyacente (se crea al primer uso)"""
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Ejecuta func en el pool esperando turno si hay cola"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorQueueFull(f"Cola del pool {self.name} llena ({self.max_queue})")
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.submitted += 1
+        self.active += 1
+        started = time.monotonic()
+        try:
+            call = functools.partial(func, *args, **kwargs) if kwargs else functools.partial(func, *args)
+            future = asyncio.get_running_loop().run_in_executor(self.executor, call)
+            result = await asyncio.wait_for(future, timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            # wait_for cancela la tarea si aún no empezó; si ya corre, se descarta su resultado
+            self.timed_out += 1
+            logger.warning(f"Task in {self.name} pool exceeded {timeout}s")
+            if self.recycle_on_timeout:
+                self.recycle(grace=timeout)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.busy_seconds += time.monotonic() - started
+            self.active -= 1
+            self._slots.release()
+
+    def recycle(self, grace: Optional[float] = None):
+        """
+        Descarta el pool actual. Las tareas en curso tienen `grace` segundos
+        para terminar; en un pool de procesos, los workers que sigan vivos
+        (el colgado incluido) se terminan. Los hilos no se pueden terminar.
+        """
+        if self._executor is not None:
+            shutdown_executor(self._executor, grace=grace or 0.0)
+            self._executor = None
+            self.recycled += 1
+
+    def shutdown(self, wait: bool = True, grace: float = 5.0):
+        if self._executor is not None:
+            if wait:
+                self._executor.shutdown(wait=True)
+            else:
+                shutdown_executor(self._executor, grace=grace)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de uso del pool"""
+        uptime = time.monotonic() - self.created_at
+        return {
+            'workers': self.max_workers,
+            'active': self.active,
+            'queued': self.queued,
+            'max_queue': self.max_queue,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'rejected': self.rejected,
+            'recycled': self.recycled,
+            'utilization_percent': round(
+                min(self.busy_seconds / (self.max_workers * uptime), 1.0) * 100, 2
+            ) if uptime > 0 else 0,
+            'avg_task_ms': round(self.busy_seconds / self.submitted * 1000, 2) if self.submitted else 0
+        }
+
+
+def _run_unwrapped(module_name: str, qualname: str, args: tuple, kwargs: dict) -> Any:
+    """
+    Ejecuta en un proceso worker la función original de un decorador
+    parallel_process (la decorada no se puede serializar por referencia)
+    """
+    target = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    target = getattr(target, "__wrapped__", target)
+    return target(*args, **kwargs)
+
+
 class PerformanceOptimizer:
     """Sistema completo de optimización de rendimiento"""
 
-    def __init__(self, redis_url: str = "redis://localhost:6379", max_workers: int = 4):
-        self.redis_client = redis.from_url(redis_url) if redis_url else None
+    def __init__(self, redis_url: str = "redis://localhost:6379", max_workers: int = 4,
+                 process_workers: Optional[int] = None, max_queue: int = 64,
+                 local_cache_entries: int = 1024, local_cache_bytes: int = 64 * 1024 * 1024,
+                 local_cache_ttl: int = 60, distributed_lock: bool = False,
+                 lock_ttl: int = 30, lock_wait_timeout: float = 30.0):
+        # Cliente asíncrono: las lecturas de Redis no bloquean el event loop
+        self.redis_client = aioredis.from_url(redis_url) if redis_url else None
+        self.local_cache = LocalCacheTier(local_cache_entries, local_cache_bytes, local_cache_ttl)
+        self.codec = CacheCodec()
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # Dos pools: hilos para I/O y llamadas bloqueantes, procesos para
+        # trabajo CPU-bound (el GIL impide paralelizarlo con hilos)
+        process_workers = process_workers or os.cpu_count() or 1
+        self.thread_lane = ExecutorLane(
+            "thread", lambda: ThreadPoolExecutor(max_workers=max_workers),
+            max_workers, max_queue
+        )
+        self.process_lane = ExecutorLane(
+            "process", lambda: ProcessPoolExecutor(
+                max_workers=process_workers,
+                # spawn evita heredar hilos y event loop del servidor
+                mp_context=multiprocessing.get_context("spawn")
+            ),
+            process_workers, max_queue, recycle_on_timeout=True
+        )
+        self.executor = self.thread_lane.executor
+
+        # Namespace de versión de las claves: cambiarlo invalida todo el cache
+        self.cache_key_version = CACHE_KEY_VERSION
+
+        # Invalidación entre workers vía pub/sub
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+
+        # Single-flight: cálculos en curso por clave de cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Lock en Redis para coalescer también entre workers
+        self.distributed_lock = distributed_lock
+        self.lock_ttl = lock_ttl
+        self.lock_wait_timeout = lock_wait_timeout
 
         # Estadísticas de rendimiento
         self.cache_hits = 0
         self.cache_misses = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.cache_errors = 0
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.remote_coalesced_calls = 0
+        self.lock_wait_timeouts = 0
         self.parallel_tasks = 0
+        # Por función decorada y memoria de Redis por namespace (ver cache_stats)
+        self.function_stats = FunctionCacheStats()
+        self.memory_sampler = RedisMemorySampler(self.redis_client) if self.redis_client else None
+        # Media móvil del ratio de compresión de audio (ver audio_compression)
         self.compression_ratio = 0.0
+        self.audio_compression = AudioCompressionStats()
 
         # Configuración de cache
         self.cache_ttl = {
@@ -43,107 +352,455 @@ class PerformanceOptimizer:
             'analytics': 900,    # 15 minutos
         }
 
+        # Políticas por ttl_key: cache_ttl es el soft TTL; stale_ttl amplía el
+        # hard TTL sirviendo el valor caducado mientras se refresca;
+        # negative_ttl cachea fallos upstream (excepción o None)
+        self.cache_policies = {
+            'ai_results': {'stale_ttl': 600, 'negative_ttl': 30},
+            'audio_files': {'stale_ttl': 1800, 'negative_ttl': 60},
+            'user_data': {'stale_ttl': 0, 'negative_ttl': 0},
+            'analytics': {'stale_ttl': 300, 'negative_ttl': 0},
+        }
+        self.policy_stats: Dict[str, Dict[str, int]] = {}
+        self._refresh_tasks: set = set()
+
     def _generate_cache_key(self, func_name: str, *args, **kwargs) -> str:
         """Genera una clave única para el cache basada en función y parámetros"""
-        # Crear una representación única de los parámetros
-        params_str = json.dumps({
+        # Crear una representación canónica de los parámetros (ver cache_keys)
+        params_str = json.dumps(canonicalize({
             'args': args,
             'kwargs': kwargs
-        }, sort_keys=True)
+        }), sort_keys=True, ensure_ascii=False)
 
         # Crear hash de la representación
         params_hash = hashlib.sha256(params_str.encode()).hexdigest()[:16]
 
-        return f"son1k:{func_name}:{params_hash}"
+        return f"{CACHE_KEY_PREFIX}:v{self.cache_key_version}:{func_name}:{params_hash}"
+
+    def _function_cache_key(self, func: Callable, args: tuple, kwargs: dict,
+                            key_fields: Optional[Sequence[str]] = None,
+                            case_insensitive: bool = False) -> str:
+        """Clave de una función decorada: sin self, enlazada a la firma y versionada"""
+        return build_cache_key(func, args, kwargs, key_fields=key_fields,
+                               case_insensitive=case_insensitive, version=self.cache_key_version)
 
     async def get_cached_result(self, cache_key: str) -> Optional[Any]:
-        """Obtiene resultado del cache si existe"""
+        """Obtiene resultado del cache: primero nivel local, luego Redis"""
         try:
+            cached_data = self.local_cache.get(cache_key)
+            if cached_data is not None:
+                self.cache_hits += 1
+                return self._deserialize(cached_data)
+
             if not self.redis_client:
+                self.cache_misses += 1
                 return None
 
-            cached_data = self.redis_client.get(cache_key)
+            self._ensure_invalidation_listener()
+            # GET + TTL en un solo round-trip
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                cached_data, ttl = await pipe.get(cache_key).ttl(cache_key).execute()
             if cached_data:
                 self.cache_hits += 1
-                # Descomprimir si es necesario
-                if isinstance(cached_data, bytes):
-                    return pickle.loads(gzip.decompress(cached_data))
-                return pickle.loads(cached_data)
+                self.redis_hits += 1
+                self.local_cache.set(cache_key, cached_data, ttl if ttl > 0 else None)
+                return self._deserialize(cached_data)
             else:
                 self.cache_misses += 1
+                self.redis_misses += 1
                 return None
         except Exception as e:
+            self.cache_errors += 1
             logger.error(f"Error getting cached result: {e}")
             return None
 
     async def set_cached_result(self, cache_key: str, result: Any, ttl: int = None) -> None:
-        """Guarda resultado en cache con compresión"""
+        """Guarda resultado en ambos niveles con compresión"""
         try:
+            ttl = ttl or self.cache_ttl.get('ai_results', 3600)
+            payload, raw_size = self.codec.encode_sized(result)
+            self.function_stats.record_store(cache_key, raw_size, len(payload))
+            self.local_cache.set(cache_key, payload, ttl)
+
             if not self.redis_client:
                 return
 
-            # Comprimir datos grandes
-            pickled_data = pickle.dumps(result)
-
-            if len(pickled_data) > 1000:  # Comprimir si > 1KB
-                compressed_data = gzip.compress(pickled_data)
-                self.redis_client.setex(cache_key, ttl or self.cache_ttl.get('ai_results', 3600), compressed_data)
-            else:
-                self.redis_client.setex(cache_key, ttl or self.cache_ttl.get('ai_results', 3600), pickled_data)
+            self._ensure_invalidation_listener()
+            await self.redis_client.setex(cache_key, ttl, payload)
+            # Las copias locales de otros workers quedan obsoletas
+            await self._publish_invalidation([cache_key])
 
         except Exception as e:
+            self.cache_errors += 1
             logger.error(f"Error setting cached result: {e}")
 
-    def cache_ai_result(self, ttl_key: str = 'ai_results'):
-        """Decorador para cachear resultados de IA"""
+    async def invalidate_cached_result(self, cache_key: str) -> None:
+        """Elimina una clave de Redis y del nivel local de todos los workers"""
+        self.local_cache.invalidate(cache_key)
+        if not self.redis_client:
+            return
+        try:
+            await self.redis_client.delete(cache_key)
+            await self._publish_invalidation([cache_key])
+        except Exception as e:
+            self.cache_errors += 1
+            logger.error(f"Error invalidating cached result: {e}")
+
+    def _serialize(self, result: Any) -> bytes:
+        """Codificar con cabecera de formato (ver cache_codec)"""
+        return self.codec.encode(result)
+
+    def _deserialize(self, cached_data: bytes) -> Any:
+        """Decodificar según la cabecera de formato"""
+        return self.codec.decode(cached_data)
+
+    async def _publish_invalidation(self, keys: List[str]) -> None:
+        message = json.dumps({'origin': self._instance_id, 'keys': keys})
+        await self.redis_client.publish(INVALIDATION_CHANNEL, message)
+
+    def _ensure_invalidation_listener(self) -> None:
+        """Arranca (una vez por event loop) la escucha de invalidaciones"""
+        if self._invalidation_task is None or self._invalidation_task.done():
+            self._invalidation_task = asyncio.get_running_loop().create_task(
+                self._listen_invalidations()
+            )
+
+    async def _listen_invalidations(self) -> None:
+        """Aplica al nivel local las invalidaciones publicadas por otros workers"""
+        reconnecting = False
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnecting:
+                    # Pudimos perder mensajes durante la desconexión
+                    self.local_cache.clear()
+                    reconnecting = False
+                async for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    data = json.loads(message['data'])
+                    if data.get('origin') == self._instance_id:
+                        continue
+                    for key in data.get('keys', []):
+                        self.local_cache.invalidate(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e}")
+                reconnecting = True
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        """Detiene la escucha de invalidaciones y cierra la conexión a Redis"""
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._invalidation_task = None
+        if self.redis_client:
+            await self.redis_client.close()
+
+    def cache_ai_result(self, ttl_key: str = 'ai_results', distributed_lock: Optional[bool] = None,
+                        key_fields: Optional[Sequence[str]] = None, case_insensitive: bool = False):
+        """
+        Decorador para cachear resultados de IA.
+        Las llamadas concurrentes con la misma clave esperan un único cálculo
+        (single-flight); con distributed_lock también entre workers.
+        Según la política de ttl_key, sirve valores caducados mientras se
+        refrescan en segundo plano y cachea brevemente los fallos upstream
+        (excepción o None devuelto por la función).
+        key_fields limita la clave a los argumentos que determinan el
+        resultado ('prompt', 'config.style'); case_insensitive la hace
+        insensible a mayúsculas cuando el resultado no depende de ellas.
+        """
         def decorator(func):
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
-                cache_key = self._generate_cache_key(func.__name__, *args, **kwargs)
+                cache_key = self._function_cache_key(func, args, kwargs, key_fields, case_insensitive)
+                stats = self._policy_counters(ttl_key)
+                use_lock = self.distributed_lock if distributed_lock is None else distributed_lock
+                compute = lambda: func(*args, **kwargs)
+                started = time.perf_counter()
 
                 # Intentar obtener del cache primero
-                cached_result = await self.get_cached_result(cache_key)
-                if cached_result is not None:
-                    logger.info(f"Cache hit for {func.__name__}")
-                    return cached_result
+                entry = self._as_cache_entry(await self.get_cached_result(cache_key))
+                if entry is not None:
+                    if entry['fresh_until'] > time.time():
+                        outcome = 'negative_hits' if self._is_negative(entry) else 'fresh_hits'
+                        if outcome == 'fresh_hits':
+                            logger.info(f"Cache hit for {func.__name__}")
+                        stats[outcome] += 1
+                        self.function_stats.record_lookup(cache_key, outcome, time.perf_counter() - started)
+                        return self._unwrap_entry(entry)
 
-                # Ejecutar función y cachear resultado
-                result = await func(*args, **kwargs)
-                await self.set_cached_result(cache_key, result, self.cache_ttl.get(ttl_key, 3600))
+                    if not self._is_negative(entry):
+                        # Caducado pero dentro del hard TTL: servir y refrescar
+                        stats['stale_hits'] += 1
+                        self.function_stats.record_lookup(cache_key, 'stale_hits', time.perf_counter() - started)
+                        self._schedule_refresh(cache_key, compute, ttl_key, use_lock, entry)
+                        return entry['value']
 
-                return result
+                # Ejecutar función (una sola vez por clave) y cachear resultado
+                stats['misses'] += 1
+                self.function_stats.record_lookup(cache_key, 'misses', time.perf_counter() - started)
+                return await self._single_flight(cache_key, compute, ttl_key, use_lock)
             return wrapper
         return decorator
 
-    async def process_parallel(self, tasks: List[Callable], max_concurrent: int = None) -> List[Any]:
+    def configure_cache_policy(self, ttl_key: str, ttl: Optional[int] = None,
+                               stale_ttl: Optional[int] = None, negative_ttl: Optional[int] = None) -> None:
+        """Ajusta soft TTL, ventana stale y TTL negativo de un ttl_key"""
+        if ttl is not None:
+            self.cache_ttl[ttl_key] = ttl
+        policy = self.cache_policies.setdefault(ttl_key, {'stale_ttl': 0, 'negative_ttl': 0})
+        if stale_ttl is not None:
+            policy['stale_ttl'] = stale_ttl
+        if negative_ttl is not None:
+            policy['negative_ttl'] = negative_ttl
+
+    def _cache_policy(self, ttl_key: str) -> Dict[str, int]:
+        """Política efectiva: soft TTL (cache_ttl) + ventana stale + TTL negativo"""
+        policy = self.cache_policies.get(ttl_key, {})
+        return {
+            'ttl': self.cache_ttl.get(ttl_key, 3600),
+            'stale_ttl': policy.get('stale_ttl', 0),
+            'negative_ttl': policy.get('negative_ttl', 0)
+        }
+
+    def _policy_counters(self, ttl_key: str) -> Dict[str, int]:
+        if ttl_key not in self.policy_stats:
+            self.policy_stats[ttl_key] = {
+                'fresh_hits': 0, 'stale_hits': 0, 'negative_hits': 0, 'misses': 0,
+                'background_refreshes': 0, 'refresh_failures': 0, 'negative_entries': 0
+            }
+        return self.policy_stats[ttl_key]
+
+    def _as_cache_entry(self, cached: Any) -> Optional[Dict[str, Any]]:
+        """Normaliza lo leído del cache (entradas previas al sobre cuentan como frescas)"""
+        if cached is None:
+            return None
+        if isinstance(cached, dict) and cached.get('__son1k_cache__') == 1:
+            return cached
+        return {'__son1k_cache__': 1, 'value': cached, 'error': None,
+                'fresh_until': float('inf'), 'expires_at': float('inf')}
+
+    @staticmethod
+    def _is_negative(entry: Dict[str, Any]) -> bool:
+        return entry['error'] is not None or entry['value'] is None
+
+    @staticmethod
+    def _unwrap_entry(entry: Dict[str, Any]) -> Any:
+        if entry['error'] is not None:
+            raise CachedUpstreamError(entry['error'])
+        return entry['value']
+
+    async def _store_entry(self, cache_key: str, ttl_key: str, value: Any = None,
+                           error: Optional[str] = None) -> None:
+        """Guarda el sobre con soft TTL (fresh_until) y hard TTL (expiración en Redis)"""
+        policy = self._cache_policy(ttl_key)
+        now = time.time()
+        if error is not None or value is None:
+            if not policy['negative_ttl']:
+                return
+            fresh_ttl = hard_ttl = policy['negative_ttl']
+            self._policy_counters(ttl_key)['negative_entries'] += 1
+        else:
+            fresh_ttl = policy['ttl']
+            hard_ttl = policy['ttl'] + policy['stale_ttl']
+
+        entry = {'__son1k_cache__': 1, 'value': value, 'error': error,
+                 'fresh_until': now + fresh_ttl, 'expires_at': now + hard_ttl}
+        await self.set_cached_result(cache_key, entry, hard_ttl)
+
+    def _schedule_refresh(self, cache_key: str, compute: Callable, ttl_key: str,
+                          distributed_lock: bool, stale_entry: Dict[str, Any]) -> None:
+        """Refresco en segundo plano (uno por clave gracias a single-flight)"""
+        if cache_key in self._inflight:
+            return
+        self._policy_counters(ttl_key)['background_refreshes'] += 1
+        task = asyncio.get_running_loop().create_task(
+            self._single_flight(cache_key, compute, ttl_key, distributed_lock, stale_entry)
+        )
+        # Mantener referencia hasta que termine
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _single_flight(self, cache_key: str, compute: Callable, ttl_key: str,
+                             distributed_lock: bool = False,
+                             stale_entry: Optional[Dict[str, Any]] = None) -> Any:
+        """Ejecuta compute una sola vez por clave; el resto de llamadas esperan su resultado"""
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            self.coalesced_calls += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # Se canceló el cálculo original, no esta llamada: reintentar
+                return await self._single_flight(cache_key, compute, ttl_key, distributed_lock, stale_entry)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await self._compute_and_cache(cache_key, compute, ttl_key, distributed_lock, stale_entry)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evitar el aviso de excepción no recuperada si nadie esperaba
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    async def _compute_and_cache(self, cache_key: str, compute: Callable, ttl_key: str,
+                                 distributed_lock: bool,
+                                 stale_entry: Optional[Dict[str, Any]] = None) -> Any:
+        """Llamada upstream protegida opcionalmente por un lock en Redis"""
+        lock_key = f"{cache_key}:lock"
+        token = None
+
+        if distributed_lock and self.redis_client:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await self.redis_client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+            except Exception as e:
+                self.cache_errors += 1
+                logger.error(f"Error acquiring cache lock: {e}")
+                acquired = True
+                token = None
+
+            if not acquired:
+                token = None
+                if stale_entry is not None:
+                    # Otro worker ya está refrescando esta clave
+                    return stale_entry['value']
+                found, entry = await self._wait_for_remote_result(cache_key, lock_key)
+                if found:
+                    self.remote_coalesced_calls += 1
+                    return self._unwrap_entry(entry)
+                # El otro worker falló o tardó demasiado: calcular aquí
+
+        try:
+            self.upstream_calls += 1
+            started = time.perf_counter()
+            try:
+                result = await compute()
+            except Exception as e:
+                self.function_stats.record_upstream(cache_key, time.perf_counter() - started, failed=True)
+                if stale_entry is not None:
+                    return await self._refresh_failed(cache_key, ttl_key, stale_entry, e)
+                await self._store_entry(cache_key, ttl_key, error=f"{type(e).__name__}: {e}")
+                raise
+
+            # None es la forma de señalar un fallo de funciones como _call_qwen_api:
+            # nunca se guarda como acierto, solo como entrada negativa (negative_ttl)
+            self.function_stats.record_upstream(cache_key, time.perf_counter() - started, failed=result is None)
+            if result is None:
+                if stale_entry is not None:
+                    return await self._refresh_failed(cache_key, ttl_key, stale_entry, None)
+                await self._store_entry(cache_key, ttl_key)
+                return None
+            await self._store_entry(cache_key, ttl_key, value=result)
+            return result
+        finally:
+            if token is not None:
+                try:
+                    await self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.error(f"Error releasing cache lock: {e}")
+
+    async def _refresh_failed(self, cache_key: str, ttl_key: str, stale_entry: Dict[str, Any],
+                              error: Optional[Exception]) -> Any:
+        """
+        Un refresco fallido conserva el valor caducado hasta su hard TTL y
+        pospone el siguiente intento negative_ttl segundos
+        """
+        self._policy_counters(ttl_key)['refresh_failures'] += 1
+        logger.warning(f"Background refresh failed for {cache_key}: {error or 'empty result'}")
+
+        now = time.time()
+        remaining = int(stale_entry['expires_at'] - now)
+        backoff = self._cache_policy(ttl_key)['negative_ttl']
+        if remaining > 0 and backoff:
+            entry = dict(stale_entry, fresh_until=min(now + backoff, stale_entry['expires_at']))
+            await self.set_cached_result(cache_key, entry, remaining)
+        return stale_entry['value']
+
+    async def _wait_for_remote_result(self, cache_key: str, lock_key: str) -> Tuple[bool, Any]:
+        """Espera a que el worker que tiene el lock publique el resultado en Redis"""
+        deadline = time.monotonic() + self.lock_wait_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    cached_data, ttl, locked = await pipe.get(cache_key).ttl(cache_key).exists(lock_key).execute()
+            except Exception as e:
+                self.cache_errors += 1
+                logger.error(f"Error waiting for cache lock: {e}")
+                return False, None
+
+            if cached_data:
+                entry = self._as_cache_entry(self._deserialize(cached_data))
+                # Un valor caducado es el que el otro worker está reemplazando
+                if entry['fresh_until'] > time.time():
+                    self.local_cache.set(cache_key, cached_data, ttl if ttl > 0 else None)
+                    return True, entry
+            if not locked:
+                return False, None
+
+        self.lock_wait_timeouts += 1
+        return False, None
+
+    async def run_task(self, func: Callable, *args, cpu_bound: bool = False,
+                       timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Ejecuta una tarea en el pool adecuado. Con cpu_bound=True va al pool
+        de procesos: func y sus argumentos deben poder serializarse (funciones
+        de módulo, no métodos de objetos con conexiones abiertas).
+        """
+        lane = self.process_lane if cpu_bound else self.thread_lane
+        return await lane.run(func, *args, timeout=timeout, **kwargs)
+
+    async def process_parallel(self, tasks: List[Callable], max_concurrent: int = None,
+                               cpu_bound: bool = False, timeout: Optional[float] = None) -> List[Any]:
         """Procesa múltiples tareas en paralelo"""
         if not tasks:
             return []
 
         max_concurrent = max_concurrent or self.max_workers
         self.parallel_tasks += len(tasks)
-
-        # Crear tareas asíncronas
-        async_tasks = []
         semaphore = asyncio.Semaphore(max_concurrent)
 
-        for task_func in tasks:
-            async def task_wrapper():
-                async with semaphore:
-                    return await asyncio.get_event_loop().run_in_executor(
-                        self.executor, task_func
-                    )
-
-            async_tasks.append(task_wrapper())
+        # La tarea se pasa como argumento: un closure en el bucle ejecutaría
+        # siempre la última (late binding)
+        async def task_wrapper(task_func: Callable) -> Any:
+            async with semaphore:
+                return await self.run_task(task_func, cpu_bound=cpu_bound, timeout=timeout)
 
         # Ejecutar todas las tareas
-        results = await asyncio.gather(*async_tasks, return_exceptions=True)
+        results = await asyncio.gather(*(task_wrapper(task_func) for task_func in tasks),
+                                       return_exceptions=True)
 
         # Manejar excepciones
         processed_results = []
         for result in results:
             if isinstance(result, Exception):
-                logger.error(f"Error in parallel task: {result}")
+                logger.error(f"Error in parallel task: {result!r}")
                 processed_results.append(None)
             else:
                 processed_results.append(result)
@@ -151,53 +808,72 @@ class PerformanceOptimizer:
         return processed_results
 
     def compress_audio_data(self, audio_data: bytes) -> bytes:
-        """Comprime datos de audio usando múltiples algoritmos"""
+        """
+        Comprime audio según su formato: FLAC para PCM, sin cambios si ya
+        está comprimido. El resultado lleva el codec aplicado en la cabecera.
+        """
         try:
-            # Usar compresión gzip para audio
-            compressed = gzip.compress(audio_data)
-
-            # Calcular ratio de compresión
-            original_size = len(audio_data)
-            compressed_size = len(compressed)
-            self.compression_ratio = (original_size - compressed_size) / original_size
-
-            logger.info(f"Audio compressed: {original_size} -> {compressed_size} bytes ({self.compression_ratio*100:.1f}% reduction)")
-
-            return compressed
+            result = encode_audio(audio_data)
+            self._record_compression(result)
+            return result["data"]
 
         except Exception as e:
             logger.error(f"Error compressing audio: {e}")
-            return audio_data
+            return store_uncompressed(audio_data)
+
+    def _record_compression(self, result: Dict[str, Any], rolling: bool = True):
+        """Actualizar estadísticas por formato y el ratio medio móvil"""
+        ratio = self.audio_compression.record(result, rolling)
+        self.compression_ratio = self.audio_compression.rolling_ratio
+
+        logger.info(f"Audio compressed ({result['input_format']} -> {result['codec']}): "
+                    f"{result['input_bytes']} -> {result['output_bytes']} bytes ({ratio*100:.1f}% reduction)")
 
     def decompress_audio_data(self, compressed_data: bytes) -> bytes:
-        """Descomprime datos de audio"""
+        """Deshace el codec registrado por compress_audio_data (gzip heredado sin cabecera incluido)"""
         try:
-            return gzip.decompress(compressed_data)
+            return decode_audio(compressed_data)
         except Exception as e:
             logger.error(f"Error decompressing audio: {e}")
             return compressed_data
 
-    async def lazy_load_model(self, model_name: str, model_loader: Callable) -> Any:
-        """Carga modelos de IA de forma lazy (solo cuando se necesitan)"""
-        cache_key = f"model:{model_name}"
-
-        # Verificar si modelo ya está cargado en cache
-        cached_model = await self.get_cached_result(cache_key)
-        if cached_model is not None:
-            logger.info(f"Model {model_name} loaded from cache")
-            return cached_model
-
-        # Cargar modelo
-        logger.info(f"Loading model {model_name}...")
-        model = await asyncio.get_event_loop().run_in_executor(
-            self.executor, model_loader
-        )
+    async def create_audio_preview(self, audio_data: bytes, duration: float = 30.0,
+                                   quality: float = 0.5) -> Optional[bytes]:
+        """Preview Opus de los primeros segundos (None si Opus no está disponible)"""
+        try:
+            result = await self.run_task(encode_preview, audio_data, duration, quality, cpu_bound=True)
+        except Exception as e:
+            logger.error(f"Error creating audio preview: {e}")
+            return None
+        self._record_compression(result, rolling=False)
+        return result["data"]
 
-        # Cachear modelo cargado
-        await self.set_cached_result(cache_key, model, self.cache_ttl.get('user_data', 1800))
+    async def lazy_load_model(self, model_name: str, model_loader: Callable) -> Any:
+        """
+        Carga modelos de IA de forma lazy (solo cuando se necesitan).
+        Los modelos quedan residentes en model_registry en lugar de
+        serializarse a Redis. El modelo devuelto no queda fijado: si el
+        presupuesto de memoria aprieta puede expulsarse; ver lease_model().
+        """
+        if not model_registry.is_registered(model_name):
+            model_registry.register(model_name, loader=model_loader)
 
+        model = await model_registry.get(model_name)
+        model_registry.release(model_name)
         return model
 
+    def lease_model(self, model_name: str, model_loader: Callable):
+        """
+        Como lazy_load_model, pero devuelve un lease: el modelo no se
+        expulsa mientras dure el bloque.
+
+            async with performance_optimizer.lease_model("bark", loader) as model:
+                ...
+        """
+        if not model_registry.is_registered(model_name):
+            model_registry.register(model_name, loader=model_loader)
+        return model_registry.lease(model_name)
+
     def get_performance_stats(self) -> Dict[str, Any]:
         """Obtiene estadísticas de rendimiento"""
         total_requests = self.cache_hits + self.cache_misses
@@ -207,24 +883,67 @@ class PerformanceOptimizer:
             'cache_hits': self.cache_hits,
             'cache_misses': self.cache_misses,
             'hit_rate_percent': round(hit_rate, 2),
+            'cache_tiers': {
+                'local': self.local_cache.get_stats(),
+                'redis': {
+                    'hits': self.redis_hits,
+                    'misses': self.redis_misses
+                }
+            },
+            'cache_errors': self.cache_errors,
+            'cache_codec': self.codec.get_stats(),
+            'functions': self.get_function_cache_stats(),
+            'single_flight': {
+                'upstream_calls': self.upstream_calls,
+                'coalesced_calls': self.coalesced_calls,
+                'remote_coalesced_calls': self.remote_coalesced_calls,
+                'upstream_calls_saved': self.coalesced_calls + self.remote_coalesced_calls,
+                'lock_wait_timeouts': self.lock_wait_timeouts,
+                'inflight': len(self._inflight)
+            },
+            'cache_policies': {
+                ttl_key: {**self._cache_policy(ttl_key), **self._policy_counters(ttl_key)}
+                for ttl_key in sorted(set(self.cache_ttl) | set(self.cache_policies) | set(self.policy_stats))
+            },
             'parallel_tasks_processed': self.parallel_tasks,
             'avg_compression_ratio': round(self.compression_ratio * 100, 2),
-            'active_workers': self.max_workers
+            'audio_compression': self.audio_compression.get_stats(),
+            'models': model_registry.get_stats(),
+            'active_workers': self.max_workers,
+            'executors': {
+                'thread': self.thread_lane.get_stats(),
+                'process': self.process_lane.get_stats()
+            }
         }
 
+    def get_function_cache_stats(self) -> Dict[str, Any]:
+        """Aciertos, tamaño, compresión y tiempo ahorrado por función cacheada"""
+        return self.function_stats.get_stats(self.local_cache.get_namespace_stats())
+
+    async def sample_cache_memory(self, refresh: bool = False) -> Dict[str, Any]:
+        """Memoria estimada de Redis por namespace (SCAN muestreado, ver cache_stats)"""
+        if self.memory_sampler is None:
+            return {'error': 'Redis no configurado'}
+        return await self.memory_sampler.sample(refresh)
+
     def optimize_database_query(self, query_func: Callable) -> Callable:
         """Optimiza consultas a base de datos con cache"""
         @functools.wraps(query_func)
         async def wrapper(*args, **kwargs):
-            cache_key = self._generate_cache_key(query_func.__name__, *args, **kwargs)
+            cache_key = self._function_cache_key(query_func, args, kwargs)
 
             # Verificar cache primero
+            started = time.perf_counter()
             cached_result = await self.get_cached_result(cache_key)
             if cached_result is not None:
+                self.function_stats.record_lookup(cache_key, 'fresh_hits', time.perf_counter() - started)
                 return cached_result
+            self.function_stats.record_lookup(cache_key, 'misses', time.perf_counter() - started)
 
             # Ejecutar consulta
+            started = time.perf_counter()
             result = await query_func(*args, **kwargs)
+            self.function_stats.record_upstream(cache_key, time.perf_counter() - started)
 
             # Cachear resultado (TTL más corto para datos dinámicos)
             await self.set_cached_result(cache_key, result, self.cache_ttl.get('user_data', 300))
@@ -240,14 +959,20 @@ class PerformanceOptimizer:
         for i in range(0, len(audio_files), batch_size):
             batch = audio_files[i:i + batch_size]
 
-            # Procesar batch en paralelo
+            # Procesar batch en paralelo (compresión CPU-bound: pool de procesos)
             batch_tasks = [
-                self._process_single_audio_file(audio_data)
+                functools.partial(encode_audio, audio_data)
                 for audio_data in batch
             ]
 
-            batch_results = await self.process_parallel(batch_tasks)
-            results.extend(batch_results)
+            batch_results = await self.process_parallel(batch_tasks, cpu_bound=True)
+            for audio_data, result in zip(batch, batch_results):
+                if result is None:
+                    # Fallo en el worker: conservar el original
+                    results.append(store_uncompressed(audio_data))
+                    continue
+                self._record_compression(result)
+                results.append(result["data"])
 
         return results
 
@@ -263,7 +988,9 @@ class PerformanceOptimizer:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        self.executor.shutdown(wait=True)
+        await self.close()
+        self.thread_lane.shutdown(wait=True)
+        self.process_lane.shutdown(wait=True)
 
 # Instancia global del optimizador
 performance_optimizer = PerformanceOptimizer()
@@ -276,12 +1003,25 @@ def optimize_ai_function(func: Callable) -> Callable:
         return await performance_optimizer.cache_ai_result()(func)(*args, **kwargs)
     return wrapper
 
-def parallel_process(func: Callable) -> Callable:
-    """Decorador para ejecutar funciones en paralelo"""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Crear tarea para ejecutar en executor
-        return asyncio.get_event_loop().run_in_executor(
-            performance_optimizer.executor, func, *args, **kwargs
-        )
-    return wrapper
+def parallel_process(func: Optional[Callable] = None, *, cpu_bound: bool = False,
+                     timeout: Optional[float] = None) -> Callable:
+    """
+    Decorador para ejecutar funciones en paralelo.
+    Uso: @parallel_process o @parallel_process(cpu_bound=True, timeout=60).
+    Con cpu_bound la función debe estar definida a nivel de módulo.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Devuelve un awaitable con el resultado
+            if cpu_bound:
+                return performance_optimizer.run_task(
+                    _run_unwrapped, func.__module__, func.__qualname__, args, kwargs,
+                    cpu_bound=True, timeout=timeout
+                )
+            return performance_optimizer.run_task(func, *args, timeout=timeout, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
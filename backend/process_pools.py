@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+🧵 Process Pools - Cierre de pools de procesos con workers colgados
+ProcessPoolExecutor.shutdown(cancel_futures=True) solo cancela lo que no
+ha empezado: un worker ocupado sigue vivo hasta que termina, y si está
+colgado vive tanto como el servidor. Aquí el pool se cierra y, pasado un
+periodo de gracia, se terminan (SIGTERM y luego SIGKILL) los procesos
+que sigan vivos.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Tiempo entre SIGTERM y SIGKILL
+KILL_AFTER_SECONDS = 2.0
+
+
+def shutdown_executor(executor: Executor, grace: float = 0.0, wait: bool = False):
+    """
+    Cerrar un executor cancelando lo pendiente. Si es de procesos, los
+    workers que sigan vivos tras `grace` segundos se terminan; con
+    wait=False la espera ocurre en un hilo y la llamada vuelve al momento.
+    """
+    # Lista de procesos antes de shutdown: el pool la vacía al cerrarse
+    processes = []
+    if isinstance(executor, ProcessPoolExecutor):
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    if not processes:
+        if wait:
+            executor.shutdown(wait=True)
+        return
+
+    def reap():
+        deadline = time.monotonic() + grace
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        stuck = [process for process in processes if process.is_alive()]
+        for process in stuck:
+            logger.warning(f"Terminando worker del pool cerrado (pid {process.pid})")
+            process.terminate()
+        for process in stuck:
+            process.join(KILL_AFTER_SECONDS)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    if wait:
+        reap()
+        executor.shutdown(wait=True)
+    else:
+        threading.Thread(target=reap, name="process-pool-reaper", daemon=True).start()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+📡 Prometheus Exporter - Exposición de MetricsDashboard en /metrics
+Cada contador, gauge y valor registrado en MetricsDashboard se refleja en
+un instrumento de prometheus_client:
+  - increment_counter -> Counter (con los tags como labels)
+  - set_gauge -> Gauge
+  - record_metric / record_histogram -> Histogram con buckets acumulativos
+    y los tags como labels
+/metrics negocia el formato: OpenMetrics si el scraper lo acepta, si no
+el formato de texto 0.0.4.
+
+Modo multiproceso (varios workers de uvicorn/gunicorn): definir
+PROMETHEUS_MULTIPROC_DIR apuntando a un directorio vacío antes de
+arrancar los workers (limpiarlo en cada despliegue). Cada worker escribe
+sus valores en ficheros mmap y /metrics los agrega todos. Los gauges se
+publican por pid (liveall) y se retiran al apagar el worker.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+    from prometheus_client.exposition import choose_encoder
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "son1k"
+# Métricas en milisegundos (sufijo ms): de 1 ms a 1 min
+MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Tamaños en bytes (sufijo bytes): de 64 B a 64 MB
+BYTE_BUCKETS = tuple(64 * 4 ** exponent for exponent in range(11))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def sanitize_metric_name(name: str, prefix: str = METRIC_PREFIX) -> str:
+    """'audio_analysis.total.wall_ms' -> 'son1k_audio_analysis_total_wall_ms'"""
+    name = re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+    if prefix:
+        return f"{prefix}_{name}"
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def sanitize_label_name(name: str) -> str:
+    """Los labels no admiten puntos, guiones ni el prefijo reservado __"""
+    name = re.sub(r"[^a-zA-Z0-9_]", "_", name).lstrip("_") or "tag"
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def default_buckets(name: str) -> Sequence[float]:
+    """
+    Buckets según la unidad que indica el sufijo del nombre. La unidad debe
+    ser su propio segmento ('_ms' o '.ms'): 'cache.items' no es una latencia.
+    """
+    if name.endswith(("_ms", ".ms")):
+        return MS_BUCKETS
+    if name.endswith(("_bytes", ".bytes")):
+        return BYTE_BUCKETS
+    return DEFAULT_BUCKETS
+
+
+def is_multiprocess() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.getenv("prometheus_multiproc_dir"))
+
+
+class PrometheusExporter:
+    """Instrumentos de prometheus_client creados bajo demanda por nombre de métrica"""
+
+    def __init__(self, prefix: str = METRIC_PREFIX, registry=None):
+        self.enabled = PROMETHEUS_AVAILABLE
+        self.prefix = prefix
+        self.registry = registry or (REGISTRY if PROMETHEUS_AVAILABLE else None)
+
+        self._gauges: Dict[str, "Gauge"] = {}
+        # Contadores e histogramas: nombre -> (instrumento, tags originales en orden de labels, mismos tags como set)
+        self._counters: Dict[str, Tuple["Counter", Tuple[str, ...], frozenset]] = {}
+        self._histograms: Dict[str, Tuple["Histogram", Tuple[str, ...], frozenset]] = {}
+        # labels() valida y bloquea en cada llamada: hijos cacheados por tipo, nombre y valores
+        self._children: Dict[Tuple[int, str, Tuple[str, ...]], Any] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._failed: set = set()
+        self._lock = threading.Lock()
+
+        # Estadísticas
+        self.dropped_tags = 0
+        self.errors = 0
+
+    def set_buckets(self, name: str, buckets: Sequence[float]):
+        """Buckets propios para un histograma (antes de su primer valor)"""
+        self._buckets[name] = tuple(buckets)
+
+    def increment(self, name: str, amount: float = 1, tags: Optional[Dict[str, str]] = None):
+        if not self.enabled:
+            return
+        entry = self._counters.get(name)
+        if entry is None:
+            # Como en los histogramas, los labels salen de los tags del primer incremento
+            tag_keys = tuple(sorted(tags or {}))
+            entry = self._create(self._counters, name, lambda metric: (Counter(
+                metric, f"Contador {name}",
+                labelnames=[sanitize_label_name(key) for key in tag_keys],
+                registry=self.registry
+            ), tag_keys, frozenset(tag_keys)))
+            if entry is None:
+                return
+        self._labeled(self._counters, name, entry, tags).inc(amount)
+
+    def set_gauge(self, name: str, value: float):
+        if not self.enabled:
+            return
+        gauge = self._gauges.get(name)
+        if gauge is None:
+            gauge = self._create(self._gauges, name, lambda metric: Gauge(
+                metric, f"Gauge {name}", registry=self.registry, multiprocess_mode="liveall"
+            ))
+        if gauge is not None:
+            gauge.set(value)
+
+    def observe(self, name: str, value: float, tags: Optional[Dict[str, str]] = None):
+        if not self.enabled:
+            return
+        entry = self._histograms.get(name)
+        if entry is None:
+            # Los labels se fijan con los tags del primer valor registrado
+            tag_keys = tuple(sorted(tags or {}))
+            entry = self._create(self._histograms, name, lambda metric: (Histogram(
+                metric, f"Distribución de {name}",
+                labelnames=[sanitize_label_name(key) for key in tag_keys],
+                buckets=self._buckets.get(name) or default_buckets(name),
+                registry=self.registry
+            ), tag_keys, frozenset(tag_keys)))
+            if entry is None:
+                return
+        self._labeled(self._histograms, name, entry, tags).observe(value)
+
+    def _labeled(self, instruments: Dict, name: str, entry, tags: Optional[Dict[str, str]]):
+        """Hijo del instrumento para los valores de sus labels (o el propio instrumento si no tiene)"""
+        instrument, tag_keys, tag_key_set = entry
+        if not tag_keys:
+            return instrument
+        tags = tags or {}
+        if not tags.keys() <= tag_key_set:
+            self.dropped_tags += 1
+        values = tuple([str(tags.get(key, "")) for key in tag_keys])
+        child_key = (id(instruments), name, values)
+        child = self._children.get(child_key)
+        if child is None:
+            child = self._children[child_key] = instrument.labels(*values)
+        return child
+
+    def render(self, accept: Optional[str] = None) -> Tuple[bytes, str]:
+        """(cuerpo, content-type) en el formato que acepta el scraper"""
+        if not self.enabled:
+            raise RuntimeError("prometheus_client no está instalado")
+        registry = self.registry
+        if is_multiprocess():
+            # Agregar los ficheros de todos los workers
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        encoder, content_type = choose_encoder(accept or "")
+        return encoder(registry), content_type
+
+    def mark_process_dead(self, pid: Optional[int] = None):
+        """Retirar los gauges de un worker que termina (solo modo multiproceso)"""
+        if self.enabled and is_multiprocess():
+            multiprocess.mark_process_dead(pid or os.getpid())
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "enabled": self.enabled,
+            "multiprocess": is_multiprocess(),
+            "counters": len(self._counters),
+            "gauges": len(self._gauges),
+            "histograms": len(self._histograms),
+            "dropped_tags": self.dropped_tags,
+            "errors": self.errors
+        }
+
+    def _create(self, instruments: Dict, name: str, factory):
+        """Crear y guardar el instrumento una sola vez; un fallo (p.ej. nombre duplicado) se registra y se ignora"""
+        failed_key = (id(instruments), name)
+        if failed_key in self._failed:
+            return None
+        with self._lock:
+            if name in instruments:
+                return instruments[name]
+            try:
+                instrument = factory(sanitize_metric_name(name, self.prefix))
+            except ValueError as e:
+                self.errors += 1
+                self._failed.add(failed_key)
+                logger.warning(f"Métrica {name} no exportable a Prometheus: {e}")
+                return None
+            instruments[name] = instrument
+            return instrument
+
+
+# Instancia global usada por MetricsDashboard
+prometheus_exporter = PrometheusExporter()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+📈 Quantile Sketch - Percentiles en streaming para MetricsDashboard
+DDSketch: histograma de buckets logarítmicos con error relativo
+garantizado (alpha=1% -> p99 con ±1% del valor real), registro O(1),
+memoria acotada por max_bins y fusionable (sumar buckets).
+WindowedQuantileSketch guarda un sketch por intervalo de tiempo en dos
+niveles (10s durante 5 min, 1 min durante 1 h): una consulta fusiona
+solo los intervalos de la ventana pedida.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Valores por debajo se cuentan como cero (evita log de subnormales)
+MIN_INDEXABLE = 1e-9
+
+
+class DDSketch:
+    """Sketch de cuantiles con error relativo alpha"""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value > MIN_INDEXABLE:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            bins = self.positive
+        elif value < -MIN_INDEXABLE:
+            key = math.ceil(math.log(-value) / self._log_gamma)
+            bins = self.negative
+        else:
+            self.zero_count += 1
+            return
+        bins[key] = bins.get(key, 0) + 1
+        if len(bins) > self.max_bins:
+            self._collapse(bins)
+
+    def merge(self, other: "DDSketch"):
+        """Sumar otro sketch con la misma precisión"""
+        if other.count == 0:
+            return
+        if other.gamma != self.gamma:
+            raise ValueError("Solo se pueden fusionar sketches con la misma precisión")
+        for bins, other_bins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+            if len(bins) > self.max_bins:
+                self._collapse(bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Valor del cuantil q (0..1); 0 si el sketch está vacío"""
+        return self.quantiles([q])[q]
+
+    def quantiles(self, qs) -> Dict[float, float]:
+        """Varios cuantiles en una sola pasada por los buckets ordenados"""
+        if self.count == 0:
+            return {q: 0 for q in qs}
+
+        results = {}
+        pending = []
+        for q in sorted(qs):
+            if q <= 0:
+                results[q] = self.min
+            elif q >= 1:
+                results[q] = self.max
+            else:
+                pending.append(q)
+
+        # Negativos de mayor a menor magnitud, luego ceros, luego positivos
+        ordered = [(-self._value(key), self.negative[key]) for key in sorted(self.negative, reverse=True)]
+        ordered.append((0.0, self.zero_count))
+        ordered += [(self._value(key), self.positive[key]) for key in sorted(self.positive)]
+
+        seen = 0
+        index = 0
+        for value, count in ordered:
+            seen += count
+            while index < len(pending) and seen > pending[index] * (self.count - 1):
+                results[pending[index]] = min(max(value, self.min), self.max)
+                index += 1
+            if index == len(pending):
+                break
+        for q in pending[index:]:
+            results[q] = self.max
+        return results
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0
+
+    @property
+    def bins(self) -> int:
+        return len(self.positive) + len(self.negative)
+
+    def _value(self, key: int) -> float:
+        """Estimación del bucket (error relativo <= alpha)"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _collapse(self, bins: Dict[int, int]):
+        """Fusionar los buckets más pequeños: pierde precisión solo en la cola baja"""
+        keys = sorted(bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        bins[target] += sum(bins.pop(key) for key in keys[:excess])
+
+
+class WindowedQuantileSketch:
+    """
+    Sketches por intervalo de tiempo con dos resoluciones. Memoria constante:
+    como mucho fine_buckets + coarse_buckets sketches por métrica.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 fine_seconds: int = 10, fine_buckets: int = 30,
+                 coarse_seconds: int = 60, coarse_buckets: int = 60):
+        self.relative_accuracy = relative_accuracy
+        self.tiers = [
+            (fine_seconds, deque(maxlen=fine_buckets)),
+            (coarse_seconds, deque(maxlen=coarse_buckets)),
+        ]
+
+    def add(self, value: float, timestamp: float):
+        for width, buckets in self.tiers:
+            if buckets:
+                start, sketch = buckets[-1]
+                if start <= timestamp < start + width:
+                    # Caso habitual: el intervalo en curso
+                    sketch.add(value)
+                    continue
+            start = timestamp - timestamp % width
+            if not buckets or buckets[-1][0] < start:
+                buckets.append((start, DDSketch(self.relative_accuracy)))
+                buckets[-1][1].add(value)
+                continue
+            # Fuera de orden (reloj o timestamp explícito antiguo): bucket más cercano
+            for bucket_start, sketch in reversed(buckets):
+                if bucket_start <= start:
+                    sketch.add(value)
+                    break
+
+    @property
+    def retention(self) -> int:
+        """Ventana máxima consultable en segundos"""
+        width, buckets = self.tiers[-1]
+        return width * buckets.maxlen
+
+    def window(self, time_window: float, now: float) -> DDSketch:
+        """
+        Sketch fusionado de los intervalos que solapan [now - time_window, now].
+        Usa el nivel más fino que cubre la ventana; el borde se redondea a
+        un intervalo.
+        """
+        return self.window_span(time_window, now)[0]
+
+    def window_span(self, time_window: float, now: float) -> Tuple[DDSketch, Optional[float]]:
+        """
+        Como window(), y además el inicio del intervalo más antiguo fusionado
+        (None si no hay ninguno). now - inicio es la ventana cubierta de verdad:
+        puede pasarse de time_window por el redondeo o quedarse corta si la
+        ventana supera la retención.
+        """
+        cutoff = now - time_window
+        for tier, (width, buckets) in enumerate(self.tiers):
+            if width * buckets.maxlen >= time_window or tier == len(self.tiers) - 1:
+                break
+
+        merged = DDSketch(self.relative_accuracy)
+        covered_start = None
+        for start, sketch in reversed(buckets):
+            if start + width <= cutoff:
+                break
+            merged.merge(sketch)
+            covered_start = start
+        return merged, covered_start
+
+    def memory_bins(self) -> int:
+        return sum(sketch.bins for _, buckets in self.tiers for _, sketch in buckets)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+⏱️ Request Metrics - Latencia y throughput por ruta
+Middleware ASGI puro (sin BaseHTTPMiddleware, que añade una tarea y
+una cola por petición) que publica en metrics_dashboard:
+  - http.request.duration_ms: latencia hasta el último byte de respuesta,
+    con tags method, route (plantilla: /api/items/{id}, no la URL) y status
+  - http.request.bytes / http.response.bytes
+  - http.requests_in_flight (gauge)
+  - contadores total_requests, total_errors (5xx) y http.responses
+    (tag status: un solo contador, no uno por código)
+Con sample_rate < 1 solo se miden latencia y tamaños de una fracción de
+las peticiones; contadores y gauge son siempre exactos.
+"""
+
+import random
+import time
+from typing import Iterable, Optional
+
+from monitoring_analytics_system import MetricsDashboard, metrics_dashboard
+
+# Rutas sin plantilla: no usar la URL cruda como tag (cardinalidad ilimitada)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """app.add_middleware(RequestMetricsMiddleware, sample_rate=0.1)"""
+
+    def __init__(self, app, dashboard: Optional[MetricsDashboard] = None, sample_rate: float = 1.0,
+                 exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.dashboard = dashboard or metrics_dashboard
+        self.sample_rate = sample_rate
+        self.exclude_paths = frozenset(exclude_paths)
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        dashboard = self.dashboard
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        root_path = scope.get("root_path", "")
+        started = time.perf_counter()
+        status = 500
+        duration = None
+        response_bytes = 0
+        request_bytes = 0
+
+        if sampled:
+            async def receive_wrapper():
+                nonlocal request_bytes
+                message = await receive()
+                request_bytes += len(message.get("body", b""))
+                return message
+        else:
+            receive_wrapper = receive
+
+        async def send_wrapper(message):
+            nonlocal status, duration, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    # Último byte: las background tasks no cuentan como latencia
+                    duration = time.perf_counter() - started
+            await send(message)
+
+        self.in_flight += 1
+        dashboard.set_gauge("http.requests_in_flight", self.in_flight)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            dashboard.set_gauge("http.requests_in_flight", self.in_flight)
+            dashboard.increment_counter("total_requests")
+            dashboard.increment_counter("http.responses", tags={"status": str(status)})
+            if status >= 500:
+                dashboard.increment_counter("total_errors")
+
+            if sampled:
+                if duration is None:
+                    duration = time.perf_counter() - started
+                tags = {
+                    "method": scope["method"],
+                    "route": self._route_template(scope, root_path, status),
+                    "status": str(status)
+                }
+                dashboard.record_metrics({
+                    "http.request.duration_ms": duration * 1000,
+                    "http.request.bytes": request_bytes,
+                    "http.response.bytes": response_bytes
+                }, tags)
+
+    @staticmethod
+    def _route_template(scope, root_path: str, status: int) -> str:
+        """Plantilla de la ruta que atendió la petición (el router la deja en el scope)"""
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        mount_path = scope.get("root_path", "")[len(root_path):]
+        if mount_path:
+            # Apps montadas (StaticFiles, sub-apps): prefijo del montaje
+            return f"{mount_path}/{{path}}"
+        return UNMATCHED_ROUTE if status == 404 else "other"
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+🖥️ System Metrics - Muestreo del sistema en segundo plano
+get_system_metrics llamaba a psutil.cpu_percent(interval=1) en cada
+petición y bloqueaba el event loop un segundo entero. Aquí una tarea
+muestrea cada `interval` segundos:
+  - CPU, memoria, disco y red (bytes/s entre muestras)
+  - proceso: RSS, descriptores abiertos, hilos y CPU
+  - retraso del event loop (lo que se pasa el despertar del sleep)
+Las lecturas de psutil se hacen en un hilo; los lectores obtienen la
+última muestra al instante y un histórico corto para sparklines.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+from metric_store import MetricRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Series del histórico (también publicadas como gauges system.<serie>)
+SERIES = (
+    "cpu.percent",
+    "memory.percent",
+    "disk.percent",
+    "network.sent_bytes_per_sec",
+    "network.recv_bytes_per_sec",
+    "process.rss_bytes",
+    "process.open_fds",
+    "process.threads",
+    "process.cpu_percent",
+    "event_loop.lag_ms",
+)
+
+
+class SystemMetricsSampler:
+    """Última muestra del sistema y las `history_size` anteriores por serie"""
+
+    def __init__(self, dashboard=None, history_size: int = 720, disk_path: str = "/"):
+        self.dashboard = dashboard
+        self.history_size = history_size
+        self.disk_path = disk_path
+        self.history = {name: MetricRingBuffer(history_size) for name in SERIES}
+
+        self.process = psutil.Process()
+        self.latest: Optional[Dict[str, Any]] = None
+        self._last_network = None
+        self._task: Optional[asyncio.Task] = None
+        self.interval: Optional[float] = None
+
+        # Estadísticas
+        self.samples = 0
+        self.errors = 0
+
+    def collect(self, loop_lag: float = 0.0) -> Dict[str, Any]:
+        """Leer psutil sin esperar: los porcentajes de CPU son desde la llamada anterior"""
+        now = time.time()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        network = psutil.net_io_counters()
+        sent_rate = recv_rate = 0.0
+        if network is not None and self._last_network is not None:
+            last_time, last_counters = self._last_network
+            elapsed = now - last_time
+            if elapsed > 0:
+                # Los contadores pueden reiniciarse (interfaz caída): nunca tasas negativas
+                sent_rate = max(network.bytes_sent - last_counters.bytes_sent, 0) / elapsed
+                recv_rate = max(network.bytes_recv - last_counters.bytes_recv, 0) / elapsed
+        if network is not None:
+            self._last_network = (now, network)
+
+        with self.process.oneshot():
+            process = {
+                "rss_bytes": self.process.memory_info().rss,
+                "threads": self.process.num_threads(),
+                "cpu_percent": self.process.cpu_percent(interval=None),
+                # num_fds solo existe en POSIX
+                "open_fds": self.process.num_fds() if hasattr(self.process, "num_fds") else None
+            }
+
+        return {
+            "cpu": {
+                "percent": psutil.cpu_percent(interval=None),
+                "count": psutil.cpu_count()
+            },
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent,
+                "used": memory.used
+            },
+            "disk": {
+                "total": disk.total,
+                "used": disk.used,
+                "free": disk.free,
+                "percent": disk.percent
+            },
+            "network": {
+                "bytes_sent": network.bytes_sent if network else 0,
+                "bytes_recv": network.bytes_recv if network else 0,
+                "sent_bytes_per_sec": round(sent_rate, 1),
+                "recv_bytes_per_sec": round(recv_rate, 1)
+            },
+            "process": process,
+            "event_loop": {"lag_ms": round(loop_lag * 1000, 3)},
+            "timestamp": now
+        }
+
+    def record(self, sample: Dict[str, Any]):
+        """Guardar la muestra en el histórico y los gauges (desde el hilo del event loop)"""
+        timestamp = sample["timestamp"]
+        for name in SERIES:
+            group, field = name.split(".", 1)
+            value = sample[group].get(field)
+            if value is None:
+                continue
+            self.history[name].append(value, timestamp)
+            if self.dashboard is not None:
+                self.dashboard.set_gauge(f"system.{name}", value)
+        self.latest = sample
+        self.samples += 1
+
+    def get_latest(self) -> Dict[str, Any]:
+        """Última muestra; sin muestreador arrancado se toma una al momento (sin bloquear)"""
+        if self.latest is None or not self.running:
+            self.record(self.collect())
+        return self.latest
+
+    def get_history(self, time_window: float = 300) -> Dict[str, Any]:
+        """Series de los últimos time_window segundos, alineadas con timestamps"""
+        since = time.time() - time_window
+        timestamps, _, _ = self.history["cpu.percent"].window(since)
+        series = {}
+        for name, buffer in self.history.items():
+            series[name] = buffer.window(since)[1].tolist()
+        return {
+            "interval": self.interval,
+            "timestamps": timestamps.tolist(),
+            "series": series
+        }
+
+    async def _run_periodically(self, interval: float):
+        loop = asyncio.get_running_loop()
+        lag = 0.0
+        while True:
+            try:
+                sample = await asyncio.to_thread(self.collect, lag)
+                self.record(sample)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error muestreando métricas del sistema: {e}")
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(loop.time() - expected, 0.0)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, interval: float = 5.0) -> asyncio.Task:
+        """Lanzar el muestreo en segundo plano"""
+        if not self.running:
+            self.interval = interval
+            # Primera llamada: fija la referencia de los porcentajes de CPU
+            psutil.cpu_percent(interval=None)
+            self.process.cpu_percent(interval=None)
+            self._task = asyncio.create_task(self._run_periodically(interval))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "errors": self.errors,
+            "history_size": self.history_size
+        }
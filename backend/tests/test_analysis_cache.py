@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+🗄️ Tests - Cache de análisis direccionado por contenido (analysis_cache)
+Aciertos y fallos por huella del archivo, en memoria y en disco.
+
+Uso: python -m pytest -q tests/test_analysis_cache.py
+"""
+
+import io
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_cache import AnalysisCache, audio_fingerprint
+
+PARAMS = {"sample_rate": 22050, "hop_length": 512, "streaming": False, "version": 5}
+
+
+@pytest.fixture
+def tracks(tmp_path):
+    rng = np.random.default_rng(0)
+    first = tmp_path / "first.wav"
+    first.write_bytes(b"RIFF" + rng.bytes(300_000))
+    renamed = tmp_path / "renamed.wav"
+    shutil.copy(first, renamed)
+    other = tmp_path / "other.wav"
+    other.write_bytes(b"RIFF" + rng.bytes(300_000))
+    return first, renamed, other
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(cache_dir=str(tmp_path / "cache"), max_memory_entries=4)
+
+
+def test_fingerprint_depends_only_on_content(tracks):
+    first, renamed, other = tracks
+    assert audio_fingerprint(str(first)) == audio_fingerprint(str(renamed))
+    assert audio_fingerprint(str(first)) != audio_fingerprint(str(other))
+    # Un buffer en memoria con los mismos bytes da la misma huella y queda rebobinado
+    buffer = io.BytesIO(first.read_bytes())
+    assert audio_fingerprint(buffer, block_size=4096) == audio_fingerprint(str(first))
+    assert buffer.tell() == 0
+
+
+def test_hit_for_same_content_miss_for_other_content(cache, tracks):
+    first, renamed, other = tracks
+    result = {"success": True, "tempo": 120.0, "beats": np.array([1, 22, 43]), "mfccs": np.ones((13, 4))}
+    cache.set(cache.make_key(str(first), PARAMS), result)
+
+    cached = cache.get(cache.make_key(str(renamed), PARAMS))
+    assert cached is not None and cached["tempo"] == 120.0
+    assert cache.get(cache.make_key(str(other), PARAMS)) is None
+    assert cache.get(cache.make_key(str(first), {**PARAMS, "streaming": True})) is None
+
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 2)
+
+
+def test_disk_hit_keeps_arrays(tmp_path, cache, tracks):
+    first, _, _ = tracks
+    key = cache.make_key(str(first), PARAMS)
+    cache.set(key, {"success": True, "beats": np.array([1, 22, 43]), "mfccs": np.ones((13, 4), np.float32)})
+
+    # Otro proceso (otra instancia) solo tiene el nivel de disco
+    fresh = AnalysisCache(cache_dir=str(tmp_path / "cache"))
+    cached = fresh.get(key)
+    assert fresh.get_stats()["disk_hits"] == 1
+    np.testing.assert_array_equal(cached["beats"], [1, 22, 43])
+    assert cached["mfccs"].dtype == np.float32 and cached["mfccs"].shape == (13, 4)
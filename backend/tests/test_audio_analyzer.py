@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+🎵 Tests - AudioAnalyzer sobre señales sintéticas
+Un WAV estéreo a 44.1 kHz con contenido por encima de 11 kHz: obliga a
+remuestrear y distingue un análisis a tasa nativa de uno a 22050 Hz.
+La tonalidad se comprueba con progresiones de acordes en tonos conocidos.
+
+Uso: python -m pytest -q tests/test_audio_analyzer.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+sf = pytest.importorskip("soundfile")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_cache import AnalysisCache
+from audio_analyzer import KEY_NAMES, AudioAnalyzer
+
+NATIVE_RATE = 44100
+
+
+def write_wav(path, channels: np.ndarray, sr: int = NATIVE_RATE) -> str:
+    sf.write(str(path), channels.T.astype(np.float32), sr, subtype="PCM_16")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def track(tmp_path_factory):
+    """8 s: acorde de La mayor, golpes a 120 BPM y ruido agudo (>11 kHz)"""
+    t = np.arange(8 * NATIVE_RATE) / NATIVE_RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (440.0, 554.37, 659.25)) / 3
+    kick = np.sin(2 * np.pi * 60 * t) * np.exp(-(t % 0.5) * 20)
+    hiss = np.random.default_rng(0).standard_normal(len(t))
+    hiss = np.real(np.fft.ifft(np.fft.fft(hiss) * (np.abs(np.fft.fftfreq(len(t), 1 / NATIVE_RATE)) > 12000)))
+    left = 0.3 * chord + 0.3 * kick + 0.05 * hiss
+    right = 0.3 * chord + 0.3 * kick - 0.05 * hiss
+    return write_wav(tmp_path_factory.mktemp("audio") / "track.wav", np.stack([left, right]))
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = AudioAnalyzer()
+    analyzer.cache = None
+    analyzer.record_profile_metrics = False
+    return analyzer
+
+
+def assert_same_result(full, streamed):
+    assert full["success"] and streamed["success"]
+    assert streamed["tempo"] == pytest.approx(full["tempo"])
+    assert streamed["genre"] == full["genre"]
+    assert streamed["key"] == full["key"]
+    assert streamed["duration"] == pytest.approx(full["duration"])
+    for name, value in full["key_features"].items():
+        assert streamed["key_features"][name] == pytest.approx(value, rel=1e-3), name
+    np.testing.assert_allclose(streamed["mfccs"], full["mfccs"], atol=1e-3)
+    np.testing.assert_array_equal(streamed["beats"], full["beats"])
+
+
+@pytest.mark.parametrize("window", [{}, {"offset": 1.5, "duration": 4.2}])
+def test_streaming_matches_full_analysis(analyzer, track, window):
+    # Bloques pequeños: muchas fronteras entre bloques en 8 s
+    analyzer.stream_block_length = 37
+    full = analyzer.analyze_audio_file(track, **window)
+    streamed = analyzer.analyze_audio_file(track, streaming=True, **window)
+    assert_same_result(full, streamed)
+
+
+def test_streaming_resamples_spectral_features(analyzer, track):
+    streamed = analyzer.analyze_audio_file(track, streaming=True)
+    # A 22050 Hz no hay energía por encima de 11025 Hz
+    assert streamed["key_features"]["spectral_rolloff_mean"] < analyzer.sample_rate / 2
+
+
+@pytest.mark.parametrize("load_mode", ["fast", "polyphase"])
+def test_load_modes_agree_with_hq(analyzer, track, load_mode):
+    reference = analyzer.analyze_audio_file(track, load_mode="hq")
+    result = analyzer.analyze_audio_file(track, load_mode=load_mode)
+    assert result["success"]
+    assert result["genre"] == reference["genre"]
+    assert result["key"] == reference["key"]
+    assert result["tempo"] == pytest.approx(reference["tempo"], rel=0.05)
+    assert result["key_features"]["spectral_centroid_mean"] == pytest.approx(
+        reference["key_features"]["spectral_centroid_mean"], rel=0.2
+    )
+    assert result["key_features"]["spectral_rolloff_mean"] < analyzer.sample_rate / 2
+
+
+def test_unknown_load_mode_is_rejected(analyzer, track):
+    result = analyzer.analyze_audio_file(track, load_mode="native")
+    assert result == {"success": False, "error": "Modo de carga no soportado: native"}
+
+
+def test_repeated_analysis_is_served_from_cache(analyzer, track, tmp_path):
+    analyzer.cache = AnalysisCache(cache_dir=str(tmp_path / "cache"))
+    first = analyzer.analyze_audio_file(track)
+    second = analyzer.analyze_audio_file(track)
+    streamed = analyzer.analyze_audio_file(track, streaming=True)
+
+    assert "cached" not in first and second["cached"] is True
+    assert second["tempo"] == first["tempo"]
+    np.testing.assert_array_equal(second["mfccs"], first["mfccs"])
+    # Otros parámetros, otra clave
+    assert "cached" not in streamed
+    assert analyzer.cache.get_stats()["memory_hits"] == 1
+
+
+def chord_progression(tonic: str, scale: str, duration: float = 8.0, sr: int = 22050) -> np.ndarray:
+    """I-IV-V-I (o i-iv-V-i) con armónicos, como en benchmarks/bench_key_detection.py"""
+    root = 48 + KEY_NAMES.index(tonic)
+    third = 4 if scale == "Major" else 3
+    progression = [(0, third, 7), (5, 5 + third, 12), (7, 11, 14), (0, third, 7)]
+    t = np.arange(int(sr * duration / len(progression))) / sr
+    chords = [
+        sum(gain * np.sin(2 * np.pi * 440.0 * 2 ** ((root + interval - 69) / 12) * harmonic * t)
+            for interval in chord for harmonic, gain in ((1, 1.0), (2, 0.5), (3, 0.25)))
+        for chord in progression
+    ]
+    y = np.concatenate(chords)
+    return 0.3 * y / np.max(np.abs(y))
+
+
+@pytest.mark.parametrize("tonic,scale", [("G", "Major"), ("D#", "Major"), ("A", "Minor"), ("F#", "Minor")])
+def test_detects_key_of_chord_progression(analyzer, tmp_path, tonic, scale):
+    path = write_wav(tmp_path / "progression.wav", chord_progression(tonic, scale)[np.newaxis], sr=22050)
+    full = analyzer.analyze_audio_file(path)
+    streamed = analyzer.analyze_audio_file(path, streaming=True)
+    for result in (full, streamed):
+        assert result["key"] == f"{tonic} {scale}"
+        assert result["scale"] == scale
+        assert result["key_confidence"] > 0.3
+
+
+def test_silence_has_no_key(analyzer, tmp_path):
+    path = write_wav(tmp_path / "silence.wav", np.zeros((1, 3 * 22050)), sr=22050)
+    result = analyzer.analyze_audio_file(path)
+    assert result["success"]
+    assert result["key"] is None and result["scale"] is None
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+🌐 Tests - Validación de URLs de descarga (audio_download)
+Solo http(s) hacia direcciones públicas; sin resolver DNS (IPs literales).
+
+Uso: python -m pytest -q tests/test_audio_download.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_download import check_url
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://8.8.8.8/track.wav",
+    "file:///etc/passwd",
+    "http://127.0.0.1:8000/track.wav",
+    "http://[::1]/track.wav",
+    "http://10.0.0.5/track.wav",
+    "http://192.168.1.10/track.wav",
+    "http://169.254.169.254/latest/meta-data",
+    "http://0.0.0.0/track.wav",
+])
+def test_rejects_non_public_urls(url):
+    with pytest.raises(ValueError):
+        check_url(url)
+
+
+def test_accepts_public_address():
+    check_url("https://8.8.8.8/track.wav")
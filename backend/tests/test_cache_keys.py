@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+🔑 Tests - Claves canónicas del cache (cache_keys)
+Variaciones equivalentes de un prompt deben acertar en el cache y
+letras que solo difieren en versos o estrofas nunca deben compartir clave.
+
+Uso: python -m pytest -q tests/test_cache_keys.py
+"""
+
+import os
+import sys
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_keys import build_cache_key, key_namespace, normalize_text
+
+
+class CreatorService:
+    """Misma forma que TheCreatorService: métodos con self"""
+
+    async def _call_qwen_api(self, prompt: str):
+        pass
+
+    async def _generate_with_suno(self, prompt: str, config: dict):
+        pass
+
+    async def translate(self, text: str, target_language: str = "en"):
+        pass
+
+
+SERVICE = CreatorService()
+
+PROMPTS = [
+    "Canción de reggaetón romántica, tempo medio, voz femenina",
+    "Balada épica sobre la ciudad de neón, con piano y cuerdas",
+    "Música electrónica oscura, 128 BPM, sintetizadores analógicos",
+]
+
+LYRICS = "Luces de neón\nen la ciudad\n\nbailamos hasta el amanecer"
+
+
+def prompt_variations(prompt: str):
+    """Variantes del mismo prompt que no cambian su significado"""
+    return [
+        prompt,
+        f"  {prompt}  ",
+        prompt.replace(" ", "  "),
+        prompt.replace(", ", ",\t"),
+        unicodedata.normalize("NFD", prompt),
+        prompt + "\r\n",
+    ]
+
+
+def qwen_key(prompt: str) -> str:
+    return build_cache_key(CreatorService._call_qwen_api, (SERVICE, prompt), {})
+
+
+def test_normalize_text_keeps_line_breaks():
+    assert normalize_text("  verso  uno \t\r\nverso\tdos  \r\n") == "verso uno\nverso dos"
+    assert normalize_text("a\n\nb") == "a\n\nb"
+    assert normalize_text("a\rb") == "a\nb"
+
+
+def test_prompt_variations_hit_rate():
+    seen = set()
+    hits = lookups = 0
+    for prompt in PROMPTS:
+        for variant in prompt_variations(prompt):
+            key = qwen_key(variant)
+            hits += key in seen
+            lookups += 1
+            seen.add(key)
+
+    # Solo la primera variante de cada prompt puede fallar
+    assert hits == lookups - len(PROMPTS)
+    assert len(seen) == len(PROMPTS)
+
+
+def test_lyrics_with_different_breaks_do_not_collide():
+    variants = [
+        LYRICS,
+        LYRICS.replace("\n\n", "\n"),
+        LYRICS.replace("\n", " "),
+        LYRICS.replace("\nen", " en"),
+    ]
+    keys = {qwen_key(variant) for variant in variants}
+    assert len(keys) == len(variants)
+
+    # Mismos versos con CRLF y espacios de sobra: misma clave
+    assert qwen_key("  " + LYRICS.replace("\n", " \r\n") + "\n") == qwen_key(LYRICS)
+
+
+def test_case_insensitive_is_opt_in():
+    translate = CreatorService.translate
+    exact = {build_cache_key(translate, (SERVICE, text), {}) for text in ("Crear Música", "crear música")}
+    folded = {build_cache_key(translate, (SERVICE, text), {}, case_insensitive=True)
+              for text in ("Crear Música", "crear música", "CREAR MÚSICA")}
+    assert len(exact) == 2
+    assert len(folded) == 1
+
+
+def test_keyword_and_positional_arguments_share_key():
+    translate = CreatorService.translate
+    keys = {
+        build_cache_key(translate, (SERVICE, "Ritmo Rápido"), {}),
+        build_cache_key(translate, (SERVICE,), {"text": "Ritmo Rápido"}),
+        build_cache_key(translate, (SERVICE, "Ritmo Rápido", "en"), {}),
+    }
+    assert len(keys) == 1
+
+
+def test_key_fields_ignore_request_ids():
+    suno = CreatorService._generate_with_suno
+    fields = ("prompt", "config.title", "config.lyrics", "config.style")
+    keys = {
+        build_cache_key(suno, (SERVICE, "Neón synthwave",
+                               {"title": "Neón", "lyrics": LYRICS, "style": "synthwave", "request_id": i}),
+                        {}, key_fields=fields)
+        for i in range(4)
+    }
+    assert len(keys) == 1
+
+
+def test_key_namespace_includes_version():
+    key = build_cache_key(CreatorService._call_qwen_api, (SERVICE, "hola"), {}, version="7")
+    assert key_namespace(key) == f"v7:{__name__}.CreatorService._call_qwen_api"
+    assert key_namespace("son1k:generate:abcd") == "unversioned:generate"
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+🗃️ Tests - Ring buffer columnar de métricas (metric_store)
+Crecimiento por duplicación, vuelta del anillo, ventanas por tiempo y
+escrituras concurrentes con lecturas.
+
+Uso: python -m pytest -q tests/test_metric_store.py
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metric_store import INITIAL_SLOTS, NO_TAGS, MetricRingBuffer, TagInterner
+
+
+def test_grows_by_doubling_up_to_capacity():
+    buffer = MetricRingBuffer(capacity=200)
+    assert buffer.allocated == INITIAL_SLOTS
+    allocations = set()
+    for i in range(200):
+        buffer.append(float(i), float(i))
+        allocations.add(buffer.allocated)
+    assert sorted(allocations) == [64, 128, 200]
+    assert len(buffer) == 200
+    assert buffer.nbytes == 200 * 20
+
+
+def test_wraps_keeping_newest_points():
+    buffer = MetricRingBuffer(capacity=100)
+    for i in range(250):
+        buffer.append(float(i), float(i))
+    assert buffer.allocated == 100 and len(buffer) == 100
+    assert buffer.oldest_timestamp == 150.0
+
+    timestamps, values, tag_ids = buffer.window(since=0)
+    np.testing.assert_array_equal(timestamps, np.arange(150, 250))
+    np.testing.assert_array_equal(values, np.arange(150, 250))
+    assert set(tag_ids.tolist()) == {NO_TAGS}
+
+    # La ventana cruza el final de las columnas: dos tramos
+    timestamps, _, _ = buffer.window(since=240.5)
+    np.testing.assert_array_equal(timestamps, np.arange(241, 250))
+
+
+def test_clock_going_back_keeps_order():
+    buffer = MetricRingBuffer(capacity=10)
+    for timestamp in (10.0, 12.0, 11.0, 13.0):
+        buffer.append(1.0, timestamp)
+    timestamps, _, _ = buffer.window(since=0)
+    assert timestamps.tolist() == [10.0, 12.0, 12.0, 13.0]
+
+
+def test_points_filter_by_tags_and_limit():
+    tags = TagInterner()
+    buffer = MetricRingBuffer(capacity=50)
+    for i in range(20):
+        method = "GET" if i % 2 else "POST"
+        buffer.append(float(i), float(i), tags.intern({"method": method, "route": "/x"}))
+
+    points = buffer.points(since=10, tag_interner=tags, tags={"method": "GET"})
+    assert [point["value"] for point in points] == [11.0, 13.0, 15.0, 17.0, 19.0]
+    assert points[0]["tags"] == {"method": "GET", "route": "/x"}
+
+    assert [point["value"] for point in buffer.points(0, tags, limit=3)] == [17.0, 18.0, 19.0]
+    assert buffer.points(0, tags, limit=0) == []
+
+
+def test_concurrent_appends_and_reads():
+    buffer = MetricRingBuffer(capacity=5000)
+    errors = []
+
+    def write(offset):
+        try:
+            for i in range(2000):
+                buffer.append(1.0, offset + i)
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(300):
+                timestamps, values, tag_ids = buffer.window(since=0)
+                assert len(timestamps) == len(values) == len(tag_ids)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n * 10000,)) for n in range(3)]
+    threads += [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(buffer) == 5000 and buffer.allocated == 5000
+
+
+def test_dashboard_window_stats(monkeypatch):
+    pytest.importorskip("psutil")
+    pytest.importorskip("prometheus_client")
+    import monitoring_analytics_system
+    from monitoring_analytics_system import MetricsDashboard
+
+    clock = [1_000_000.0]
+    monkeypatch.setattr(monitoring_analytics_system.time, "time", lambda: clock[0])
+    dashboard = MetricsDashboard(buffer_size=1000)
+    for i in range(120):
+        clock[0] = 1_000_000.0 + i
+        dashboard.record_metric("test.store.latency", float(i))
+
+    stats = dashboard.get_metric_stats("test.store.latency", time_window=30)
+    # Redondeo a intervalos de 10 s: cubre algo más que la ventana pedida
+    assert stats["window_seconds"] == 30
+    assert 30 <= stats["covered_seconds"] < 40
+    assert stats["max"] == 119.0
+    assert stats["count"] == stats["covered_seconds"] + 1
+
+    stats = dashboard.get_metric_stats("test.store.latency", time_window=7 * 24 * 3600)
+    assert stats["count"] == 120
+    assert stats["retention_seconds"] == 3600
+    assert stats["min"] == 0.0
+
+    points = dashboard.get_metric_points("test.store.latency", time_window=5)
+    assert [point["value"] for point in points] == [114.0, 115.0, 116.0, 117.0, 118.0, 119.0]
+    assert dashboard.get_metric_stats("test.store.missing")["count"] == 0
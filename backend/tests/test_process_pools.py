@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+🧵 Tests - Cierre de pools con workers colgados (process_pools)
+time.sleep hace de trabajo colgado: es picklable y no necesita módulo propio.
+
+Uso: python -m pytest -q tests/test_process_pools.py
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_pools import shutdown_executor
+
+
+def hung_pool():
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    pool.submit(time.sleep, 60)
+    pending = pool.submit(time.sleep, 60)
+    # Esperar a que el worker arranque y tome la primera tarea
+    deadline = time.monotonic() + 30
+    while not pool._processes and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(1.0)
+    return pool, list(pool._processes.values()), pending
+
+
+def test_hung_worker_is_terminated_after_grace():
+    pool, processes, pending = hung_pool()
+    started = time.monotonic()
+    shutdown_executor(pool, grace=0.5, wait=True)
+
+    assert time.monotonic() - started < 10
+    assert processes and not any(process.is_alive() for process in processes)
+    # Ya estaba en la cola del worker: no se cancela, pero termina (BrokenProcessPool) en vez de quedar colgada
+    assert pending.done()
+
+
+def test_background_reaper_returns_immediately():
+    pool, processes, _ = hung_pool()
+    started = time.monotonic()
+    shutdown_executor(pool, grace=0.2)
+    assert time.monotonic() - started < 1
+
+    deadline = time.monotonic() + 10
+    while any(process.is_alive() for process in processes) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_thread_pool_is_just_shut_down():
+    pool = ThreadPoolExecutor(max_workers=1)
+    future = pool.submit(sum, [1, 2, 3])
+    shutdown_executor(pool, wait=True)
+    assert future.result() == 6
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+⏱️ Tests - Middleware de métricas por petición (request_metrics)
+App ASGI mínima: el router de Starlette deja la ruta en scope["route"],
+aquí se simula igual.
+
+Uso: python -m pytest -q tests/test_request_metrics.py
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psutil")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_analytics_system import MetricsDashboard
+from request_metrics import UNMATCHED_ROUTE, RequestMetricsMiddleware
+
+ROUTES = {"/api/tracks/7": "/api/tracks/{track_id}", "/api/fail": "/api/fail"}
+
+
+async def app(scope, receive, send):
+    """200 con dos trozos de cuerpo, 500 en /api/fail y 404 sin ruta"""
+    await receive()
+    template = ROUTES.get(scope["path"])
+    if template is None:
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b"no"})
+        return
+    scope["route"] = SimpleNamespace(path=template)
+    if template == "/api/fail":
+        raise RuntimeError("fallo")
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"x" * 100, "more_body": True})
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.body", "body": b"y" * 50})
+
+
+def call(middleware, path: str, method: str = "GET", body: bytes = b""):
+    scope = {"type": "http", "method": method, "path": path, "root_path": "", "headers": []}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        try:
+            await middleware(scope, receive, send)
+        except RuntimeError:
+            pass
+
+    asyncio.run(run())
+    return sent
+
+
+@pytest.fixture
+def dashboard():
+    return MetricsDashboard(buffer_size=100)
+
+
+def test_records_status_counter_with_tags(dashboard):
+    middleware = RequestMetricsMiddleware(app, dashboard=dashboard)
+    call(middleware, "/api/tracks/7")
+    call(middleware, "/api/tracks/7")
+    call(middleware, "/nada")
+    call(middleware, "/api/fail")
+
+    assert dashboard.counters["total_requests"] == 4
+    assert dashboard.counters["total_errors"] == 1
+    # Un solo contador con tag status, no uno por código
+    assert dashboard.counters["http.responses"] == 4
+    assert not any(name.startswith("http.status.") for name in dashboard.counters)
+    assert dashboard.get_counter("http.responses", {"status": "200"}) == 2
+    assert dashboard.get_counter("http.responses", {"status": "404"}) == 1
+    assert dashboard.get_counter("http.responses", {"status": "500"}) == 1
+    breakdown = {entry["tags"]["status"]: entry["value"] for entry in dashboard.get_counter_breakdown("http.responses")}
+    assert breakdown == {"200": 2, "404": 1, "500": 1}
+    assert dashboard.gauges["http.requests_in_flight"] == 0
+
+
+def test_records_latency_and_sizes_by_route_template(dashboard):
+    middleware = RequestMetricsMiddleware(app, dashboard=dashboard)
+    call(middleware, "/api/tracks/7", method="POST", body=b"z" * 30)
+    call(middleware, "/nada")
+
+    points = dashboard.get_metric_points("http.request.duration_ms", tags={"status": "200"})
+    assert len(points) == 1
+    assert points[0]["tags"] == {"method": "POST", "route": "/api/tracks/{track_id}", "status": "200"}
+    # Latencia hasta el último trozo del cuerpo, que llega tras el sleep
+    assert points[0]["value"] >= 10
+
+    missing = dashboard.get_metric_points("http.request.duration_ms", tags={"status": "404"})
+    assert missing[0]["tags"]["route"] == UNMATCHED_ROUTE
+    assert dashboard.get_metric_points("http.request.bytes", tags={"status": "200"})[0]["value"] == 30
+    assert dashboard.get_metric_points("http.response.bytes", tags={"status": "200"})[0]["value"] == 150
+
+
+def test_sampling_keeps_counters_exact(dashboard):
+    middleware = RequestMetricsMiddleware(app, dashboard=dashboard, sample_rate=0.0)
+    for _ in range(5):
+        call(middleware, "/api/tracks/7")
+    assert dashboard.get_counter("http.responses", {"status": "200"}) == 5
+    assert dashboard.get_metric_points("http.request.duration_ms") == []
+
+
+def test_excluded_paths_are_not_measured(dashboard):
+    middleware = RequestMetricsMiddleware(app, dashboard=dashboard)
+    call(middleware, "/metrics")
+    assert dashboard.counters["total_requests"] == 0
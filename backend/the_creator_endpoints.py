@@ -6,6 +6,7 @@ API para la herramienta principal de generación musical
 
 from fastapi import APIRouter, HTTPException
 from the_creator_service import TheCreatorService
+from cache_warmup import cache_warmer, translation_seed_prompts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,16 @@ router = APIRouter(prefix="/api/the-creator", tags=["the-creator"])
 # Inicializar servicio
 creator_service = TheCreatorService()
 
+# Precarga del cache: estilos y prompts de traducción más pedidos
+cache_warmer.register(
+    "creator_style_prompt", creator_service.generate_prompt_from_style,
+    seeds=[{"style": style} for style in creator_service.get_musical_styles()]
+)
+cache_warmer.register(
+    "creator_translation", creator_service._translate_to_english,
+    seeds=[{"spanish_text": prompt} for prompt in translation_seed_prompts()]
+)
+
 @router.get("/status")
 async def get_creator_status():
     """Estado de The Creator"""
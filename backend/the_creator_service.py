@@ -11,6 +11,7 @@ import requests
 from typing import Dict, List, Optional
 import logging
 from performance_optimizer import performance_optimizer, optimize_ai_function, parallel_process
+from cache_warmup import cache_warmer
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +142,7 @@ class TheCreatorService:
     
     async def generate_prompt_from_style(self, style: str, title: str = "", has_lyrics: bool = False) -> Dict:
         """Generar prompt basado en estilo musical"""
+        cache_warmer.record("creator_style_prompt", style=style, title=title, has_lyrics=has_lyrics)
         try:
             prompt_generation = f"""
             Crea un prompt detallado para generar música con las siguientes características:
@@ -315,7 +317,9 @@ class TheCreatorService:
                 }
             }
             
-            response = requests.post(
+            # requests es bloqueante: en un hilo para no congelar el event loop
+            response = await asyncio.to_thread(
+                requests.post,
                 self.qwen_api_url,
                 json=payload,
                 timeout=45
@@ -323,7 +327,8 @@ class TheCreatorService:
             
             if response.status_code == 200:
                 result = response.json()
-                return result.get("response", "").strip()
+                # Respuesta vacía = fallo: None evita cachearla como resultado válido
+                return result.get("response", "").strip() or None
             else:
                 logger.warning(f"Qwen API error: {response.status_code}")
                 return None
@@ -338,6 +343,7 @@ class TheCreatorService:
     
     async def _translate_to_english(self, spanish_text: str) -> str:
         """Traducir texto al inglés para Suno"""
+        cache_warmer.record("creator_translation", spanish_text=spanish_text)
         translation_prompt = f"""
         Traduce el siguiente prompt musical al inglés manteniendo todos los términos técnicos y musicales correctos:
         
@@ -354,7 +360,10 @@ class TheCreatorService:
             # Fallback básico
             return self._basic_spanish_to_english(spanish_text)
     
-    @performance_optimizer.cache_ai_result('ai_results')
+    # Solo estos campos de config llegan a Suno
+    @performance_optimizer.cache_ai_result(
+        'ai_results', key_fields=('prompt', 'config.title', 'config.lyrics', 'config.style')
+    )
     async def _generate_with_suno(self, prompt: str, config: Dict) -> Dict:
         """Generar música con Suno API"""
         try: